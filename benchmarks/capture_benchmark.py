@@ -0,0 +1,156 @@
+'''End-to-end benchmark of capture_images function with synthetic cameras.
+
+The benchmark runs capture_images without preview for every combination of cameras number,
+resolution, storing processes number and storing format, and reports sustained capturing
+and writing FPS and peak memory of the capturing process. Storing queue memory is limited,
+so capturing waits for storing. Every configuration runs in its own process, so peak memory
+is measured separately. Results with environment description are saved to JSON file to
+compare results between versions.
+
+Usage:
+    python capture_benchmark.py [--duration SECONDS] [--output FILE]
+
+Note:
+    Peak memory is available only on Unix systems.
+'''
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import itertools
+import subprocess
+import tempfile
+import multiprocessing as mp
+from datetime import datetime
+from threading import Timer, Event
+
+import cv2
+import numpy as np
+
+# Import cameras_cv_tools from relative path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.camera_synthetic import CameraSynthetic
+from cameras_cv_tools.capturing import capture_images
+from cameras_cv_tools.telemetry import CaptureTelemetry
+
+
+CAMERAS_NUMS = [1, 2, 4]
+RESOLUTIONS = [(1920, 1080), (2448, 2048)]
+PROCESSES_TO_RUN = [1, 2, 4]
+FORMATS = ['png', 'bmp', 'raw']
+
+# Capturing is blocked when storing queue exceeds the limit, so capture FPS is sustainable by storing
+QUEUE_MEMORY_LIMIT = 512 * 1024 * 1024
+
+
+def get_peak_memory() -> int|None:
+    '''
+    Get peak resident memory of the current process in bytes or None if it is not available.
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def run_configuration(config: dict, duration: float, results: mp.Queue) -> None:
+    '''
+    Run capture_images with configuration for defined duration and put results to the queue.
+    '''
+    width, height = config['resolution']
+    cameras = CameraSynthetic.get_available_cameras(
+        config['cameras_num'], width=width, height=height, frame_rate=0, seed=0)
+
+    telemetry = CaptureTelemetry()
+    stop_event = Event()
+    Timer(duration, stop_event.set).start()
+
+    with tempfile.TemporaryDirectory() as path_to_store_images:
+        start = time.perf_counter()
+        recorded_info = capture_images(
+            cameras,
+            path_to_store_images,
+            images_file_names_mask=lambda cam_num, image_num: f'camera_{cam_num}_{image_num}.{config["format"]}',
+            processes_to_run=config['processes_to_run'],
+            recording_format='raw' if config['format'] == 'raw' else 'images',
+            queue_memory_limit=QUEUE_MEMORY_LIMIT,
+            preview=False,
+            stop_event=stop_event,
+            telemetry=telemetry)
+        elapsed = time.perf_counter() - start
+
+    stats = telemetry.get_stats()
+    results.put({
+        **config,
+        'capture_fps': len(recorded_info) / duration,
+        'write_fps': telemetry.files_stored / elapsed,
+        'elapsed': elapsed,
+        'peak_memory': get_peak_memory(),
+        'stages': stats['stages'],
+    })
+
+
+def get_environment() -> dict:
+    '''
+    Get description of environment to compare results between versions.
+    '''
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {
+        'date': f'{datetime.now()}',
+        'commit': commit,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='End-to-end benchmark of capture_images function')
+    parser.add_argument('--duration', type=float, default=5.0, help='capturing duration for configuration in seconds')
+    parser.add_argument('--output', default=f'capture_benchmark_{datetime.now():%Y-%m-%d_%H-%M}.json',
+                        help='path to JSON file to save results')
+    args = parser.parse_args()
+
+    benchmark = {'environment': get_environment(), 'duration': args.duration, 'results': []}
+
+    for cameras_num, resolution, processes_to_run, images_format in itertools.product(
+            CAMERAS_NUMS, RESOLUTIONS, PROCESSES_TO_RUN, FORMATS):
+        config = {
+            'cameras_num': cameras_num,
+            'resolution': resolution,
+            'processes_to_run': processes_to_run,
+            'format': images_format,
+        }
+
+        results = mp.Queue()
+        process = mp.Process(target=run_configuration, args=[config, args.duration, results])
+        process.start()
+        result = results.get()
+        process.join()
+
+        benchmark['results'].append(result)
+
+        peak_memory = f'{result["peak_memory"] / 1e6:.0f} MB' if result['peak_memory'] is not None else 'n/a'
+        print(f'Cameras {cameras_num}, {resolution[0]}x{resolution[1]}, processes {processes_to_run}, '
+              f'{images_format}: capture FPS {result["capture_fps"]:.1f}, write FPS {result["write_fps"]:.1f}, '
+              f'peak memory {peak_memory}')
+
+    with open(args.output, 'w', encoding='utf8') as output_file:
+        json.dump(benchmark, output_file, indent=4)
+        print(f'Results are saved to {args.output}')
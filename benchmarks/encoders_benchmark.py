@@ -0,0 +1,74 @@
+'''Benchmark of image encoders used to store captured images.
+
+The benchmark encodes synthetic mono and color images at cameras resolutions with every
+encoder and reports encoding speed in MB/s of raw image data and size of encoded image
+relative to raw image size. Encoding speed of one encoder multiplied by processes_to_run
+gives estimation of maximum storing speed of capture_images function.
+'''
+import os
+import sys
+import time
+
+import numpy as np
+
+# Import cameras_cv_tools from relative path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.encoders import (
+    ImageEncoder, OpenCVEncoder, PNGEncoder, JPEGEncoder, TIFFEncoder, WebPEncoder, NumpyEncoder)
+
+
+def generate_image(width: int, height: int, channels: int = 1) -> np.ndarray:
+    '''
+    Generate synthetic image with smooth pattern and noise, which is compressed similar to real images.
+    '''
+    x, y = np.meshgrid(np.linspace(0, 8 * np.pi, width), np.linspace(0, 6 * np.pi, height))
+    pattern = 127 + 80 * np.sin(x) * np.cos(y)
+
+    rng = np.random.default_rng(0)
+    images = [pattern + rng.normal(0, 4, pattern.shape) + 20 * channel for channel in range(channels)]
+    img = np.clip(np.dstack(images), 0, 255).astype(np.uint8)
+
+    return img[:, :, 0] if channels == 1 else img
+
+
+def measure_encoder(encoder: ImageEncoder, img: np.ndarray, min_time: float = 1.0) -> tuple[float, float]:
+    '''
+    Measure encoding speed in MB/s and ratio of encoded size to raw image size.
+    '''
+    encoded_size = len(encoder.encode(img))
+
+    encoded_count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        encoder.encode(img)
+        encoded_count = encoded_count + 1
+    elapsed = time.perf_counter() - start
+
+    return img.nbytes * encoded_count / elapsed / 1e6, encoded_size / img.nbytes
+
+
+if __name__ == "__main__":
+    RESOLUTIONS = [(2448, 2048), (1920, 1080)]
+
+    ENCODERS = {
+        'NPY': NumpyEncoder(),
+        'BMP': OpenCVEncoder('.bmp'),
+        'PNG compression 0': PNGEncoder(compression=0),
+        'PNG compression 1': PNGEncoder(compression=1),
+        'PNG compression 3': PNGEncoder(compression=3),
+        'PNG compression 9': PNGEncoder(compression=9),
+        'TIFF': TIFFEncoder(),
+        'TIFF LZW': TIFFEncoder(compression=5),
+        'WebP lossless': WebPEncoder(),
+        'JPEG quality 95': JPEGEncoder(quality=95),
+    }
+
+    for width, height in RESOLUTIONS:
+        for channels in (1, 3):
+            img = generate_image(width, height, channels)
+            print(f'\n{width}x{height}, {"mono" if channels == 1 else "color"}, {img.nbytes / 1e6:.1f} MB')
+
+            for name, encoder in ENCODERS.items():
+                speed, size_ratio = measure_encoder(encoder, img)
+                print(f'{name:>20}: {speed:8.1f} MB/s, size {size_ratio * 100:5.1f} %')
@@ -0,0 +1,81 @@
+'''Benchmark of capturing FPS with preview on and off.
+
+Synthetic cameras return Bayer frames, which are demosaiced by frame_converter for preview,
+so preview costs conversion of full resolution frames. Capturing FPS and the longest interval
+between frames (stall of capturing loop) are reported. With preview they should be close to
+values without preview, because conversion and decimation run in the preview thread, but on
+machines with few cores the preview thread takes CPU time from capturing. Images are stored
+as raw recording by one storing process to limit storing cost.
+
+Usage:
+    python preview_benchmark.py [--duration SECONDS] [--cameras NUM]
+
+Note:
+    Preview windows require OpenCV with GUI support.
+'''
+import os
+import sys
+import time
+import argparse
+import tempfile
+from threading import Timer, Event
+
+# Import cameras_cv_tools from relative path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.camera_synthetic import CameraSynthetic
+from cameras_cv_tools.capturing import capture_images
+from cameras_cv_tools.pixel_formats import PixelFormatConverter
+from cameras_cv_tools.telemetry import CaptureTelemetry
+
+
+RESOLUTION = (2448, 2048)
+PREVIEW_RATES = [0.0, 10.0, 30.0]
+
+
+class CameraSyntheticBayer(CameraSynthetic):
+    '''Synthetic camera returning frames in BayerRG8 pixel format.'''
+    @property
+    def frame_converter(self) -> PixelFormatConverter:
+        return PixelFormatConverter('BayerRG8', self.width, self.height)
+
+
+def measure_capture_fps(cameras_num: int, preview_rate: float, duration: float) -> tuple[float, dict]:
+    '''
+    Capture images for defined duration and return capturing FPS and summary of intervals between frames
+    of the first camera, preview is off if preview_rate is 0.
+    '''
+    width, height = RESOLUTION
+    cameras = [CameraSyntheticBayer(width, height, frame_rate=0, seed=cam_num) for cam_num in range(cameras_num)]
+
+    telemetry = CaptureTelemetry()
+    stop_event = Event()
+    Timer(duration, stop_event.set).start()
+
+    with tempfile.TemporaryDirectory() as path_to_store_images:
+        start = time.perf_counter()
+        recorded_info = capture_images(
+            cameras,
+            path_to_store_images,
+            processes_to_run=1,
+            recording_format='raw',
+            preview=preview_rate > 0,
+            preview_rate=preview_rate,
+            stop_event=stop_event,
+            telemetry=telemetry)
+        elapsed = time.perf_counter() - start
+
+    return len(recorded_info) / elapsed, telemetry.get_stats()['cameras'][0]['intervals']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark of capturing FPS with preview on and off')
+    parser.add_argument('--duration', type=float, default=5.0, help='capturing duration for configuration in seconds')
+    parser.add_argument('--cameras', type=int, default=1, help='number of cameras')
+    args = parser.parse_args()
+
+    for preview_rate in PREVIEW_RATES:
+        fps, intervals = measure_capture_fps(args.cameras, preview_rate, args.duration)
+        preview = f'preview {preview_rate:.0f} Hz' if preview_rate > 0 else 'preview off'
+        print(f'{preview}: capture FPS {fps:.1f}, frames interval p99 {intervals["p99_ms"]:.1f} ms, '
+              f'max {intervals["max_ms"]:.1f} ms')
@@ -0,0 +1,67 @@
+'''Benchmark of undistortion and rectification of captured images.
+
+The benchmark compares FPS of undistortion of 5 MP mono and color images by cv2.undistort,
+by cv2.remap with maps computed for every image and by FrameRemap with precomputed floating
+point and fixed point maps, and time of loading maps from cache.
+'''
+import os
+import sys
+import time
+import tempfile
+
+import cv2
+import numpy as np
+
+# Import cameras_cv_tools from relative path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.calibration import CameraParameters, MultiCameraCalibration, compute_remaps
+
+
+def measure_fps(function, images: list[np.ndarray], duration: float = 2.0) -> float:
+    images_processed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        function(images[images_processed % len(images)])
+        images_processed = images_processed + 1
+    return images_processed / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    WIDTH, HEIGHT = 2448, 2048
+
+    camera_matrix = np.array([[2500.0, 0, WIDTH / 2], [0, 2500.0, HEIGHT / 2], [0, 0, 1]])
+    dist_coeffs = np.array([-0.12, 0.08, 0.001, -0.001, 0.0])
+    image_size = (WIDTH, HEIGHT)
+
+    calibration = MultiCameraCalibration(
+        [CameraParameters(camera_matrix, dist_coeffs, image_size, 0.0)], [np.eye(3)], [np.zeros(3)], [0.0])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        frame_remap = compute_remaps(calibration, cache_dir, rectify=False)[0]
+        compute_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compute_remaps(calibration, cache_dir, rectify=False)
+        load_time = time.perf_counter() - start
+
+        float_frame_remap = compute_remaps(calibration, cache_dir, rectify=False, fixed_point=False)[0]
+
+    print(f'Maps computation {compute_time * 1000:.1f} ms, loading from cache {load_time * 1000:.1f} ms')
+
+    new_camera_matrix = cv2.getOptimalNewCameraMatrix(camera_matrix, dist_coeffs, image_size, 0)[0]
+
+    methods = {
+        'cv2.undistort': lambda img: cv2.undistort(img, camera_matrix, dist_coeffs, None, new_camera_matrix),
+        'maps for every image': lambda img: cv2.remap(img, *cv2.initUndistortRectifyMap(
+            camera_matrix, dist_coeffs, None, new_camera_matrix, image_size, cv2.CV_16SC2), cv2.INTER_LINEAR),
+        'floating point maps': float_frame_remap,
+        'fixed point maps': frame_remap,
+    }
+
+    random = np.random.default_rng(0)
+    for images_type, shape in (('mono', (HEIGHT, WIDTH)), ('color', (HEIGHT, WIDTH, 3))):
+        images = [random.integers(0, 256, shape, dtype=np.uint8) for _ in range(4)]
+        for method, function in methods.items():
+            print(f'{images_type} {WIDTH}x{HEIGHT}, {method}: FPS {measure_fps(function, images):.1f}')
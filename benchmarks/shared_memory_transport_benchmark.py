@@ -0,0 +1,58 @@
+'''Benchmark of passing images to storing processes of capture_images function
+through multiprocessing.Queue and through shared memory slots ring.
+
+The benchmark captures images from synthetic cameras generating 5 MP images and reports
+capturing FPS and CPU time used by capturing and storing processes for both transports.
+Images are stored in BMP format to minimize encoding time influence on results.
+
+Note:
+    CPU time of storing processes is available only on Unix systems.
+'''
+import os
+import sys
+import time
+import tempfile
+
+# Import cameras_cv_tools from relative path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.camera import Camera
+from cameras_cv_tools.camera_synthetic import CameraSynthetic
+from cameras_cv_tools.capturing import capture_images
+
+
+def run_capturing(cameras: list[Camera], images_to_capture: int, shared_memory_slots: int) -> dict:
+    with tempfile.TemporaryDirectory() as path_to_store_images:
+        times_start = os.times()
+        start = time.perf_counter()
+
+        capture_images(
+            cameras,
+            path_to_store_images,
+            images_to_capture=images_to_capture,
+            images_file_names_mask=lambda cam_num, image_num: f'camera_{cam_num}_{image_num}.bmp',
+            shared_memory_slots=shared_memory_slots,
+            preview=False)
+
+        elapsed = time.perf_counter() - start
+        times_end = os.times()
+
+    return {
+        'fps': images_to_capture / elapsed,
+        'capture_cpu': (times_end.user + times_end.system) - (times_start.user + times_start.system),
+        'storing_cpu': (times_end.children_user + times_end.children_system) -
+            (times_start.children_user + times_start.children_system),
+    }
+
+
+if __name__ == "__main__":
+    CAMERAS_NUM = 2
+    IMAGES_TO_CAPTURE = 300
+    SHARED_MEMORY_SLOTS = 32
+
+    cameras = CameraSynthetic.get_available_cameras(CAMERAS_NUM, width=2448, height=2048, frame_rate=0)
+
+    for transport, slots in (('Queue', 0), ('Shared memory', SHARED_MEMORY_SLOTS)):
+        result = run_capturing(cameras, IMAGES_TO_CAPTURE, slots)
+        print(f'{transport}: FPS {result["fps"]:.1f}, capturing CPU {result["capture_cpu"]:.2f} s, '
+              f'storing CPU {result["storing_cpu"]:.2f} s')
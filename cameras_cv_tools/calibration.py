@@ -0,0 +1,362 @@
+'''Module with calibration of one or several cameras and rectification of captured images.
+
+Intrinsic parameters of every camera are calibrated from detected calibration targets
+(see calibration_targets.py), extrinsic parameters of cameras are calibrated relative to
+the first camera from synchronized sets of images. Calibration is saved to JSON file.
+
+Undistortion and rectification of images is done by cv2.remap with maps computed once
+for every camera. Maps computation takes much longer than remapping of an image, so maps
+are cached in .npz files by hash of calibration parameters. Fixed point maps take less
+memory, floating point maps can be faster depending on OpenCV build and CPU
+(see benchmarks/rectification_benchmark.py). FrameRemap
+is picklable and can be used as frame converter of capturing pipeline: RectifiedCamera
+wraps any camera and rectifies its images in storing processes and preview, or in
+get_image if conversion is not deferred.
+
+Example:
+    calibration = calibrate_cameras([detect_targets(paths, target) for paths in cameras_images_paths])
+    calibration.save('calibration.json')
+    cameras = RectifiedCamera.get_available_cameras(2, cameras=cameras, calibration=calibration, cache_dir='maps')
+    capture_images(cameras, path_to_store_images)
+'''
+import os
+import json
+import hashlib
+from collections.abc import Callable
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from .camera import Camera
+from .calibration_targets import Detection
+
+
+# Minimum number of target points in image used for calibration
+MIN_POINTS = 6
+
+
+class CameraParameters(NamedTuple):
+    '''Intrinsic parameters of camera.
+
+    Attributes:
+        camera_matrix (np.ndarray): 3x3 camera matrix.
+        dist_coeffs (np.ndarray): distortion coefficients.
+        image_size (tuple[int, int]): image width and height.
+        rms (float): RMS reprojection error in pixels.
+    '''
+    camera_matrix: np.ndarray
+    dist_coeffs: np.ndarray
+    image_size: tuple[int, int]
+    rms: float
+
+
+class MultiCameraCalibration(NamedTuple):
+    '''Calibration of cameras. Extrinsic parameters transform points from the first camera
+    coordinate system to the camera coordinate system.
+
+    Attributes:
+        cameras (list[CameraParameters]): intrinsic parameters of cameras.
+        rotations (list[np.ndarray]): 3x3 rotation matrices of cameras, identity for the first camera.
+        translations (list[np.ndarray]): translation vectors of cameras, zero for the first camera.
+        stereo_rms (list[float]): RMS reprojection error of calibration of the camera with the first camera.
+    '''
+    cameras: list[CameraParameters]
+    rotations: list[np.ndarray]
+    translations: list[np.ndarray]
+    stereo_rms: list[float]
+
+
+    def save(self, file_path: str) -> None:
+        '''
+        Save calibration to JSON file.
+
+        Args:
+            file_path (str): path to file.
+        '''
+        calibration = {
+            'cameras': [{
+                'camera_matrix': camera.camera_matrix.tolist(),
+                'dist_coeffs': camera.dist_coeffs.reshape(-1).tolist(),
+                'image_size': list(camera.image_size),
+                'rms': camera.rms,
+            } for camera in self.cameras],
+            'rotations': [rotation.tolist() for rotation in self.rotations],
+            'translations': [translation.reshape(-1).tolist() for translation in self.translations],
+            'stereo_rms': list(self.stereo_rms),
+        }
+        with open(file_path, 'w', encoding='utf8') as file:
+            json.dump(calibration, file, indent=4)
+
+
+    @staticmethod
+    def load(file_path: str) -> 'MultiCameraCalibration':
+        '''
+        Load calibration from JSON file.
+
+        Args:
+            file_path (str): path to file.
+
+        Returns:
+            calibration (MultiCameraCalibration): loaded calibration.
+        '''
+        with open(file_path, encoding='utf8') as file:
+            calibration = json.load(file)
+
+        return MultiCameraCalibration(
+            [CameraParameters(
+                np.array(camera['camera_matrix']),
+                np.array(camera['dist_coeffs']),
+                tuple(camera['image_size']),
+                camera['rms']) for camera in calibration['cameras']],
+            [np.array(rotation) for rotation in calibration['rotations']],
+            [np.array(translation) for translation in calibration['translations']],
+            calibration['stereo_rms'])
+
+
+def calibrate_camera(detections: list[Detection|None], flags: int = 0) -> CameraParameters:
+    '''
+    Calibrate intrinsic parameters of camera.
+
+    Args:
+        detections (list[Detection|None]): detected targets in images of the camera, None for images without target.
+        flags (int, optional): cv2.calibrateCamera flags. Defaults to 0.
+
+    Returns:
+        parameters (CameraParameters): intrinsic parameters of camera.
+    '''
+    detections = [detection for detection in detections if detection is not None and len(detection.ids) >= MIN_POINTS]
+    if len(detections) == 0:
+        raise ValueError('No images with detected target to calibrate camera')
+
+    image_size = detections[0].image_size
+    rms, camera_matrix, dist_coeffs, _, _ = cv2.calibrateCamera(
+        [detection.object_points for detection in detections],
+        [detection.image_points for detection in detections],
+        image_size, None, None, flags=flags)
+
+    return CameraParameters(camera_matrix, dist_coeffs.reshape(-1), tuple(image_size), rms)
+
+
+def calibrate_cameras(detections: list[list[Detection|None]], flags: int = 0) -> MultiCameraCalibration:
+    '''
+    Calibrate intrinsic parameters of cameras and extrinsic parameters relative to the first camera.
+
+    Args:
+        detections (list[list[Detection|None]]): detected targets in synchronized images of every camera,
+        lists of cameras have the same length and detections with the same index are from one set of images.
+        flags (int, optional): cv2.calibrateCamera flags. Defaults to 0.
+
+    Returns:
+        calibration (MultiCameraCalibration): calibration of cameras.
+    '''
+    cameras = [calibrate_camera(camera_detections, flags) for camera_detections in detections]
+
+    rotations = [np.eye(3)]
+    translations = [np.zeros(3)]
+    stereo_rms = [0.0]
+
+    for cam_num in range(1, len(cameras)):
+        object_points, first_points, camera_points = [], [], []
+
+        for first, detection in zip(detections[0], detections[cam_num]):
+            if first is None or detection is None:
+                continue
+            # Points detected by both cameras, all points for full targets and common ids for ChArUco
+            _, first_indices, indices = np.intersect1d(first.ids, detection.ids, return_indices=True)
+            if len(indices) < MIN_POINTS:
+                continue
+            object_points.append(first.object_points[first_indices])
+            first_points.append(first.image_points[first_indices])
+            camera_points.append(detection.image_points[indices])
+
+        if len(object_points) == 0:
+            raise ValueError(f'No synchronized images with detected target for cameras 0 and {cam_num}')
+
+        rms, *_, rotation, translation, _, _ = cv2.stereoCalibrate(
+            object_points, first_points, camera_points,
+            cameras[0].camera_matrix, cameras[0].dist_coeffs,
+            cameras[cam_num].camera_matrix, cameras[cam_num].dist_coeffs,
+            cameras[0].image_size, flags=cv2.CALIB_FIX_INTRINSIC)
+
+        rotations.append(rotation)
+        translations.append(translation.reshape(-1))
+        stereo_rms.append(rms)
+
+    return MultiCameraCalibration(cameras, rotations, translations, stereo_rms)
+
+
+def rectification_transforms(
+        calibration: MultiCameraCalibration,
+        rectify: bool = True,
+        alpha: float = 0.0
+    ) -> tuple[list[np.ndarray], list[np.ndarray], np.ndarray|None]:
+    '''
+    Get rectification rotations and new projection matrices of cameras. Stereo rectification
+    is done for two cameras, images of other numbers of cameras are only undistorted.
+
+    Args:
+        calibration (MultiCameraCalibration): calibration of cameras.
+        rectify (bool, optional): rectify images of two cameras, otherwise images are only undistorted. Defaults to True.
+        alpha (float, optional): free scaling parameter, 0 - only valid pixels are visible, 1 - all source pixels
+        are visible. Defaults to 0.0.
+
+    Returns:
+        rotations (list[np.ndarray]): 3x3 rectification rotations of cameras.
+        projections (list[np.ndarray]): 3x3 or 3x4 new projection matrices of cameras.
+        disparity_to_depth (np.ndarray|None): 4x4 disparity to depth matrix for stereo rectification, otherwise None.
+    '''
+    cameras = calibration.cameras
+
+    if rectify and len(cameras) == 2:
+        rotation_0, rotation_1, projection_0, projection_1, disparity_to_depth, _, _ = cv2.stereoRectify(
+            cameras[0].camera_matrix, cameras[0].dist_coeffs, cameras[1].camera_matrix, cameras[1].dist_coeffs,
+            cameras[0].image_size, calibration.rotations[1], calibration.translations[1].reshape(3, 1), alpha=alpha)
+        return [rotation_0, rotation_1], [projection_0, projection_1], disparity_to_depth
+
+    projections = [
+        cv2.getOptimalNewCameraMatrix(camera.camera_matrix, camera.dist_coeffs, camera.image_size, alpha)[0]
+        for camera in cameras]
+    return [np.eye(3)] * len(cameras), projections, None
+
+
+class FrameRemap:
+    '''Picklable remapping of images by maps.
+
+    Args:
+        map1 (np.ndarray): first map of cv2.remap, integer part of fixed point map or x coordinates of floating point map.
+        map2 (np.ndarray): second map of cv2.remap, interpolation table of fixed point map or y coordinates
+        of floating point map.
+        interpolation (int, optional): interpolation method. Defaults to cv2.INTER_LINEAR.
+        frame_converter (Callable[[np.ndarray], np.ndarray], optional): function converting raw frames
+        to images before remapping (see Camera.frame_converter). Defaults to None.
+    '''
+    def __init__(
+            self,
+            map1: np.ndarray,
+            map2: np.ndarray,
+            interpolation: int = cv2.INTER_LINEAR,
+            frame_converter: Callable[[np.ndarray], np.ndarray] = None
+        ):
+        self.map1 = map1
+        self.map2 = map2
+        self.interpolation = interpolation
+        self.frame_converter = frame_converter
+
+
+    def __call__(self, img: np.ndarray) -> np.ndarray:
+        if self.frame_converter is not None:
+            img = self.frame_converter(img)
+        return cv2.remap(img, self.map1, self.map2, self.interpolation)
+
+
+def compute_remaps(
+        calibration: MultiCameraCalibration,
+        cache_dir: str = None,
+        rectify: bool = True,
+        alpha: float = 0.0,
+        interpolation: int = cv2.INTER_LINEAR,
+        fixed_point: bool = True
+    ) -> list[FrameRemap]:
+    '''
+    Compute undistortion and rectification maps of cameras or load them from cache.
+
+    Args:
+        calibration (MultiCameraCalibration): calibration of cameras.
+        cache_dir (str, optional): directory to cache maps, if None maps are not cached. Defaults to None.
+        rectify (bool, optional): rectify images of two cameras (see rectification_transforms). Defaults to True.
+        alpha (float, optional): free scaling parameter (see rectification_transforms). Defaults to 0.0.
+        interpolation (int, optional): interpolation method. Defaults to cv2.INTER_LINEAR.
+        fixed_point (bool, optional): compute fixed point maps (cv2.CV_16SC2), otherwise floating point
+        maps (cv2.CV_32FC1). Defaults to True.
+
+    Returns:
+        remaps (list[FrameRemap]): remapping of every camera images.
+    '''
+    rotations, projections, _ = rectification_transforms(calibration, rectify, alpha)
+    map_type = cv2.CV_16SC2 if fixed_point else cv2.CV_32FC1
+
+    remaps = []
+    for camera, rotation, projection in zip(calibration.cameras, rotations, projections):
+        # Maps are cached by all parameters used to compute them
+        key = hashlib.blake2b(digest_size=16)
+        for array in (camera.camera_matrix, camera.dist_coeffs, rotation, projection, camera.image_size, map_type):
+            key.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        cache_path = os.path.join(cache_dir, f'remap_{key.hexdigest()}.npz') if cache_dir is not None else None
+
+        if cache_path is not None and os.path.exists(cache_path):
+            with np.load(cache_path) as maps:
+                map1, map2 = maps['map1'], maps['map2']
+        else:
+            map1, map2 = cv2.initUndistortRectifyMap(
+                camera.camera_matrix, camera.dist_coeffs, rotation, projection, camera.image_size, map_type)
+            if cache_path is not None:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(cache_path, map1=map1, map2=map2)
+
+        remaps.append(FrameRemap(map1, map2, interpolation))
+
+    return remaps
+
+
+class RectifiedCamera(Camera):
+    '''Camera wrapper returning undistorted and rectified images of other camera.
+
+    Args:
+        camera (Camera): camera to get images from.
+        frame_remap (FrameRemap): remapping of the camera images (see compute_remaps).
+        deferred (bool, optional): return images as they are got from camera and rectify them by
+        frame_converter in storing processes and preview, otherwise images are rectified in get_image.
+        Defaults to True.
+    '''
+    def __init__(self, camera: Camera, frame_remap: FrameRemap, deferred: bool = True):
+        self.camera = camera
+        self.type = 'rectified'
+        self.deferred = deferred
+
+        # Raw frames of the camera are converted before remapping
+        self.frame_remap = FrameRemap(
+            frame_remap.map1, frame_remap.map2, frame_remap.interpolation, camera.frame_converter)
+
+
+    @staticmethod
+    def get_available_cameras(
+            cameras_num_to_find: int = 1,
+            cameras: list[Camera] = None,
+            calibration: MultiCameraCalibration|str = None,
+            cache_dir: str = None,
+            rectify: bool = True,
+            deferred: bool = True
+        ) -> list[Camera]:
+        '''
+        Returns list of rectified cameras wrapping calibrated cameras.
+
+        Args:
+            cameras_num_to_find (int): The number of cameras to wrap. Defaults to 1.
+            cameras (list[Camera]): calibrated cameras in calibration order.
+            calibration (MultiCameraCalibration|str): calibration of cameras or path to JSON file with it.
+            cache_dir (str, optional): directory to cache maps. Defaults to None.
+            rectify (bool, optional): rectify images of two cameras (see rectification_transforms). Defaults to True.
+            deferred (bool, optional): defer rectification to storing processes and preview. Defaults to True.
+
+        Returns:
+            cameras (list[Camera]): List of rectified cameras.
+        '''
+        if isinstance(calibration, str):
+            calibration = MultiCameraCalibration.load(calibration)
+
+        remaps = compute_remaps(calibration, cache_dir, rectify)
+        return [RectifiedCamera(camera, frame_remap, deferred)
+                for camera, frame_remap in list(zip(cameras, remaps))[:cameras_num_to_find]]
+
+
+    def get_image(self) -> tuple[np.ndarray|int]:
+        img, timestamp = self.camera.get_image()
+        if not self.deferred:
+            img = self.frame_remap(img)
+        return img, timestamp
+
+
+    @property
+    def frame_converter(self) -> FrameRemap|None:
+        return self.frame_remap if self.deferred else None
@@ -0,0 +1,385 @@
+'''Module with detection of calibration targets in series of captured images.
+
+Detection of target in thousands of images is the longest stage of calibration, so images
+are processed in parallel processes. Chessboard corners are found in downscaled image and
+refined to subpixel accuracy in full resolution image. Results of detection are stored
+in cache file by hash of image file content and target description, so calibration can be
+repeated with different parameters without detection. Files are hashed only if their size
+or modification time is changed since the previous detection.
+
+Supported targets:
+
+    ChessboardTarget - chessboard with inner corners grid;
+    CircleGridTarget - symmetric or asymmetric circles grid;
+    CharucoTarget - ChArUco board, partially visible boards are detected.
+
+Example:
+    target = ChessboardTarget((9, 6), square_size=0.025)
+    detections = detect_targets(images_paths, target, cache_file='detections.json')
+'''
+import os
+import json
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class Detection(NamedTuple):
+    '''Calibration target detected in image.
+
+    Attributes:
+        image_points (np.ndarray): array (N, 2) of detected points in image in pixels.
+        object_points (np.ndarray): array (N, 3) of corresponding points of target in target units.
+        ids (np.ndarray): array (N,) with numbers of detected points in target.
+        image_size (tuple[int, int]): image width and height.
+    '''
+    image_points: np.ndarray
+    object_points: np.ndarray
+    ids: np.ndarray
+    image_size: tuple[int, int]
+
+
+class CalibrationTarget(ABC):
+    '''Base class of calibration targets.
+
+    Args:
+        pattern_size (tuple[int, int]): number of points in target row and column.
+        spacing (float): distance between neighbouring points in target units.
+    '''
+    def __init__(self, pattern_size: tuple[int, int], spacing: float):
+        self.pattern_size = tuple(pattern_size)
+        self.spacing = spacing
+
+
+    @property
+    def key(self) -> str:
+        '''
+        Description of the target used as part of detection cache key.
+        '''
+        return f'{type(self).__name__}{self.pattern_size}{self.spacing}'
+
+
+    @property
+    def object_points(self) -> np.ndarray:
+        '''
+        Array (N, 3) of target points coordinates.
+        '''
+        cols, rows = self.pattern_size
+        grid = np.mgrid[0:cols, 0:rows].T.reshape(-1, 2)
+        return np.hstack([grid * self.spacing, np.zeros((len(grid), 1))]).astype(np.float32)
+
+
+    @abstractmethod
+    def detect(self, gray: np.ndarray, detection_size: int = 1000) -> tuple[np.ndarray, np.ndarray]|None:
+        '''
+        Detect target in image.
+
+        Args:
+            gray (np.ndarray): grayscale image.
+            detection_size (int, optional): maximum size of image side used for fast detection. Defaults to 1000.
+
+        Returns:
+            image_points (np.ndarray): array (N, 2) of detected points.
+            ids (np.ndarray): array (N,) with numbers of detected points in target.
+            None is returned if target is not detected.
+        '''
+
+
+class ChessboardTarget(CalibrationTarget):
+    '''Chessboard target.
+
+    Args:
+        pattern_size (tuple[int, int]): number of inner corners in chessboard row and column.
+        square_size (float): size of chessboard square in target units.
+    '''
+    def __init__(self, pattern_size: tuple[int, int], square_size: float = 1.0):
+        super().__init__(pattern_size, square_size)
+
+
+    def detect(self, gray: np.ndarray, detection_size: int = 1000) -> tuple[np.ndarray, np.ndarray]|None:
+        scale = min(1.0, detection_size / max(gray.shape))
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+
+        found, corners = cv2.findChessboardCorners(
+            small, self.pattern_size,
+            flags=cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE | cv2.CALIB_CB_FAST_CHECK)
+        if not found:
+            return None
+
+        corners = corners.reshape(-1, 2) / scale
+
+        # Refinement window is limited by distance between corners
+        distance = np.linalg.norm(np.diff(corners[:self.pattern_size[0]], axis=0), axis=1).min()
+        window = int(np.clip(distance / 4, 2, 15))
+
+        corners = cv2.cornerSubPix(
+            gray, corners.reshape(-1, 1, 2).astype(np.float32), (window, window), (-1, -1),
+            (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001))
+
+        return corners.reshape(-1, 2), np.arange(len(corners))
+
+
+class CircleGridTarget(CalibrationTarget):
+    '''Circles grid target. Circles are detected in full resolution image, downscaled image is used
+    to skip images without target.
+
+    Args:
+        pattern_size (tuple[int, int]): number of circles in grid row and column.
+        spacing (float): distance between circles centers in target units, for asymmetric grid
+        distance between circles in row.
+        asymmetric (bool, optional): asymmetric circles grid. Defaults to False.
+    '''
+    def __init__(self, pattern_size: tuple[int, int], spacing: float = 1.0, asymmetric: bool = False):
+        super().__init__(pattern_size, spacing)
+        self.asymmetric = asymmetric
+
+
+    @property
+    def key(self) -> str:
+        return f'{super().key}{self.asymmetric}'
+
+
+    @property
+    def object_points(self) -> np.ndarray:
+        if not self.asymmetric:
+            return super().object_points
+
+        cols, rows = self.pattern_size
+        points = [((2 * col + row % 2) * self.spacing / 2, row * self.spacing / 2, 0)
+                  for row in range(rows) for col in range(cols)]
+        return np.array(points, dtype=np.float32)
+
+
+    def detect(self, gray: np.ndarray, detection_size: int = 1000) -> tuple[np.ndarray, np.ndarray]|None:
+        flags = cv2.CALIB_CB_ASYMMETRIC_GRID if self.asymmetric else cv2.CALIB_CB_SYMMETRIC_GRID
+
+        scale = min(1.0, detection_size / max(gray.shape))
+        if scale < 1:
+            small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if not cv2.findCirclesGrid(small, self.pattern_size, flags=flags)[0]:
+                return None
+
+        # Default blob detector skips circles bigger than 5000 pixels area in high resolution images
+        params = cv2.SimpleBlobDetector_Params()
+        params.maxArea = gray.size / (self.pattern_size[0] * self.pattern_size[1])
+        found, centers = cv2.findCirclesGrid(
+            gray, self.pattern_size, flags=flags, blobDetector=cv2.SimpleBlobDetector_create(params))
+        if not found:
+            return None
+
+        return centers.reshape(-1, 2), np.arange(len(centers))
+
+
+class CharucoTarget(CalibrationTarget):
+    '''ChArUco board target. Markers are detected in downscaled image, chessboard corners
+    are interpolated and refined in full resolution image.
+
+    Args:
+        squares (tuple[int, int]): number of squares in board row and column.
+        square_size (float): size of board square in target units.
+        marker_size (float): size of ArUco marker in target units.
+        dictionary (int, optional): ArUco dictionary. Defaults to cv2.aruco.DICT_5X5_100.
+        min_points (int, optional): minimum number of detected corners. Defaults to 6.
+    '''
+    def __init__(
+            self,
+            squares: tuple[int, int],
+            square_size: float,
+            marker_size: float,
+            dictionary: int = cv2.aruco.DICT_5X5_100,
+            min_points: int = 6
+        ):
+        super().__init__((squares[0] - 1, squares[1] - 1), square_size)
+        self.squares = tuple(squares)
+        self.marker_size = marker_size
+        self.dictionary = dictionary
+        self.min_points = min_points
+        self._detector = None
+
+
+    def __getstate__(self) -> dict:
+        # OpenCV detector is not picklable, it is created again in detection process
+        return {**self.__dict__, '_detector': None}
+
+
+    @property
+    def key(self) -> str:
+        return f'{type(self).__name__}{self.squares}{self.spacing}{self.marker_size}{self.dictionary}'
+
+
+    @property
+    def board(self) -> cv2.aruco.CharucoBoard:
+        return cv2.aruco.CharucoBoard(
+            self.squares, self.spacing, self.marker_size, cv2.aruco.getPredefinedDictionary(self.dictionary))
+
+
+    @property
+    def object_points(self) -> np.ndarray:
+        return self.board.getChessboardCorners().reshape(-1, 3).astype(np.float32)
+
+
+    def detect(self, gray: np.ndarray, detection_size: int = 1000) -> tuple[np.ndarray, np.ndarray]|None:
+        if self._detector is None:
+            self._detector = cv2.aruco.CharucoDetector(self.board)
+
+        scale = min(1.0, detection_size / max(gray.shape))
+        if scale < 1:
+            small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            _, _, marker_corners, marker_ids = self._detector.detectBoard(small)
+            if marker_ids is None:
+                return None
+
+            # Markers found in downscaled image are not detected again in full resolution image
+            marker_corners = tuple((marker / scale).astype(np.float32) for marker in marker_corners)
+            corners, ids, _, _ = self._detector.detectBoard(gray, markerCorners=marker_corners, markerIds=marker_ids)
+        else:
+            corners, ids, _, _ = self._detector.detectBoard(gray)
+
+        if ids is None or len(ids) < self.min_points:
+            return None
+
+        return corners.reshape(-1, 2), ids.reshape(-1)
+
+
+def _hash_data(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _detect_file(file_path: str, target: CalibrationTarget, detection_size: int) -> tuple[str, dict|None]:
+    with open(file_path, 'rb') as file:
+        data = file.read()
+
+    gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f'Image {file_path} cannot be read')
+
+    points = target.detect(gray, detection_size)
+    if points is None:
+        return _hash_data(data), {'image_size': [gray.shape[1], gray.shape[0]]}
+
+    image_points, ids = points
+    return _hash_data(data), {
+        'image_size': [gray.shape[1], gray.shape[0]],
+        'image_points': image_points.tolist(),
+        'ids': ids.tolist(),
+    }
+
+
+class DetectionCache:
+    '''JSON file with results of targets detection by hash of image file and target key.
+    Size, modification time and hash of files are stored to skip hashing of not changed files.
+
+    Args:
+        file_path (str): path to cache file, if None cache is kept only in memory.
+    '''
+    def __init__(self, file_path: str = None):
+        self.file_path = file_path
+        self.files = {}
+        self.results = {}
+
+        if file_path is not None and os.path.exists(file_path):
+            with open(file_path, encoding='utf8') as file:
+                cache = json.load(file)
+            self.files = cache['files']
+            self.results = cache['results']
+
+
+    def get_hash(self, file_path: str) -> str|None:
+        '''
+        Get hash of the file if the file is not changed since it was hashed.
+        '''
+        stat = os.stat(file_path)
+        file_info = self.files.get(os.path.abspath(file_path))
+        if file_info is not None and file_info[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return file_info[2]
+        return None
+
+
+    def set_hash(self, file_path: str, file_hash: str) -> None:
+        stat = os.stat(file_path)
+        self.files[os.path.abspath(file_path)] = [stat.st_size, stat.st_mtime_ns, file_hash]
+
+
+    def save(self) -> None:
+        '''
+        Save cache to file.
+        '''
+        if self.file_path is None:
+            return
+        with open(self.file_path, 'w', encoding='utf8') as file:
+            json.dump({'files': self.files, 'results': self.results}, file)
+
+
+def detect_targets(
+        images_paths: list[str],
+        target: CalibrationTarget,
+        processes: int = None,
+        cache_file: str = None,
+        detection_size: int = 1000
+    ) -> list[Detection|None]:
+    '''
+    Detect calibration target in images in parallel processes.
+
+    Args:
+        images_paths (list[str]): paths to images files.
+        target (CalibrationTarget): calibration target to detect.
+        processes (int, optional): number of processes, if None number of CPUs is used. Defaults to None.
+        cache_file (str, optional): path to JSON file with cached detection results. Defaults to None.
+        detection_size (int, optional): maximum size of downscaled image side used for fast detection. Defaults to 1000.
+
+    Returns:
+        detections (list[Detection|None]): detected target for every image, None if target is not detected.
+    '''
+    cache = DetectionCache(cache_file)
+
+    results = [None] * len(images_paths)
+    to_detect = []
+
+    for image_num, image_path in enumerate(images_paths):
+        file_hash = cache.get_hash(image_path)
+        result = cache.results.get(f'{file_hash}:{target.key}') if file_hash is not None else None
+        if result is not None:
+            results[image_num] = result
+        else:
+            to_detect.append(image_num)
+
+    if to_detect:
+        with ProcessPoolExecutor(processes) as executor:
+            detected = executor.map(
+                _detect_file,
+                [images_paths[image_num] for image_num in to_detect],
+                [target] * len(to_detect),
+                [detection_size] * len(to_detect),
+                chunksize=max(1, len(to_detect) // (8 * (processes or os.cpu_count() or 1))))
+
+            for image_num, (file_hash, result) in zip(to_detect, detected):
+                cache.set_hash(images_paths[image_num], file_hash)
+                cache.results[f'{file_hash}:{target.key}'] = result
+                results[image_num] = result
+
+        cache.save()
+
+    object_points = target.object_points
+
+    detections = []
+    for result in results:
+        if 'ids' not in result:
+            detections.append(None)
+            continue
+        ids = np.array(result['ids'], dtype=np.int32)
+        detections.append(Detection(
+            np.array(result['image_points'], dtype=np.float32), object_points[ids], ids, tuple(result['image_size'])))
+
+    logger.info('Target is detected in %d of %d images, %d results are got from cache',
+                sum(detection is not None for detection in detections), len(images_paths),
+                len(images_paths) - len(to_detect))
+
+    return detections
@@ -7,6 +7,7 @@ of classes for working with cameras are contained in files:
 camera_generic_web.py, camera_baumer.py and others.
 '''
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 
 import numpy as np
 
@@ -40,4 +41,122 @@ class Camera(ABC):
             image (np.ndarray): Image as numpy array (2D or 3D depending on color mode).
             timestamp (int): Timestamp in nanoseconds corresponding to the system time 
                 since January 1, 1970 (in Unix format).
-        '''
\ No newline at end of file
+        '''
+
+
+    def get_image_into(self, out: np.ndarray) -> int:
+        '''
+        Get image from camera to preallocated array. Cameras able to write images directly
+        to the array avoid allocation of image for every frame, others copy image returned by get_image.
+
+        Args:
+            out (np.ndarray): array with shape and data type of image.
+
+        Returns:
+            timestamp (int): Timestamp of the image in nanoseconds (see get_image).
+        '''
+        img, timestamp = self.get_image()
+        out[...] = img
+        return timestamp
+
+
+    @property
+    def frame_converter(self) -> Callable[[np.ndarray], np.ndarray]|None:
+        '''
+        Function converting raw frames returned by get_image to images, used by cameras returning
+        frames in Bayer or packed pixel formats to defer conversion to storing processes and preview.
+
+        Returns:
+            frame_converter (Callable[[np.ndarray], np.ndarray]|None): picklable function converting frame
+                to image or None if get_image returns converted images.
+        '''
+        return None
+
+
+    @property
+    def roi(self) -> tuple[int, int, int, int]|None:
+        '''
+        Region of interest of images as offset x, offset y, width and height in pixels of binned and
+        decimated image, None for full images. Cameras without hardware ROI crop images by slicing
+        without copying.
+        '''
+        return getattr(self, '_roi', None)
+
+    @roi.setter
+    def roi(self, x: tuple[int, int, int, int]|None):
+        self._roi = tuple(x) if x is not None else None
+
+
+    @property
+    def binning(self) -> int:
+        '''
+        Number of pixels in horizontal and vertical directions averaged to one pixel. Cameras without
+        hardware binning average pixels of images in get_image.
+        '''
+        return getattr(self, '_binning', 1)
+
+    @binning.setter
+    def binning(self, x: int):
+        self._binning = x
+
+
+    @property
+    def decimation(self) -> int:
+        '''
+        Step of pixels in horizontal and vertical directions kept in images. Cameras without
+        hardware decimation decimate images by slicing without copying.
+        '''
+        return getattr(self, '_decimation', 1)
+
+    @decimation.setter
+    def decimation(self, x: int):
+        self._decimation = x
+
+
+    def apply_roi(self, img: np.ndarray) -> np.ndarray:
+        '''
+        Apply software ROI, binning and decimation to image. Used by cameras implementations in get_image.
+
+        Args:
+            img (np.ndarray): full image.
+
+        Returns:
+            img (np.ndarray): image view of the region of interest, binned image is a new array.
+        '''
+        decimation = getattr(self, '_decimation', 1)
+        binning = getattr(self, '_binning', 1)
+        roi = getattr(self, '_roi', None)
+
+        if roi is not None:
+            # ROI is defined in pixels of binned and decimated image
+            x, y, width, height = roi
+            step = decimation * binning
+            img = img[y * step:(y + height) * step, x * step:(x + width) * step]
+
+        return decimate_and_bin(img, decimation, binning)
+
+
+def decimate_and_bin(img: np.ndarray, decimation: int = 1, binning: int = 1) -> np.ndarray:
+    '''
+    Decimate image and average binned pixels.
+
+    Args:
+        img (np.ndarray): image.
+        decimation (int, optional): step of pixels kept in horizontal and vertical directions. Defaults to 1.
+        binning (int, optional): number of pixels averaged in horizontal and vertical directions. Defaults to 1.
+
+    Returns:
+        img (np.ndarray): decimated view of the image, binned image is a new array.
+    '''
+    if decimation > 1:
+        img = img[::decimation, ::decimation]
+
+    if binning > 1:
+        height, width = img.shape[0] // binning, img.shape[1] // binning
+        blocks = img[:height * binning, :width * binning].reshape(height, binning, width, binning, *img.shape[2:])
+        if img.dtype.kind in 'ui':
+            img = (blocks.sum(axis=(1, 3), dtype=np.uint64) // (binning * binning)).astype(img.dtype)
+        else:
+            img = blocks.mean(axis=(1, 3)).astype(img.dtype)
+
+    return img
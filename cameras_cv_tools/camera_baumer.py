@@ -9,21 +9,43 @@ import numpy as np
 import neoapi # type: ignore
 
 from .camera import Camera
+from .pixel_formats import PixelFormatConverter, packed_frame_size
+from .discovery import discover_devices, probe_devices
 
 
 class CameraBaumer(Camera):
     '''Camera class implementation for Baumer cameras using NeoAPI.
 
+    Frames in Mono8 pixel format are returned as 2D images. Frames in other pixel formats (Bayer, 10/12 bit,
+    packed) are returned as received from camera if deferred_conversion is True and are converted by
+    frame_converter in storing processes and preview (see pixel_formats.py), otherwise they are
+    converted in get_image.
+
+    ROI is set by sensor OffsetX, OffsetY, Width and Height, binning and decimation are set by camera
+    features if they are available. Otherwise binning and decimation are done in get_image for Mono8 and
+    converted images and by frame_converter for deferred conversion, set them before ROI in this case.
+
+    Args:
+        camera (neoapi.Cam): NeoAPI camera object, connected or not.
+        serial_number (str, optional): serial number of camera to connect if camera is not connected.
+        Defaults to None.
+        deferred_conversion (bool, optional): return frames in camera pixel format without conversion.
+        Defaults to True.
+
     Note:
         The module requires NeoAPI from Baumer to work.
     '''
-    def __init__(self, camera: neoapi.Cam, serial_number: str = None):
+    def __init__(self, camera: neoapi.Cam, serial_number: str = None, deferred_conversion: bool = True):
         self.camera = camera
+        self.deferred_conversion = deferred_conversion
+        self._converter = None
         
-        if serial_number is not None:
-            self.camera.Connect(serial_number)            
-        else:
-            self.camera.Connect()
+        # Camera can be connected by discovery before
+        if not self.camera.IsConnected():
+            if serial_number is not None:
+                self.camera.Connect(serial_number)
+            else:
+                self.camera.Connect()
         self.type = 'baumer'
         
         # Sync system and camera time
@@ -37,26 +59,74 @@ class CameraBaumer(Camera):
     @staticmethod
     def get_available_cameras(
         cameras_num_to_find: int = 1, 
-        cameras_serial_numbers: list[str] = []
+        cameras_serial_numbers: list[str] = [],
+        timeout: float = 10.0,
+        cache_file: str = None
         ) -> list[Camera]:
-        # Empty list to return founded cameras
-        cameras = []
-        
-        while cameras_num_to_find > 0:
-            # Get next camera from neoapi
-            if len(cameras_serial_numbers) == 0:
-                camera = CameraBaumer(neoapi.Cam())
-            else:
-                # Connect devices by serial number
-                camera = CameraBaumer(neoapi.Cam(), cameras_serial_numbers[-1])
-                if camera.camera.f.DeviceSerialNumber.value not in cameras_serial_numbers:
-                    raise Exception(f'Error, camera serial number is not {cameras_serial_numbers[-1]}')
-                cameras_serial_numbers.pop()
+        '''
+        Returns list of connected Baumer cameras. Cameras are connected concurrently and configured
+        only after they are selected.
+
+        Args:
+            cameras_num_to_find (int): The number of cameras to connect. Defaults to 1.
+            cameras_serial_numbers (list[str], optional): serial numbers of cameras to connect, cameras
+            are returned from the last serial number to the first. If empty, any available cameras are connected.
+            Defaults to [].
+            timeout (float, optional): maximum time to wait for connection of cameras in seconds. Defaults to 10.0.
+            cache_file (str, optional): path to JSON file with serial numbers of cameras connected last time,
+            used if cameras_serial_numbers is empty. Cached cameras are connected without enumeration
+            if all of them are available. Defaults to None.
+
+        Returns:
+            cameras (list[Camera]): List of connected cameras.
+        '''
+        # Cameras are probed by connection without configuration, cameras over count are only disconnected
+        def connect(serial_number: str) -> neoapi.Cam:
+            camera = neoapi.Cam()
+            camera.Connect(serial_number)
+            if camera.f.DeviceSerialNumber.value != serial_number:
+                camera.Disconnect()
+                raise Exception(f'Error, camera serial number is not {serial_number}')
+            return camera
+
+        def disconnect(camera: neoapi.Cam) -> None:
+            camera.Disconnect()
+
+        if len(cameras_serial_numbers) == 0:
+            cameras = discover_devices(
+                connect,
+                CameraBaumer.enumerate_cameras,
+                timeout,
+                disconnect,
+                cache_file,
+                'baumer',
+                cameras_num_to_find)
+            return [CameraBaumer(camera) for camera in cameras.values()]
+
+        # Connect devices by serial number
+        serial_numbers = cameras_serial_numbers[::-1][:cameras_num_to_find]
+        cameras = probe_devices(connect, serial_numbers, timeout, disconnect)
+
+        for serial_number in serial_numbers:
+            if serial_number not in cameras:
+                for camera in cameras.values():
+                    disconnect(camera)
+                raise Exception(f'Error, camera with serial number {serial_number} is not connected')
+
+        return [CameraBaumer(camera) for camera in cameras.values()]
+
 
-            cameras.append(camera)
-            cameras_num_to_find = cameras_num_to_find - 1
+    @staticmethod
+    def enumerate_cameras() -> list[str]:
+        '''
+        Returns serial numbers of available cameras without connecting to them.
 
-        return cameras
+        Returns:
+            serial_numbers (list[str]): serial numbers of connectable cameras.
+        '''
+        camera_infos = neoapi.CamInfoList.Get()
+        camera_infos.Refresh()
+        return [camera_info.GetSerialNumber() for camera_info in camera_infos if camera_info.IsConnectable()]
 
 
     def get_image(self) -> tuple[np.ndarray|int]:
@@ -65,13 +135,120 @@ class CameraBaumer(Camera):
 
         # Convert it to numpy array
         img = baumer_image.GetNPArray()
-        img = img.reshape(img.shape[0], img.shape[1])
+        pixel_format = baumer_image.GetPixelFormat()
+        if pixel_format == 'Mono8':
+            img = img.reshape(img.shape[0], img.shape[1])
+        else:
+            width, height = baumer_image.GetWidth(), baumer_image.GetHeight()
+            # Raw frame data without padding as rows of bytes
+            data = img.reshape(-1).view(np.uint8)[:packed_frame_size(pixel_format, width, height)]
+            img = data.reshape(height, -1)
+
+            if not self.deferred_conversion:
+                img = self._get_converter(pixel_format, width, height)(img)
+
+        if pixel_format == 'Mono8' or not self.deferred_conversion:
+            # Software binning and decimation if camera has not them
+            img = self.apply_roi(img)
         
         # Get timestamp in system time (approximately)
         timestamp = baumer_image.GetTimestamp() + self.system_timestamp_shift
         return img, timestamp
 
 
+    @property
+    def frame_converter(self) -> PixelFormatConverter|None:
+        pixel_format = self.pixel_format
+        if not self.deferred_conversion or pixel_format == 'Mono8':
+            return None
+        # Software binning and decimation are done after conversion
+        return self._get_converter(pixel_format, self.camera.f.Width.value, self.camera.f.Height.value,
+                                   getattr(self, '_decimation', 1), getattr(self, '_binning', 1))
+
+
+    def _get_converter(
+            self,
+            pixel_format: str,
+            width: int,
+            height: int,
+            decimation: int = 1,
+            binning: int = 1
+        ) -> PixelFormatConverter:
+        converter = self._converter
+        if converter is None or (converter.pixel_format, converter.width, converter.height,
+                                 converter.decimation, converter.binning) != (pixel_format, width, height, decimation, binning):
+            converter = PixelFormatConverter(pixel_format, width, height, decimation=decimation, binning=binning)
+            self._converter = converter
+        return converter
+
+
+    @property
+    def pixel_format(self):
+        return self.camera.f.PixelFormat.GetString()
+
+    @pixel_format.setter
+    def pixel_format(self, x):
+        self.camera.f.PixelFormat.SetString(x)
+
+
+    @property
+    def roi(self) -> tuple[int, int, int, int]|None:
+        features = self.camera.f
+        step = self._software_step()
+        return (features.OffsetX.value // step, features.OffsetY.value // step,
+                features.Width.value // step, features.Height.value // step)
+
+    @roi.setter
+    def roi(self, x: tuple[int, int, int, int]|None):
+        features = self.camera.f
+        step = self._software_step()
+        if x is None:
+            x = (0, 0, features.WidthMax.value // step, features.HeightMax.value // step)
+        offset_x, offset_y, width, height = (value * step for value in x)
+
+        # Offsets are reset first, so new size fits the sensor
+        features.OffsetX.value = 0
+        features.OffsetY.value = 0
+        features.Width.value = width
+        features.Height.value = height
+        features.OffsetX.value = offset_x
+        features.OffsetY.value = offset_y
+
+
+    @property
+    def binning(self) -> int:
+        if self.camera.f.BinningHorizontal.IsAvailable():
+            return self.camera.f.BinningHorizontal.value
+        return getattr(self, '_binning', 1)
+
+    @binning.setter
+    def binning(self, x: int):
+        if self.camera.f.BinningHorizontal.IsAvailable():
+            self.camera.f.BinningHorizontal.value = x
+            self.camera.f.BinningVertical.value = x
+        else:
+            self._binning = x
+
+
+    @property
+    def decimation(self) -> int:
+        if self.camera.f.DecimationHorizontal.IsAvailable():
+            return self.camera.f.DecimationHorizontal.value
+        return getattr(self, '_decimation', 1)
+
+    @decimation.setter
+    def decimation(self, x: int):
+        if self.camera.f.DecimationHorizontal.IsAvailable():
+            self.camera.f.DecimationHorizontal.value = x
+            self.camera.f.DecimationVertical.value = x
+        else:
+            self._decimation = x
+
+
+    def _software_step(self) -> int:
+        return getattr(self, '_binning', 1) * getattr(self, '_decimation', 1)
+
+
     @property
     def exposure(self):
         return self.camera.f.ExposureTime.value
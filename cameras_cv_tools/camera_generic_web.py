@@ -1,54 +1,246 @@
 '''Module contains Camera class implementation for generic web camera using OpenCV.
 
+Frames are buffered by camera driver, so a frame read after a pause in reading can be several
+hundred milliseconds old. In latest frame mode the camera is read continuously in a background
+thread and get_image returns only the newest frame, older frames are skipped. Timestamps are
+taken right after grabbing of a frame, before its decoding.
+
+Any OpenCV VideoCapture source can be used as a camera: device index, video file, image sequence
+pattern (e.g. 'images/image_%05d.png') or stream URL. At the end of video file, image sequence
+or stream get_image raises EOFError, so FramesStream and capturing loops end normally.
+
 Todo:
     * Add setting for codec in VideoWriter_fourcc
 '''
+import sys
 import time
+from threading import Thread, Condition
 
 import cv2
 import numpy as np
 
 from .camera import Camera
+from .discovery import discover_devices, probe_devices
+
+
+BACKENDS = {
+    'any': cv2.CAP_ANY,
+    'dshow': cv2.CAP_DSHOW,
+    'msmf': cv2.CAP_MSMF,
+    'v4l2': cv2.CAP_V4L2,
+    'avfoundation': cv2.CAP_AVFOUNDATION,
+    'gstreamer': cv2.CAP_GSTREAMER,
+    'ffmpeg': cv2.CAP_FFMPEG,
+    'images': cv2.CAP_IMAGES,
+}
+
+
+def get_backend(backend: str|int = None) -> int:
+    '''
+    Get OpenCV capture backend constant.
+
+    Args:
+        backend (str|int, optional): name of capture backend from BACKENDS or OpenCV cv2.CAP_* constant.
+        Defaults to None ('dshow' on Windows, 'any' on other systems).
+
+    Returns:
+        backend (int): OpenCV cv2.CAP_* constant.
+    '''
+    if backend is None:
+        backend = 'dshow' if sys.platform == 'win32' else 'any'
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown capture backend {backend}')
+        backend = BACKENDS[backend]
+    return backend
 
 
 class CameraWeb(Camera):
     '''Camera class implementation for generic web camera using OpenCV.
+
+    Args:
+        width (int, optional): requested frame width. Defaults to 1920.
+        height (int, optional): requested frame height. Defaults to 1080.
+        id (int|str, optional): camera index or path to video file, image sequence or stream URL. Defaults to 0.
+        backend (str|int, optional): name of capture backend from BACKENDS or OpenCV cv2.CAP_* constant.
+        Defaults to None ('dshow' on Windows, 'any' on other systems).
+        latest_frame (bool, optional): read frames continuously in background thread and return
+        only the newest frame from get_image. Defaults to False.
     '''
-    def __init__(self, width:int=1920, height:int=1080, id:int=0):
-        self.camera = cv2.VideoCapture(id, cv2.CAP_DSHOW)
+    def __init__(
+            self,
+            width: int = 1920,
+            height: int = 1080,
+            id: int|str = 0,
+            backend: str|int = None,
+            latest_frame: bool = False
+        ):
+        self.camera = cv2.VideoCapture(id, get_backend(backend))
         if self.camera.isOpened():
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-            self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            if isinstance(id, int):
+                # Frame size and codec are set only for devices
+                self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
             self.type = 'web'
 
             # Sync system and camera time
             self.system_timestamp_shift = time.time_ns()
         else:
             raise ValueError('Camera cannot be oppened')
+
+        # Failed reading of not device source means end of stream
+        self.is_device = isinstance(id, int)
+        self.latest_frame = latest_frame
+        self.frames_grabbed = 0
+        self.frames_skipped = 0
+
+        if latest_frame:
+            self._frame = None
+            self._frame_number = 0
+            self._last_frame_number = 0
+            self._grabbing = True
+            self._read_failed = False
+            self._condition = Condition()
+            self._thread = Thread(target=self._grab_latest_frames, daemon=True)
+            self._thread.start()
     
 
     @staticmethod
-    def get_available_cameras(cameras_num_to_find:int=2) -> list[Camera]:
-        # Empty list to return founded cameras
-        cameras = []
-        
-        # Try to find defined number of cameras
-        for i in range(cameras_num_to_find):
-            try:
-                cameras.append(CameraWeb(id=i))
-            except ValueError:
-                # Skip camera with i id
-                pass
+    def get_available_cameras(
+            cameras_num_to_find: int = 2,
+            timeout: float = 5.0,
+            cache_file: str = None,
+            **kwargs
+        ) -> list[Camera]:
+        '''
+        Returns list of available cameras in system. Cameras ids are probed concurrently.
 
-        return cameras
+        Args:
+            cameras_num_to_find (int): The number of cameras ids to try. Defaults to 2.
+            timeout (float, optional): maximum time to wait for opening of cameras in seconds. Defaults to 5.0.
+            cache_file (str, optional): path to JSON file with ids of cameras found last time, if set only
+            cached ids are opened when all of them are available. Defaults to None.
+            **kwargs: parameters of CameraWeb constructor (backend, latest_frame and others).
+
+        Returns:
+            cameras (list[Camera]): List of available cameras in system.
+        '''
+        cameras = discover_devices(
+            lambda id: CameraWeb(id=id, **kwargs),
+            list(range(cameras_num_to_find)),
+            timeout,
+            CameraWeb.close,
+            cache_file,
+            'web',
+            cameras_num_to_find)
+
+        return list(cameras.values())
+
+
+    @staticmethod
+    def enumerate_cameras(ids_to_check: int = 2, timeout: float = 5.0, backend: str|int = None) -> list[int]:
+        '''
+        Returns ids of available cameras without configuring them. Cameras ids are probed concurrently.
+
+        Args:
+            ids_to_check (int): The number of cameras ids to try. Defaults to 2.
+            timeout (float, optional): maximum time to wait for opening of cameras in seconds. Defaults to 5.0.
+            backend (str|int, optional): capture backend (see CameraWeb). Defaults to None.
+
+        Returns:
+            ids (list[int]): ids of available cameras.
+        '''
+        def probe(id: int) -> int:
+            camera = cv2.VideoCapture(id, get_backend(backend))
+            is_opened = camera.isOpened()
+            camera.release()
+            if not is_opened:
+                raise ValueError('Camera cannot be oppened')
+            return id
+
+        return list(probe_devices(probe, list(range(ids_to_check)), timeout))
 
 
     def get_image(self) -> tuple[np.ndarray|int]:
-        if self.camera.isOpened:
-            _, image = self.camera.read()
+        if self.latest_frame:
+            with self._condition:
+                # Wait for frame newer than returned previously
+                self._condition.wait_for(lambda: self._frame_number > self._last_frame_number or not self._grabbing)
+                if self._frame_number == self._last_frame_number:
+                    if not self._read_failed:
+                        raise ValueError('Camera is closed')
+                    raise self._read_error()
+
+                self.frames_skipped += self._frame_number - self._last_frame_number - 1
+                self._last_frame_number = self._frame_number
+                image, timestamp = self._frame
+                return self.apply_roi(image), timestamp
+
+        if not self.camera.grab():
+            raise self._read_error()
+        timestamp = time.time_ns()
+        ret, image = self.camera.retrieve()
+        if not ret:
+            raise ValueError('Image cannot be read from camera')
+        self.frames_grabbed += 1
+        return self.apply_roi(image), timestamp
+
+
+    def get_image_into(self, out: np.ndarray) -> int:
+        if self.latest_frame or self.roi is not None or self.binning > 1 or self.decimation > 1:
+            return super().get_image_into(out)
+
+        if not self.camera.grab():
+            raise self._read_error()
+        timestamp = time.time_ns()
+        # OpenCV decodes frame directly to the array if its shape and type match the frame
+        ret, image = self.camera.retrieve(out)
+        if not ret or image is None:
+            raise ValueError('Image cannot be read from camera')
+        if image.ctypes.data != out.ctypes.data:
+            out[...] = image
+        self.frames_grabbed += 1
+        return timestamp
+
+
+    def close(self) -> None:
+        '''
+        Stop background reading of frames and release the camera.
+        '''
+        if self.latest_frame:
+            with self._condition:
+                self._grabbing = False
+            self._thread.join()
+        self.camera.release()
+
+
+    def _read_error(self) -> Exception:
+        if self.is_device:
+            return ValueError('Image cannot be read from camera')
+        return EOFError('End of video stream is reached')
+
+
+    def _grab_latest_frames(self) -> None:
+        while self._grabbing:
+            if not self.camera.grab():
+                self._read_failed = True
+                break
             timestamp = time.time_ns()
-            return image, timestamp
+            ret, image = self.camera.retrieve()
+            if not ret:
+                self._read_failed = True
+                break
+
+            with self._condition:
+                self.frames_grabbed += 1
+                self._frame = (image, timestamp)
+                self._frame_number += 1
+                self._condition.notify_all()
+
+        with self._condition:
+            self._grabbing = False
+            self._condition.notify_all()
 
 
     @property 
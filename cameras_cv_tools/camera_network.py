@@ -0,0 +1,373 @@
+'''Module with streaming of frames from cameras of remote capture nodes over TCP.
+
+FrameServer exposes cameras attached to the capture node, CameraNetwork is Camera class
+implementation getting frames from the server, so cameras of several nodes can be captured
+by capture_images on the central host:
+
+    # Capture node
+    with FrameServer(CameraBaumer.get_available_cameras(2), port=5100):
+        ...
+
+    # Central host
+    cameras = CameraNetwork.get_available_cameras(2, host='capture-node', compression='zlib')
+    capture_images(cameras, path_to_store_images)
+
+Every CameraNetwork keeps one persistent connection to the server and reconnects if it is broken.
+The protocol uses compact binary messages:
+
+    handshake - client sends magic, protocol version, camera index, compression and its level,
+    server replies with magic, status and number of cameras;
+    b'T' - clock probe, server replies with its system time;
+    b'G' - frame request, server replies with frame header (status, timestamp, payload size, dtype,
+    shape) and frame data compressed by compression of the connection.
+
+Frames without compression are sent from image memory and received directly to image array.
+Frames of cameras with frame_converter are converted on the server. Timestamps of frames are
+converted to the client system time by clock offset estimated on connection by the clock probe
+with the minimum round trip time.
+'''
+import socket
+import socketserver
+import struct
+import time
+import zlib
+from threading import Lock, Thread
+
+import cv2
+import numpy as np
+
+from .camera import Camera
+from .encoders import JPEGEncoder, PNGEncoder
+
+
+PROTOCOL_MAGIC = b'CCVT'
+PROTOCOL_VERSION = 1
+
+COMPRESSIONS = ('none', 'zlib', 'png', 'jpeg')
+
+HANDSHAKE_REQUEST = struct.Struct('<4sBHBB')
+HANDSHAKE_REPLY = struct.Struct('<4sBH')
+CLOCK_REPLY = struct.Struct('<q')
+FRAME_HEADER = struct.Struct('<BqQ4sB3I')
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+CLOCK_PROBES = 8
+
+
+def _recv_into(sock: socket.socket, buffer: memoryview) -> None:
+    received = 0
+    while received < len(buffer):
+        size = sock.recv_into(buffer[received:])
+        if size == 0:
+            raise ConnectionError('Connection is closed')
+        received = received + size
+
+
+def _recv(sock: socket.socket, size: int) -> bytearray:
+    data = bytearray(size)
+    _recv_into(sock, memoryview(data))
+    return data
+
+
+class _FrameRequestHandler(socketserver.BaseRequestHandler):
+    '''Handler of one client connection of FrameServer.
+    '''
+    def handle(self) -> None:
+        try:
+            self._serve()
+        except OSError:
+            # Connection is broken by client
+            return
+
+
+    def _serve(self) -> None:
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        magic, version, camera_index, compression, level = HANDSHAKE_REQUEST.unpack(_recv(sock, HANDSHAKE_REQUEST.size))
+        cameras = self.server.cameras
+        if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION or camera_index >= len(cameras) or \
+                compression >= len(COMPRESSIONS):
+            sock.sendall(HANDSHAKE_REPLY.pack(PROTOCOL_MAGIC, STATUS_ERROR, len(cameras)))
+            return
+        sock.sendall(HANDSHAKE_REPLY.pack(PROTOCOL_MAGIC, STATUS_OK, len(cameras)))
+
+        camera = cameras[camera_index]
+        camera_lock = self.server.cameras_locks[camera_index]
+        encode = self._get_encoder(COMPRESSIONS[compression], level)
+
+        while True:
+            command = sock.recv(1)
+            if command == b'':
+                # Client closed connection
+                return
+
+            if command == b'T':
+                sock.sendall(CLOCK_REPLY.pack(time.time_ns()))
+                continue
+
+            try:
+                # Several clients can get frames from one camera
+                with camera_lock:
+                    img, timestamp = camera.get_image()
+                frame_converter = camera.frame_converter
+                if frame_converter is not None:
+                    img = frame_converter(img)
+                img = np.ascontiguousarray(img)
+                data = encode(img)
+            except Exception:
+                sock.sendall(FRAME_HEADER.pack(STATUS_ERROR, 0, 0, b'', 0, 0, 0, 0))
+                continue
+
+            shape = img.shape + (0,) * (3 - img.ndim)
+            sock.sendall(FRAME_HEADER.pack(
+                STATUS_OK, timestamp, memoryview(data).nbytes, img.dtype.str.encode(), img.ndim, *shape))
+            sock.sendall(data)
+
+
+    @staticmethod
+    def _get_encoder(compression: str, level: int):
+        if compression == 'zlib':
+            return lambda img: zlib.compress(memoryview(img).cast('B'), level)
+        if compression == 'png':
+            return PNGEncoder(level).encode
+        if compression == 'jpeg':
+            return JPEGEncoder(level).encode
+        # Image is sent from its memory without copying
+        return lambda img: memoryview(img).cast('B')
+
+
+class FrameServer(socketserver.ThreadingTCPServer):
+    '''Server exposing local cameras over TCP to CameraNetwork clients.
+    Every client connection is served in its own thread.
+
+    Args:
+        cameras (Camera|list[Camera]): camera or list of cameras to expose.
+        host (str, optional): address to listen. Defaults to '0.0.0.0'.
+        port (int, optional): TCP port, if 0 free port is selected. Defaults to 5100.
+    '''
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, cameras: Camera|list[Camera], host: str = '0.0.0.0', port: int = 5100):
+        # If one camera passed, then create list for unification
+        if isinstance(cameras, Camera):
+            cameras = [cameras]
+
+        self.cameras = cameras
+        self.cameras_locks = [Lock() for _ in cameras]
+        self._thread = None
+        super().__init__((host, port), _FrameRequestHandler)
+
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+
+    def start(self) -> None:
+        '''
+        Start serving clients in background thread.
+        '''
+        self._thread = Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        '''
+        Stop serving clients and close listening socket.
+        '''
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+
+    def __enter__(self) -> 'FrameServer':
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+class CameraNetwork(Camera):
+    '''Camera class implementation getting frames from FrameServer of remote capture node.
+
+    Args:
+        host (str): address of the server.
+        port (int, optional): TCP port of the server. Defaults to 5100.
+        camera_index (int, optional): index of the camera on the server. Defaults to 0.
+        compression (str, optional): compression of frames on the connection: 'none', 'zlib' (lossless),
+        'png' (lossless) or 'jpeg' (lossy, 8 bit images only). Defaults to 'none'.
+        compression_level (int, optional): zlib or PNG compression level, JPEG quality. Defaults to None
+        (1 for zlib and PNG, 95 for JPEG).
+        prefetch (bool, optional): request the next frame before returning the current one, so the server
+        gets and sends it while the client processes the current frame. Defaults to True.
+        timeout (float, optional): timeout of connection and receiving of frames in seconds. Defaults to 5.0.
+        reconnect_attempts (int, optional): number of attempts to reconnect if connection is broken. Defaults to 3.
+    '''
+    def __init__(
+            self,
+            host: str,
+            port: int = 5100,
+            camera_index: int = 0,
+            compression: str = 'none',
+            compression_level: int = None,
+            prefetch: bool = True,
+            timeout: float = 5.0,
+            reconnect_attempts: int = 3
+        ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'Unknown compression {compression}')
+        if compression_level is None:
+            compression_level = 95 if compression == 'jpeg' else 1
+
+        self.type = 'network'
+        self.host = host
+        self.port = port
+        self.camera_index = camera_index
+        self.compression = compression
+        self.compression_level = compression_level
+        self.prefetch = prefetch
+        self.timeout = timeout
+        self.reconnect_attempts = reconnect_attempts
+
+        self.socket = None
+        self.cameras_num = 0
+        self.clock_offset = 0
+        self.round_trip = 0
+        self.reconnects = 0
+        self._requested = False
+
+        self.connect()
+
+
+    @staticmethod
+    def get_available_cameras(
+        cameras_num_to_find: int = 1,
+        host: str = 'localhost',
+        port: int = 5100,
+        **kwargs
+        ) -> list[Camera]:
+        '''
+        Returns list of cameras of the server.
+
+        Args:
+            cameras_num_to_find (int): The number of cameras to connect. Defaults to 1.
+            host (str, optional): address of the server. Defaults to 'localhost'.
+            port (int, optional): TCP port of the server. Defaults to 5100.
+            **kwargs: other parameters of CameraNetwork constructor.
+
+        Returns:
+            cameras (list[Camera]): List of connected cameras.
+        '''
+        cameras = [CameraNetwork(host, port, 0, **kwargs)]
+        for camera_index in range(1, min(cameras_num_to_find, cameras[0].cameras_num)):
+            cameras.append(CameraNetwork(host, port, camera_index, **kwargs))
+        return cameras
+
+
+    def connect(self) -> None:
+        '''
+        Connect to the server and estimate clock offset of the server.
+        '''
+        self.close()
+
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(HANDSHAKE_REQUEST.pack(
+                PROTOCOL_MAGIC, PROTOCOL_VERSION, self.camera_index,
+                COMPRESSIONS.index(self.compression), self.compression_level))
+            magic, status, self.cameras_num = HANDSHAKE_REPLY.unpack(_recv(sock, HANDSHAKE_REPLY.size))
+            if magic != PROTOCOL_MAGIC or status != STATUS_OK:
+                raise ValueError(f'Camera {self.camera_index} is not available on {self.host}:{self.port}')
+        except BaseException:
+            sock.close()
+            raise
+
+        self.socket = sock
+        self.sync_clock()
+
+
+    def sync_clock(self) -> None:
+        '''
+        Estimate offset of the server clock from the client clock. Offset is estimated by the clock
+        probe with the minimum round trip time, assuming equal delays in both directions.
+        '''
+        if self._requested:
+            # Receive prefetched frame before clock probes
+            self._receive_frame()
+
+        probes = []
+        for _ in range(CLOCK_PROBES):
+            send_time = time.time_ns()
+            self.socket.sendall(b'T')
+            server_time, = CLOCK_REPLY.unpack(_recv(self.socket, CLOCK_REPLY.size))
+            receive_time = time.time_ns()
+            probes.append((receive_time - send_time, server_time - (send_time + receive_time) // 2))
+
+        self.round_trip, self.clock_offset = min(probes)
+
+
+    def get_image(self) -> tuple[np.ndarray|int]:
+        for attempt in range(self.reconnect_attempts + 1):
+            try:
+                if self.socket is None:
+                    self.connect()
+                    self.reconnects = self.reconnects + 1
+
+                if not self._requested:
+                    self.socket.sendall(b'G')
+                img, timestamp = self._receive_frame()
+
+                if self.prefetch:
+                    self.socket.sendall(b'G')
+                    self._requested = True
+
+                # Timestamp of the server clock is converted to the client clock
+                return img, timestamp - self.clock_offset
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt < self.reconnect_attempts:
+                    time.sleep(min(0.1 * 2 ** attempt, 2.0))
+
+        raise ValueError(f'Image cannot be read from {self.host}:{self.port}')
+
+
+    def close(self) -> None:
+        '''
+        Close connection to the server.
+        '''
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+        self._requested = False
+
+
+    def _receive_frame(self) -> tuple[np.ndarray|int]:
+        self._requested = False
+
+        status, timestamp, nbytes, dtype, ndim, *shape = FRAME_HEADER.unpack(_recv(self.socket, FRAME_HEADER.size))
+        if status != STATUS_OK:
+            raise ValueError('Image cannot be read from remote camera')
+        shape = tuple(shape[:ndim])
+        dtype = np.dtype(dtype.rstrip(b'\0').decode())
+
+        if self.compression == 'none':
+            # Frame is received directly to the image array
+            img = np.empty(shape, dtype)
+            _recv_into(self.socket, memoryview(img).cast('B'))
+            return img, timestamp
+
+        data = _recv(self.socket, nbytes)
+        if self.compression == 'zlib':
+            img = np.frombuffer(bytearray(zlib.decompress(data)), dtype).reshape(shape)
+        else:
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+        return img, timestamp
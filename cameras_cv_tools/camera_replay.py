@@ -0,0 +1,191 @@
+'''Module contains Camera class implementation replaying recorded capturing session.
+
+The camera returns images of one camera from recorded_info returned by capture_images
+(or loaded from JSON file) with their recorded timestamps. Images are replayed with
+original timing, accelerated or as fast as possible. Images files are read and decoded
+ahead in a thread pool, so replay speed is not limited by decoding of one image at a time.
+Images stored in raw recording format (file names like 'camera_0[15]') are read with
+RawRecordingReader.
+'''
+import os
+import re
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .camera import Camera
+from .raw_recording import RawRecordingReader
+
+
+# File name of frame in raw recording, e.g. 'camera_0[15]'
+RAW_FRAME_NAME = re.compile(r'^(?P<recording_name>.+)\[(?P<index>\d+)\]$')
+
+
+def load_recorded_info(file_path: str) -> list[list]:
+    '''
+    Load recorded_info from JSON file saved by examples.
+
+    Args:
+        file_path (str): path to JSON file with recorded_info list or with dictionary containing
+        recorded_info in 'StoredImages' field.
+
+    Returns:
+        recorded_info (list[list]): list of sets with timestamps and file names of every camera.
+    '''
+    with open(file_path, encoding='utf8') as file:
+        recorded_info = json.load(file)
+
+    if isinstance(recorded_info, dict):
+        recorded_info = recorded_info['StoredImages']
+
+    return recorded_info
+
+
+class CameraReplay(Camera):
+    '''Camera class implementation replaying images of one camera from recorded session.
+
+    Args:
+        path (str): path to directory with recorded images.
+        recorded_info (list[list]|str): recorded_info returned by capture_images or path to JSON file with it.
+        cam_num (int, optional): number of camera in recorded_info to replay. Defaults to 0.
+        speed (float, optional): replay speed relative to the original timing, if 0 images are
+        replayed as fast as possible. Defaults to 1.0.
+        read_ahead (int, optional): number of images read ahead. Defaults to 8.
+        workers (int, optional): number of threads reading images. Defaults to 4.
+        loop (bool, optional): replay the session in a loop, otherwise EOFError is raised after the last image.
+        Defaults to False.
+    '''
+    def __init__(
+            self,
+            path: str,
+            recorded_info: list[list]|str,
+            cam_num: int = 0,
+            speed: float = 1.0,
+            read_ahead: int = 8,
+            workers: int = 4,
+            loop: bool = False
+        ):
+        if isinstance(recorded_info, str):
+            recorded_info = load_recorded_info(recorded_info)
+
+        self.type = 'replay'
+        self.path = path
+        self.cam_num = cam_num
+        self.speed = speed
+        self.read_ahead = max(read_ahead, 1)
+        self.loop = loop
+        self.exposure = 0
+        self.gain = 0
+
+        # Frames of the camera, missing frames are skipped
+        self.frames = [
+            (sync_recorded_info[2 * cam_num], sync_recorded_info[2 * cam_num + 1])
+            for sync_recorded_info in recorded_info
+            if sync_recorded_info[2 * cam_num] is not None and sync_recorded_info[2 * cam_num + 1] is not None]
+
+        if len(self.frames) == 0:
+            raise ValueError(f'No recorded images of camera {cam_num}')
+
+        self.raw_readers = {}
+        self.executor = ThreadPoolExecutor(workers)
+        self.pending = deque()
+
+        self.frames_replayed = 0
+        self.next_frame = 0
+        self.start_time = None
+
+
+    @staticmethod
+    def get_available_cameras(
+            cameras_num_to_find: int = 1,
+            path: str = None,
+            recorded_info: list[list]|str = None,
+            **kwargs
+        ) -> list[Camera]:
+        '''
+        Returns list of cameras replaying recorded session.
+
+        Args:
+            cameras_num_to_find (int): The number of cameras to replay. Defaults to 1.
+            path (str): path to directory with recorded images.
+            recorded_info (list[list]|str): recorded_info returned by capture_images or path to JSON file with it.
+            **kwargs: other parameters of CameraReplay constructor.
+
+        Returns:
+            cameras (list[Camera]): List of replay cameras.
+        '''
+        if isinstance(recorded_info, str):
+            recorded_info = load_recorded_info(recorded_info)
+
+        cameras_num = min(cameras_num_to_find, len(recorded_info[0]) // 2)
+        return [CameraReplay(path, recorded_info, cam_num, **kwargs) for cam_num in range(cameras_num)]
+
+
+    def get_image(self) -> tuple[np.ndarray|int]:
+        # Fill read ahead queue
+        while len(self.pending) < self.read_ahead and (self.loop or self.next_frame < len(self.frames)):
+            timestamp, file_name = self.frames[self.next_frame % len(self.frames)]
+            self.pending.append((timestamp, self.executor.submit(self._read_image, file_name)))
+            self.next_frame = self.next_frame + 1
+
+        if not self.pending:
+            raise EOFError('All recorded images are replayed')
+
+        timestamp, image = self.pending.popleft()
+
+        if self.speed > 0:
+            if self.start_time is None or self.frames_replayed % len(self.frames) == 0:
+                # Timing of the session is started from the first image of every loop
+                self.start_time = time.perf_counter()
+                self.start_timestamp = timestamp
+
+            # Wait for the moment of the image in the recorded session
+            delay = self.start_time + (timestamp - self.start_timestamp) / 1e9 / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frames_replayed = self.frames_replayed + 1
+
+        return self.apply_roi(image.result()), timestamp
+
+
+    def close(self) -> None:
+        '''
+        Stop reading threads.
+        '''
+        self.executor.shutdown(cancel_futures=True)
+        self.pending.clear()
+
+
+    def _read_image(self, file_name: str) -> np.ndarray:
+        return read_recorded_image(self.path, file_name, self.raw_readers)
+
+
+def read_recorded_image(path: str, file_name: str, raw_readers: dict[str, RawRecordingReader]) -> np.ndarray:
+    '''
+    Read recorded image by its file name in recorded_info.
+
+    Args:
+        path (str): path to directory with recorded images.
+        file_name (str): file name of the image or name of raw recording frame like 'camera_0[15]'.
+        raw_readers (dict[str, RawRecordingReader]): readers of raw recordings by names, opened readers are added to it.
+
+    Returns:
+        image (np.ndarray): image.
+    '''
+    raw_frame = RAW_FRAME_NAME.match(file_name)
+    if raw_frame is not None:
+        recording_name = raw_frame['recording_name']
+        if recording_name not in raw_readers:
+            raw_readers[recording_name] = RawRecordingReader(path, recording_name)
+        # Copy frame from memory mapped file to read it in the reading thread
+        return np.array(raw_readers[recording_name][int(raw_frame['index'])])
+
+    image = cv2.imread(os.path.join(path, file_name), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f'Image {file_name} cannot be read')
+    return image
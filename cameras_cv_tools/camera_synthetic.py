@@ -0,0 +1,128 @@
+'''Module contains Camera class implementation generating synthetic images.
+
+The camera does not require any hardware and is used to test and benchmark capturing
+tools. Images are cut from precomputed random texture with shift changing every frame,
+so getting image costs only copying of image data. Frames are produced with defined
+frame rate and jitter, timestamps correspond to the moments of frames exposure.
+'''
+import time
+
+import numpy as np
+
+from .camera import Camera
+
+
+class CameraSynthetic(Camera):
+    '''Camera class implementation generating synthetic images.
+
+    Args:
+        width (int, optional): width of images. Defaults to 1920.
+        height (int, optional): height of images. Defaults to 1080.
+        channels (int, optional): number of channels, 1 for mono images. Defaults to 1.
+        dtype (np.dtype, optional): images data type. Defaults to np.uint8.
+        frame_rate (float, optional): frame rate in Hz, if 0 or frame_rate_enable is False images are produced
+        without delay. Defaults to 30.0.
+        jitter (float, optional): standard deviation of frames timing in seconds. Defaults to 0.0.
+        seed (int, optional): seed of random generator. Defaults to None.
+    '''
+    def __init__(
+            self,
+            width: int = 1920,
+            height: int = 1080,
+            channels: int = 1,
+            dtype: np.dtype = np.uint8,
+            frame_rate: float = 30.0,
+            jitter: float = 0.0,
+            seed: int = None
+        ):
+        self.type = 'synthetic'
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.frame_rate = frame_rate
+        self.jitter = jitter
+        self.exposure = 0
+        self.gain = 0
+
+        self.random = np.random.default_rng(seed)
+
+        # Texture is bigger than image to cut images with different shifts
+        max_value = np.iinfo(self.dtype).max if self.dtype.kind in 'ui' else 1.0
+        texture_shape = (height + 64, width + 64) if channels == 1 else (height + 64, width + 64, channels)
+        self.texture = (self.random.random(texture_shape) * max_value).astype(self.dtype)
+
+        self.frames_produced = 0
+        self.start_time = None
+        # Frame rate is kept when it is disabled, frames timing starts again when it is enabled
+        self._frame_rate_enable = True
+        self._start_frame = 0
+
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1, **kwargs) -> list[Camera]:
+        '''
+        Returns list of synthetic cameras.
+
+        Args:
+            cameras_num_to_find (int): The number of cameras to create. Defaults to 1.
+            **kwargs: parameters of CameraSynthetic constructor.
+
+        Returns:
+            cameras (list[Camera]): List of synthetic cameras.
+        '''
+        return [CameraSynthetic(**kwargs) for _ in range(cameras_num_to_find)]
+
+
+    def get_image(self) -> tuple[np.ndarray|int]:
+        timestamp = self._wait_frame()
+
+        # Only region of interest is copied like by sensor with hardware ROI
+        img = self._frame_view()
+        if img.base is not None:
+            img = img.copy()
+
+        self.frames_produced = self.frames_produced + 1
+        return img, timestamp
+
+
+    def get_image_into(self, out: np.ndarray) -> int:
+        timestamp = self._wait_frame()
+        out[...] = self._frame_view()
+        self.frames_produced = self.frames_produced + 1
+        return timestamp
+
+
+    def _wait_frame(self) -> int:
+        if self.start_time is None:
+            self.start_time = time.time()
+
+        if self.frame_rate_enable:
+            # Wait for the moment of the next frame
+            frame_time = self.start_time + (self.frames_produced - self._start_frame) / self.frame_rate
+            if self.jitter > 0:
+                frame_time = frame_time + self.random.normal(0, self.jitter)
+            delay = frame_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            frame_time = time.time()
+
+        return int(frame_time * 1e9)
+
+
+    def _frame_view(self) -> np.ndarray:
+        shift_y, shift_x = divmod(self.frames_produced, 64)
+        return self.apply_roi(self.texture[shift_y % 64:shift_y % 64 + self.height, shift_x:shift_x + self.width])
+
+
+    @property
+    def frame_rate_enable(self):
+        return self._frame_rate_enable and self.frame_rate > 0
+
+    @frame_rate_enable.setter
+    def frame_rate_enable(self, x):
+        if bool(x) != self._frame_rate_enable:
+            self.start_time = None
+            self._start_frame = self.frames_produced
+        self._frame_rate_enable = bool(x)
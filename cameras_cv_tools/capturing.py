@@ -2,61 +2,168 @@
 Module allows to realize synchronous capturing of images from several cameras at a higher speed 
 than when using direct image saving.
 
+Progress of capturing and storing is reported by telemetry_callback and logged to the module
+logger at INFO level, configure logging (e.g. logging.basicConfig(level=logging.INFO)) to see it
+in console.
+
 An example of how to use the module can be found in synchronized_baumer_camera_capture.py.
 '''
 import os
 import time
+import logging
 from collections.abc import Callable
+from threading import Event
 
-from queue import Empty
 import multiprocessing as mp
-from multiprocessing import Queue, Manager
-from multiprocessing.managers import ValueProxy
+from multiprocessing import Queue
+from multiprocessing.sharedctypes import Synchronized
 
-import cv2
+import numpy as np
 
 from .camera import Camera
+from .change_gate import ChangeGate
+from .encoders import ImageEncoder, OpenCVEncoder
+from .grabbing import CameraGrabber
+from .preview import Preview
+from .raw_recording import RawChunksWriter, RawFrameLocation, RawRecordingWriter
+from .recording_index import RecordingIndexWriter
+from .shared_frames import SharedFrame, SharedFramesRing
+from .storing_queue import StoringItem, StripedStoringQueue
+from .synchronization import FramesSynchronizer
+from .telemetry import CaptureTelemetry, StoringTelemetry
+
+
+logger = logging.getLogger(__name__)
 
 
 def store_images_process(
         queue: Queue, 
-        files_stored: ValueProxy[int]
+        telemetry: StoringTelemetry,
+        worker_num: int = 0,
+        shared_frames: SharedFramesRing = None,
+        image_encoder: ImageEncoder = None,
+        queued_bytes: Synchronized = None,
+        frame_converters: list[Callable[[np.ndarray], np.ndarray]|None] = None
     ) -> None:
-    '''The function performs storing images from the queue to files.
-    Used for multiprocessing storing images from capture_images function.
+    '''The function performs storing images from the queue to files until None is got from the queue.
+    Used for multiprocessing storing images from capture_images function and CaptureSession.
 
     Args:
-        queue (Queue): queue of images and file names to store them
-        files_stored (ValueProxy[int]): count of images stored by the function
+        queue (Queue): queue of StoringItem with images and file names to store them, file name can be
+        RawFrameLocation to write image to raw recording chunk
+        telemetry (StoringTelemetry): shared telemetry to count stored images and stages durations
+        worker_num (int, optional): number of the storing process in telemetry. Defaults to 0.
+        shared_frames (SharedFramesRing, optional): ring of shared memory slots used to pass images
+        as SharedFrame descriptors. Defaults to None.
+        image_encoder (ImageEncoder, optional): encoder used to store images, if None images are encoded
+        by OpenCV in format defined by file extension. Defaults to None.
+        queued_bytes (Synchronized, optional): size of queued images in bytes decreased after image
+        is stored. Defaults to None.
+        frame_converters (list[Callable[[np.ndarray], np.ndarray]|None], optional): functions converting raw frames
+        of cameras to images before encoding (see Camera.frame_converter), raw recording frames are stored
+        without conversion. Defaults to None.
     '''    
+    # OpenCV encoders for files extensions used without image_encoder
+    extension_encoders = {}
+    # Chunk files of raw recordings are kept open by the process
+    raw_chunks = RawChunksWriter()
 
     while True:
-        try:
-            file_name, img = queue.get(timeout=2)
-        except Empty:
-            # Queue closed
+        item = queue.get()
+        if item is None:
+            # Storing is stopped
             break
+
+        file_name, img, _, cam_num = item
         
-        cv2.imwrite(file_name, img)
-        
-        files_stored.value = files_stored.value + 1
+        frame = None
+        if isinstance(img, SharedFrame):
+            # Store image directly from shared memory
+            frame = img
+            img = shared_frames.get(frame)
+
+        # Queued size is counted by the raw frame, converted image can be bigger
+        nbytes = img.nbytes
+
+        start = time.perf_counter_ns()
+
+        if isinstance(file_name, RawFrameLocation):
+            # Raw recording frames are written without encoding
+            data = img
+        else:
+            if frame_converters is not None and frame_converters[cam_num] is not None:
+                # Frame conversion is a part of encoding
+                img = frame_converters[cam_num](img)
+
+            encoder = image_encoder
+            if encoder is None:
+                extension = os.path.splitext(file_name)[1]
+                encoder = extension_encoders.setdefault(extension, OpenCVEncoder(extension))
+            data = encoder.encode(img)
+            telemetry.add_duration(worker_num, 'encode', time.perf_counter_ns() - start)
+
+        encoded = time.perf_counter_ns()
+
+        if isinstance(file_name, RawFrameLocation):
+            raw_chunks.write(file_name, data)
+        else:
+            with open(file_name, 'wb') as file:
+                file.write(data)
+
+        telemetry.add_duration(worker_num, 'write', time.perf_counter_ns() - encoded)
+        telemetry.add_stored(worker_num, memoryview(data).nbytes)
+
+        if queued_bytes is not None:
+            with queued_bytes.get_lock():
+                queued_bytes.value = queued_bytes.value - nbytes
+
+        if frame is not None:
+            # Return slot to the ring
+            del img, data
+            shared_frames.release(frame)
+
+    raw_chunks.close()
+
+    if shared_frames is not None:
+        shared_frames.close()
 
 
 def capture_images(
         cameras: Camera|list[Camera],
-        path_to_store_images: str,
+        path_to_store_images: str|list[str],
         images_to_capture: int = 0,
         start_image_number: int = 0,
         images_file_names_mask: Callable[[int, int], str] = lambda cam_num, image_num: f'camera_{cam_num}_{image_num}.png',
         imshow_windows_mask: Callable[[int], str] = lambda cam_num: f'camera_{cam_num}',
-        processes_to_run: int = 4
+        processes_to_run: int = 4,
+        shared_memory_slots: int = 0,
+        parallel_grabbing: bool = False,
+        recording_format: str = 'images',
+        image_encoder: ImageEncoder = None,
+        queue_memory_limit: int = 0,
+        queue_overflow_policy: str = 'block',
+        spill_file_path: str = None,
+        preview: bool = True,
+        preview_rate: float = 10.0,
+        preview_max_size: int = 1000,
+        stop_event: Event = None,
+        telemetry: CaptureTelemetry = None,
+        telemetry_callback: Callable[[dict], None] = None,
+        sync_tolerance: int = 0,
+        recording_index: bool = False,
+        keep_recorded_info: bool = True,
+        striping_policy: str = 'round_robin',
+        change_gate: ChangeGate = None
     ) -> list[list[tuple[int, str]]]:
     '''The function simultaneous captures images from the passed camera list and saving them to files.
     To speed up the saving process multiprocessing is used. 
 
     Args:
         cameras (Camera | list[Camera]): camera or list of cameras from which capturing performed.
-        path_to_store_images (str): path to sotre captured images.
+        path_to_store_images (str|list[str]): path to sotre captured images. If list of paths is passed, images are
+        striped across them (see StripedStoringQueue in storing_queue.py), every path has its own storing processes
+        and queue. Recording index, raw recordings and spill file are stored in the first path, file names of images
+        in other paths are relative to the first path.
         images_to_capture (int, optional): number of images to capture, if set to 0 infinity number of images is captured.
         Defaults to 0.
         start_image_number (int, optional): start image number used in file mask to generate storing file name.
@@ -69,79 +176,628 @@ def capture_images(
         named windows defined outside function. Defaults to lambda cam_num: f'camera_{cam_num}'.
         processes_to_run (int, optional): number of multiprocessing process to use in storing images to files.
         Defaults to 4.
+        shared_memory_slots (int, optional): number of shared memory slots used to pass images to storing processes
+        without pickling. Slots size is defined by the biggest image of the first captured set, if set to 0 images
+        are passed through the queue. Defaults to 0.
+        parallel_grabbing (bool, optional): if True, images from each camera are got in separate thread and
+        sets of images are assembled from threads queues, so cameras are not waiting for each other. Defaults to False.
+        recording_format (str, optional): format to store images: 'images' - every image is stored to its own file
+        named by images_file_names_mask, 'raw' - images are stored without encoding to raw recording chunk files
+        for each camera (see raw_recording.py), file names in recorded_info are replaced by frame names in format
+        camera_{cam_num}[frame_index]. Defaults to 'images'.
+        image_encoder (ImageEncoder, optional): encoder with parameters used to store images in 'images' recording
+        format (see encoders.py). File names extension generated by images_file_names_mask should correspond to encoder
+        extension. If None images are encoded by OpenCV in format defined by file extension. Defaults to None.
+        queue_memory_limit (int, optional): maximum size in bytes of images waiting for storing, if 0 size is unlimited.
+        Defaults to 0.
+        queue_overflow_policy (str, optional): policy applied when queue_memory_limit is exceeded: 'block' - wait for
+        storing processes, 'drop_newest' - skip storing of new image, 'drop_oldest' - remove the oldest images from
+        the queue, 'spill' - write images without encoding to spill file and store them later (see storing_queue.py).
+        Defaults to 'block'.
+        spill_file_path (str, optional): path to scratch file for 'spill' policy, should be located on fast drive.
+        Defaults to None (file spilled_images.tmp in every path of path_to_store_images).
+        preview (bool, optional): display capturing images in OpenCV windows, if False capturing runs without GUI
+        and can be stopped only by images_to_capture or stop_event. Defaults to True.
+        preview_rate (float, optional): maximum rate of preview windows updating in Hz, if 0 every captured image
+        is displayed. Escape key is checked with the same rate. Defaults to 10.0.
+        preview_max_size (int, optional): maximum size of displayed image side, images are decimated to fit it.
+        Defaults to 1000.
+        stop_event (Event, optional): event to stop capturing from other thread or process. Defaults to None.
+        telemetry (CaptureTelemetry, optional): telemetry object collecting stages durations, cameras frames intervals,
+        dropped frames, queue depth and storing processes throughput. Can be used to get statistics after capturing or
+        to export them to CSV/JSON (see telemetry.py). Defaults to None (internal telemetry object is used).
+        telemetry_callback (Callable[[dict], None], optional): function called once per second with statistics from
+        CaptureTelemetry.get_stats. Defaults to None.
+        sync_tolerance (int, optional): maximum difference in nanoseconds of timestamps of images in one set. If set,
+        sets are assembled by images timestamps instead of images order (see synchronization.py): camera missing in
+        the set has None timestamp and file name in recorded_info, duplicated frames are discarded, missing frames,
+        duplicates and skew between cameras are reported in telemetry. Must be less than half of the frame period.
+        Defaults to 0 (sets are assembled by images order).
+        recording_index (bool, optional): write timestamps and file names of captured images to recording index
+        files recorded_info.index and recorded_info.names in path_to_store_images during capturing, the index is
+        flushed to disk once per second and can be loaded by load_recording_index (see recording_index.py).
+        Defaults to False.
+        keep_recorded_info (bool, optional): collect recorded_info in memory to return it, can be disabled
+        with recording_index for infinite capturing. Defaults to True.
+        striping_policy (str, optional): policy to distribute images across several paths: 'round_robin' or
+        'bandwidth' - to path with the minimum estimated time to write its queued images. Defaults to 'round_robin'.
+        change_gate (ChangeGate, optional): gate storing only images changed from the last stored image of the camera
+        or captured after keep alive interval (see change_gate.py). Images not stored by the gate have the file name
+        of the last stored image of the camera in recorded_info and are counted as skipped in telemetry.
+        Defaults to None (all images are stored).
 
     Returns:
         recorded_info (list[list[tuple[int, str]]]): list of list of simultaneous captured images for defined cameras with
-        images timestamps and file names.
+        images timestamps and file names. File name is None if image was dropped by queue overflow policy.
+        Empty if keep_recorded_info is False.
     '''    
 
-    # If one camera passed, then create list for unification
-    if isinstance(cameras, Camera):
-        cameras = [cameras]
-    
-    images_captured = 0
-    
-    files_to_store_queue = Queue()
+    with CaptureSession(
+            cameras,
+            path_to_store_images,
+            images_file_names_mask=images_file_names_mask,
+            imshow_windows_mask=imshow_windows_mask,
+            processes_to_run=processes_to_run,
+            shared_memory_slots=shared_memory_slots,
+            parallel_grabbing=parallel_grabbing,
+            recording_format=recording_format,
+            image_encoder=image_encoder,
+            queue_memory_limit=queue_memory_limit,
+            queue_overflow_policy=queue_overflow_policy,
+            spill_file_path=spill_file_path,
+            preview=preview,
+            preview_rate=preview_rate,
+            preview_max_size=preview_max_size,
+            telemetry=telemetry,
+            telemetry_callback=telemetry_callback,
+            sync_tolerance=sync_tolerance,
+            recording_index=recording_index,
+            keep_recorded_info=keep_recorded_info,
+            striping_policy=striping_policy,
+            change_gate=change_gate) as session:
+        return session.capture_series(images_to_capture, start_image_number, stop_event)
+
+
+class CaptureSession:
+    '''Long-lived capturing session keeping storing processes, preview windows and shared memory
+    between series of images.
+
+    capture_images function starts storing processes for every call, so every call pays processes
+    start time and the first images wait for storing processes to start. CaptureSession starts them
+    once, so new series starts without delay. Storing of images continues in background between series.
+
+    Example:
+        with CaptureSession(cameras, path_to_store_images) as session:
+            while True:
+                recorded_info = session.capture_series(images_to_capture=50)
+                ...
+
+    Burst capturing of short high speed events is done by capture_burst method, if burst_frames
+    is set. Shared memory arena for burst_frames sets is preallocated in this case and used instead
+    of shared_memory_slots, images are written to it directly and are stored after the burst.
+
+    Args:
+        Parameters are the same as parameters of capture_images function.
+        burst_frames (int, optional): maximum number of images sets captured by capture_burst. Defaults to 0.
+    '''
+    def __init__(
+            self,
+            cameras: Camera|list[Camera],
+            path_to_store_images: str|list[str],
+            images_file_names_mask: Callable[[int, int], str] = lambda cam_num, image_num: f'camera_{cam_num}_{image_num}.png',
+            imshow_windows_mask: Callable[[int], str] = lambda cam_num: f'camera_{cam_num}',
+            processes_to_run: int = 4,
+            shared_memory_slots: int = 0,
+            parallel_grabbing: bool = False,
+            recording_format: str = 'images',
+            image_encoder: ImageEncoder = None,
+            queue_memory_limit: int = 0,
+            queue_overflow_policy: str = 'block',
+            spill_file_path: str = None,
+            preview: bool = True,
+            preview_rate: float = 10.0,
+            preview_max_size: int = 1000,
+            telemetry: CaptureTelemetry = None,
+            telemetry_callback: Callable[[dict], None] = None,
+            sync_tolerance: int = 0,
+            recording_index: bool = False,
+            keep_recorded_info: bool = True,
+            striping_policy: str = 'round_robin',
+            change_gate: ChangeGate = None,
+            burst_frames: int = 0
+        ):
+        # If one camera passed, then create list for unification
+        if isinstance(cameras, Camera):
+            cameras = [cameras]
+
+        if recording_format not in ('images', 'raw'):
+            raise ValueError(f'Unknown recording format {recording_format}')
+
+        # Images are striped across several storage roots
+        storage_roots = [path_to_store_images] if isinstance(path_to_store_images, str) else list(path_to_store_images)
+
+        if queue_overflow_policy == 'spill':
+            if spill_file_path is None:
+                spill_file_paths = [os.path.join(root, 'spilled_images.tmp') for root in storage_roots]
+            else:
+                spill_file_paths = [spill_file_path] + [f'{spill_file_path}.{root_num}' for root_num in range(1, len(storage_roots))]
+        else:
+            spill_file_paths = None
+
+        self.cameras = cameras
+        self.storage_roots = storage_roots
+        self.path_to_store_images = storage_roots[0]
+        self.images_file_names_mask = images_file_names_mask
+        self.imshow_windows_mask = imshow_windows_mask
+        self.processes_to_run = processes_to_run
+        self.shared_memory_slots = shared_memory_slots
+        self.parallel_grabbing = parallel_grabbing
+        self.recording_format = recording_format
+        self.image_encoder = image_encoder
+        self.queue_memory_limit = queue_memory_limit
+        self.queue_overflow_policy = queue_overflow_policy
+        self.spill_file_paths = spill_file_paths
+        self.preview = preview
+        self.preview_rate = preview_rate
+        self.preview_max_size = preview_max_size
+        self.telemetry = telemetry if telemetry is not None else CaptureTelemetry()
+        self.telemetry_callback = telemetry_callback
+        self.sync_tolerance = sync_tolerance
+        self.write_recording_index = recording_index
+        self.keep_recorded_info = keep_recorded_info
+        self.striping_policy = striping_policy
+        self.change_gate = change_gate
+        self.burst_frames = burst_frames
+
+        self.processes = []
+        # Number of images sets captured in the session
+        self.images_captured = 0
+        # Recorded info of series with numbers of their first sets to mark dropped images
+        self._series = []
+        # File names, roots and set numbers of the last stored images of cameras with numbers of sets
+        # of images skipped by change gate referring to them
+        self._last_stored = {}
+
+
+    def start(self) -> None:
+        '''
+        Start storing processes and create preview windows.
+        '''
+        self.raw_recording = RawRecordingWriter(self.path_to_store_images) if self.recording_format == 'raw' else None
+        self.recording_index = RecordingIndexWriter(self.path_to_store_images) if self.write_recording_index else None
+
+        # Every storage root has at least one storing process
+        workers_roots = [worker_num % len(self.storage_roots)
+                         for worker_num in range(max(self.processes_to_run, len(self.storage_roots)))]
+
+        self.telemetry.start(len(self.cameras), len(workers_roots))
+
+        if self.burst_frames > 0:
+            # Burst arena has slot for every image of the burst
+            self.shared_frames = SharedFramesRing(self.burst_frames * len(self.cameras))
+        else:
+            self.shared_frames = SharedFramesRing(self.shared_memory_slots) if self.shared_memory_slots > 0 else None
+
+        self.files_to_store_queue = StripedStoringQueue(
+            len(self.storage_roots), workers_roots, self.telemetry.storing, self.queue_memory_limit,
+            self.queue_overflow_policy, self.spill_file_paths, self.shared_frames, self.striping_policy)
+
+        # Frames of cameras returning raw pixel formats are converted in storing processes and preview
+        frame_converters = [camera.frame_converter for camera in self.cameras]
+        if all(converter is None for converter in frame_converters):
+            frame_converters = None
+
+        self.processes = [
+            mp.Process(
+                target=store_images_process,
+                args=[self.files_to_store_queue.queues[root_num].queue, self.telemetry.storing, worker_num,
+                      self.shared_frames, self.image_encoder, self.files_to_store_queue.queues[root_num].queued_bytes,
+                      frame_converters])
+            for worker_num, root_num in enumerate(workers_roots)]
+
+        # Start images storing processes
+        [proc.start() for proc in self.processes]
+
+        # Create windows to show captured images
+        if self.preview:
+            self.images_preview = Preview(
+                [self.imshow_windows_mask(cam_num) for cam_num in range(len(self.cameras))],
+                self.preview_rate, self.preview_max_size, frame_converters)
+            self.images_preview.create_windows()
+
+
+    def capture_series(
+            self,
+            images_to_capture: int = 0,
+            start_image_number: int = None,
+            stop_event: Event = None
+        ) -> list[list[tuple[int, str]]]:
+        '''
+        Capture series of images sets. Images are stored in background, the method returns after capturing.
+
+        Args:
+            images_to_capture (int, optional): number of images to capture, if set to 0 infinity number of images
+            is captured. Defaults to 0.
+            start_image_number (int, optional): start image number used in file mask to generate storing file name.
+            Defaults to None (numbering continues from the previous series of the session).
+            stop_event (Event, optional): event to stop capturing from other thread or process. Defaults to None.
+
+        Returns:
+            recorded_info (list[list[tuple[int, str]]]): list of list of simultaneous captured images for cameras
+            with images timestamps and file names (see capture_images).
+        '''
+        cameras = self.cameras
+        telemetry = self.telemetry
+        files_to_store_queue = self.files_to_store_queue
+
+        if start_image_number is None:
+            start_image_number = self.images_captured
+
+        # Start images grabbing threads for each camera
+        grabbers = [CameraGrabber(camera) for camera in cameras] if self.parallel_grabbing else []
+        [grabber.start() for grabber in grabbers]
+
+        def grab(cam_num: int) -> tuple:
+            grab_start = time.perf_counter_ns()
+            image = grabbers[cam_num].get() if self.parallel_grabbing else cameras[cam_num].get_image()
+            telemetry.add_duration('grab', time.perf_counter_ns() - grab_start)
+            return image
+
+        if self.sync_tolerance > 0:
+            synchronizer = FramesSynchronizer(
+                [lambda cam_num=cam_num: grab(cam_num) for cam_num in range(len(cameras))], self.sync_tolerance)
+
+        images_captured = 0
+        images_captured_start = images_captured
+        files_stored_start = telemetry.files_stored
+        start = time.perf_counter()
+        recorded_info = []
+        self._series.append((self.images_captured, recorded_info))
+
+        while (images_to_capture == 0 or images_captured < images_to_capture):
+
+            try:
+                if self.sync_tolerance > 0:
+                    images, duplicates = synchronizer.get_set()
+                else:
+                    images = [grab(cam_num) for cam_num in range(len(cameras))]
+            except EOFError:
+                # Video file, image sequence or replayed recording is finished
+                break
+
+            if self.sync_tolerance > 0:
+                set_timestamp = min(timestamp for _, timestamp in filter(None, images))
+                for cam_num, image in enumerate(images):
+                    telemetry.add_sync(
+                        cam_num, image[1] - set_timestamp if image is not None else None, duplicates.count(cam_num))
+
+            if self.shared_frames is not None and self.shared_frames.memory is None:
+                # Allocate shared memory slots by the biggest image in the first captured set
+                self.shared_frames.allocate(max(img.nbytes for img, _ in filter(None, images)))
+
+            sync_recorded_info = []
+            dropped = []
+            stored = {}
+
+            for cam_num, image in enumerate(images):
+                if image is None:
+                    # Frame of the camera is missing in the set
+                    sync_recorded_info.extend((None, None))
+                    continue
+
+                img, timestamp = image
 
-    manager = Manager()
-    files_stored = manager.Value('i', 0)
+                if self.change_gate is not None:
+                    gate_start = time.perf_counter_ns()
+                    changed = self.change_gate.check(cam_num, img, timestamp)
+                    telemetry.add_duration('gate', time.perf_counter_ns() - gate_start)
 
-    processes = [
-        mp.Process(target=store_images_process, args=[files_to_store_queue, files_stored]) for _ in range(processes_to_run)]
+                    if not changed and cam_num in self._last_stored:
+                        # Image is near identical to the last stored image of the camera
+                        file_name, root_num, _, skipped = self._last_stored[cam_num]
+                        skipped.append(self.images_captured)
+                        telemetry.add_frame(cam_num, timestamp)
+                        telemetry.add_skipped(cam_num)
+                        if self.recording_index is not None:
+                            self.recording_index.add_frame(
+                                self.images_captured, cam_num, timestamp, file_name, root_num, skipped=True)
+                        sync_recorded_info.extend((timestamp, file_name))
+                        continue
 
-    # Start images storing processes
-    [proc.start() for proc in processes]
-    
-    # Create windows to show captured images
-    for cam_num, camera in enumerate(cameras):
-        cv2.namedWindow(imshow_windows_mask(cam_num), cv2.WINDOW_NORMAL) 
-        cv2.resizeWindow(imshow_windows_mask(cam_num), 1000, 800)
+                if self.raw_recording is not None:
+                    root_num = 0
+                    file_path, file_name = self.raw_recording.add_frame(
+                        cam_num, images_captured + start_image_number, img, timestamp)
+                else:
+                    root_num = files_to_store_queue.select_root(img.nbytes)
+                    file_path, file_name = self._get_file_path(
+                        root_num, self.images_file_names_mask(cam_num, images_captured + start_image_number))
 
-    images_captured_start = images_captured
-    files_stored_start = files_stored.value
-    start = time.perf_counter()
-    recorded_info = []
+                enqueue_start = time.perf_counter_ns()
+                dropped.extend(files_to_store_queue.put(
+                    StoringItem(file_path, img, self.images_captured, cam_num), root_num))
+                telemetry.add_duration('enqueue', time.perf_counter_ns() - enqueue_start)
+                telemetry.add_frame(cam_num, timestamp)
 
-    while (images_to_capture == 0 or images_captured < images_to_capture):
+                if self.recording_index is not None:
+                    self.recording_index.add_frame(self.images_captured, cam_num, timestamp, file_name, root_num)
 
-        sync_recorded_info = []
+                stored[cam_num] = (file_name, root_num, self.images_captured, [])
+                sync_recorded_info.extend((timestamp, file_name))
 
-        for cam_num, camera in enumerate(cameras):
-            img, timestamp = camera.get_image()
+            if self.keep_recorded_info:
+                recorded_info.append(sync_recorded_info)
+
+            # Mark images dropped by queue overflow policy in recorded info
+            for item in dropped:
+                self._mark_dropped(item)
+
+            # Skipped images refer only to images which are not dropped, after dropped image the next one is stored
+            dropped_cameras = {item.cam_num for item in dropped if item.set_index == self.images_captured}
+            for cam_num, last_stored in stored.items():
+                if cam_num in dropped_cameras:
+                    self._last_stored.pop(cam_num, None)
+                else:
+                    self._last_stored[cam_num] = last_stored
             
-            cv2.imshow(imshow_windows_mask(cam_num), img)
+            images_captured = images_captured + 1
+            self.images_captured = self.images_captured + 1
+
+            if self.preview:
+                k = self.images_preview.show([image[0] if image is not None else None for image in images])
+            else:
+                k = -1
+
+            if time.perf_counter() - start > 1:
+                fps_read = (images_captured - images_captured_start) / (time.perf_counter() - start)
+                fps_write = (telemetry.files_stored - files_stored_start) / (time.perf_counter() - start)
+                queue_size = files_to_store_queue.qsize()
+                logger.info('Images captured %d, FPS %.1f, write speed %.1f, queue size %d',
+                            images_captured, fps_read, fps_write, queue_size)
 
-            file_name = images_file_names_mask(cam_num, images_captured + start_image_number)
-            file_path = os.path.join(path_to_store_images, file_name)
+                telemetry.add_queue_sample(queue_size, files_to_store_queue.queued_bytes)
+                if self.recording_index is not None:
+                    self.recording_index.flush()
+                if self.telemetry_callback is not None:
+                    self.telemetry_callback(telemetry.get_stats())
 
-            files_to_store_queue.put((file_path, img))
+                images_captured_start = images_captured
+                files_stored_start = telemetry.files_stored
+                start = time.perf_counter() 
             
-            sync_recorded_info.extend((timestamp, file_name))
+            if k == 27:  # Escape
+                break
 
-        recorded_info.append(sync_recorded_info)
-        
-        images_captured = images_captured + 1
+            if stop_event is not None and stop_event.is_set():
+                break
 
-        k = cv2.waitKey(1)
+        # Images grabbed after the last captured set are not stored
+        for cam_num, grabber in enumerate(grabbers):
+            for _ in range(grabber.stop()):
+                telemetry.add_dropped(cam_num)
 
-        if time.perf_counter() - start > 1:
-            fps_read = (images_captured - images_captured_start) / (time.perf_counter() - start)
-            fps_write = (files_stored.value - files_stored_start) / (time.perf_counter() - start)
-            print(f'Images captured {images_captured}, FPS {fps_read:.1f}, write speed {fps_write:.1f}, queue size {files_to_store_queue.qsize()}')
+        if self.recording_index is not None:
+            self.recording_index.flush()
 
-            images_captured_start = images_captured
-            files_stored_start = files_stored.value
-            start = time.perf_counter() 
-        
-        if k == 27:  # Escape
-            break
+        return recorded_info
+
+
+    def capture_burst(
+            self,
+            images_to_capture: int = None,
+            start_image_number: int = None,
+            stop_event: Event = None,
+            wait_stored: bool = False
+        ) -> list[list[tuple[int, str]]]:
+        '''
+        Capture burst of images sets to preallocated shared memory arena at cameras speed. Images are
+        written to the arena without allocation and are passed to storing processes after the burst.
+        The method waits for storing of the previous burst, then one images set is grabbed to check
+        images size before the burst.
+
+        Args:
+            images_to_capture (int, optional): number of images sets to capture, not more than burst_frames.
+            Defaults to None (burst_frames).
+            start_image_number (int, optional): start image number used in file mask to generate storing file name.
+            Defaults to None (numbering continues from the previous series of the session).
+            stop_event (Event, optional): event to stop capturing from other thread or process. Defaults to None.
+            wait_stored (bool, optional): wait for storing of captured images reporting progress. Defaults to False.
+
+        Returns:
+            recorded_info (list[list[tuple[int, str]]]): list of list of simultaneous captured images for cameras
+            with images timestamps and file names (see capture_images).
+        '''
+        if self.burst_frames == 0:
+            raise ValueError('Burst capturing requires burst_frames')
+
+        if images_to_capture is None:
+            images_to_capture = self.burst_frames
+        if images_to_capture > self.burst_frames:
+            raise ValueError(f'Burst of {images_to_capture} images sets does not fit arena of {self.burst_frames} sets')
+
+        if start_image_number is None:
+            start_image_number = self.images_captured
+
+        cameras = self.cameras
+        shared_frames = self.shared_frames
+
+        # Images of the set grabbed before the burst define shapes of images in the arena
+        images = [camera.get_image()[0] for camera in cameras]
+        if shared_frames.memory is None:
+            shared_frames.allocate(max(img.nbytes for img in images))
+        if max(img.nbytes for img in images) > shared_frames.slot_size:
+            raise ValueError('Images are bigger than slots of burst arena')
+
+        # Reserve slots for all images of the burst, slots of the previous burst are freed after storing
+        frames = []
+        for _ in range(images_to_capture):
+            frames.append([
+                SharedFrame(shared_frames.memory.name, slot, slot * shared_frames.slot_size, img.shape, img.dtype.str)
+                for img, slot in zip(images, (shared_frames.take_slot() for _ in cameras))])
+        arena = [[shared_frames.get(frame) for frame in set_frames] for set_frames in frames]
+        timestamps = np.zeros((images_to_capture, len(cameras)), dtype=np.int64)
+
+        start = time.perf_counter()
+        images_captured = 0
+
+        while images_captured < images_to_capture:
+            for cam_num, camera in enumerate(cameras):
+                timestamps[images_captured, cam_num] = camera.get_image_into(arena[images_captured][cam_num])
+            images_captured = images_captured + 1
+
+            if stop_event is not None and stop_event.is_set():
+                break
+
+        duration = time.perf_counter() - start
+        logger.info('Burst captured %d images sets, FPS %.1f', images_captured, images_captured / duration)
+
+        # Return slots of not captured images
+        for set_frames in frames[images_captured:]:
+            for frame in set_frames:
+                shared_frames.release(frame)
+
+        recorded_info = []
+        self._series.append((self.images_captured, recorded_info))
+        files_stored_start = self.telemetry.files_stored
+
+        for image_num in range(images_captured):
+            sync_recorded_info = []
+
+            for cam_num in range(len(cameras)):
+                img, timestamp = arena[image_num][cam_num], int(timestamps[image_num, cam_num])
+
+                if self.raw_recording is not None:
+                    root_num = 0
+                    file_path, file_name = self.raw_recording.add_frame(
+                        cam_num, image_num + start_image_number, img, timestamp)
+                else:
+                    root_num = self.files_to_store_queue.select_root(img.nbytes)
+                    file_path, file_name = self._get_file_path(
+                        root_num, self.images_file_names_mask(cam_num, image_num + start_image_number))
+
+                self.files_to_store_queue.put_shared(
+                    StoringItem(file_path, frames[image_num][cam_num], self.images_captured, cam_num), img.nbytes, root_num)
+                self.telemetry.add_frame(cam_num, timestamp)
+
+                if self.recording_index is not None:
+                    self.recording_index.add_frame(self.images_captured, cam_num, timestamp, file_name, root_num)
+
+                self._last_stored[cam_num] = (file_name, root_num, self.images_captured, [])
+                sync_recorded_info.extend((timestamp, file_name))
 
-    print(f'Stopping capturing, waiting for {files_to_store_queue.qsize()} files to write in parallel processes..')
-    files_to_store_queue.close()
+            if self.keep_recorded_info:
+                recorded_info.append(sync_recorded_info)
+
+            self.images_captured = self.images_captured + 1
+
+        if self.recording_index is not None:
+            self.recording_index.flush()
+
+        if self.preview and images_captured > 0:
+            self.images_preview.show([shared_frames.get(frame) for frame in frames[images_captured - 1]], wait=True)
+
+        if wait_stored:
+            files_to_store = len(cameras) * images_captured
+            start = time.perf_counter()
+            while self.files_to_store_queue.queued_bytes > 0:
+                time.sleep(0.1)
+                if time.perf_counter() - start > 1:
+                    files_stored = self.telemetry.files_stored - files_stored_start
+                    logger.info('Burst images stored %d of %d', files_stored, files_to_store)
+                    if self.telemetry_callback is not None:
+                        self.telemetry_callback(self.telemetry.get_stats())
+                    start = time.perf_counter()
+
+        return recorded_info
+
+
+    def flush(self) -> None:
+        '''
+        Wait until all captured images are stored.
+        '''
+        self.files_to_store_queue.flush_spilled()
+
+        while self.files_to_store_queue.queued_bytes > 0:
+            time.sleep(0.001)
+
+        if self.raw_recording is not None:
+            # Stored frames are visible to readers of raw recordings
+            self.raw_recording.commit()
+
+        # Images are stored, so recorded info of previous series is not needed to mark dropped images
+        self._series = []
+
+
+    def close(self) -> None:
+        '''
+        Wait for storing of all captured images and stop storing processes.
+        '''
+        if not self.processes:
+            return
+
+        logger.info('Stopping capturing, waiting for %d files to write in parallel processes..', self.files_to_store_queue.qsize())
+        self.files_to_store_queue.flush_spilled()
+
+        # Stop storing processes after all images are stored
+        self.files_to_store_queue.stop_workers()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+
+        self.files_to_store_queue.close()
+
+        if self.shared_frames is not None:
+            self.shared_frames.close()
+
+        if self.raw_recording is not None:
+            self.raw_recording.close()
+
+        if self.recording_index is not None:
+            self.recording_index.close()
+
+        if self.preview:
+            self.images_preview.close()
+
+        logger.info('Captured stopped: %d images captured, %d files written', sum(self.telemetry.frames), self.telemetry.files_stored)
+
+
+    def __enter__(self) -> 'CaptureSession':
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def _get_file_path(self, root_num: int, file_name: str) -> tuple[str, str]:
+        file_path = os.path.join(self.storage_roots[root_num], file_name)
+        if root_num == 0:
+            return file_path, file_name
+
+        # File names of images in other roots are relative to the first root
+        try:
+            return file_path, os.path.relpath(file_path, self.path_to_store_images)
+        except ValueError:
+            # Roots are on different drives
+            return file_path, os.path.abspath(file_path)
 
-    for process in processes:
-        process.join()
 
-    print(f'Captured stopped: {images_captured * len(cameras)} images captured, {files_stored.value} files written')
+    def _mark_dropped(self, item: StoringItem) -> None:
+        set_indices = [item.set_index]
+        last_stored = self._last_stored.get(item.cam_num)
+        if last_stored is not None and last_stored[2] == item.set_index:
+            # Images skipped by change gate refer to the dropped image, the next image of the camera is stored
+            del self._last_stored[item.cam_num]
+            set_indices.extend(last_stored[3])
 
-    return recorded_info
\ No newline at end of file
+        for set_index in set_indices:
+            # Find series containing dropped image by number of the set in the session
+            for first_set, recorded_info in reversed(self._series):
+                if set_index >= first_set:
+                    if self.keep_recorded_info:
+                        recorded_info[set_index - first_set][2 * item.cam_num + 1] = None
+                    break
+            if self.recording_index is not None:
+                self.recording_index.add_dropped(set_index, item.cam_num)
+        self.telemetry.add_dropped(item.cam_num)
@@ -0,0 +1,75 @@
+'''Module with gate of storing frames changed from the last stored frame.
+
+In long monitoring experiments most of captured frames are practically identical, but every
+frame is encoded and written by capture_images. ChangeGate compares every frame with the last
+stored frame of the camera and passes it to storing only if the scene is changed or keep alive
+interval is expired. Frames are compared by mean absolute difference of pixels of decimated
+frames, so the check costs a small fraction of encoding time:
+
+    difference = mean(|frame[::decimation, ::decimation] - stored[::decimation, ::decimation]|)
+
+Raw frames (Bayer and packed pixel formats) are compared without conversion.
+'''
+import cv2
+import numpy as np
+
+
+class ChangeGate:
+    '''Gate of storing frames by difference from the last stored frame of the camera.
+
+    Args:
+        threshold (float, optional): minimum mean absolute difference of pixels of decimated frames
+        to store the frame, in pixel values. Defaults to 2.0.
+        keep_alive (float, optional): maximum interval between stored frames of the camera in seconds,
+        if 0 frames are stored only on changes. Defaults to 10.0.
+        decimation (int, optional): step of pixels compared in horizontal and vertical directions. Defaults to 8.
+    '''
+    def __init__(self, threshold: float = 2.0, keep_alive: float = 10.0, decimation: int = 8):
+        self.threshold = threshold
+        self.keep_alive = keep_alive
+        self.decimation = decimation
+
+        # Decimated last stored frames, their timestamps and last differences of cameras
+        self.stored = {}
+        self.stored_timestamps = {}
+        self.differences = {}
+
+
+    def check(self, cam_num: int, img: np.ndarray, timestamp: int) -> bool:
+        '''
+        Check if the frame should be stored. The frame becomes the last stored frame of the camera if it passes.
+
+        Args:
+            cam_num (int): camera num.
+            img (np.ndarray): frame.
+            timestamp (int): timestamp of the frame in nanoseconds.
+
+        Returns:
+            store (bool): True if the frame is changed or keep alive interval is expired.
+        '''
+        decimated = np.ascontiguousarray(img[::self.decimation, ::self.decimation])
+        stored = self.stored.get(cam_num)
+
+        if stored is None or stored.shape != decimated.shape or stored.dtype != decimated.dtype:
+            difference = np.inf
+        else:
+            # L1 norm is computed without overflow of integer types
+            difference = cv2.norm(decimated, stored, cv2.NORM_L1) / decimated.size
+        self.differences[cam_num] = difference
+
+        expired = self.keep_alive > 0 and timestamp - self.stored_timestamps.get(cam_num, timestamp) >= self.keep_alive * 1e9
+        if difference < self.threshold and not expired:
+            return False
+
+        self.stored[cam_num] = decimated
+        self.stored_timestamps[cam_num] = timestamp
+        return True
+
+
+    def reset(self) -> None:
+        '''
+        Forget stored frames, so the next frame of every camera is stored.
+        '''
+        self.stored = {}
+        self.stored_timestamps = {}
+        self.differences = {}
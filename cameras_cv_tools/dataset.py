@@ -0,0 +1,423 @@
+'''Module with dataset of captured session with cached index and lazy loading of images.
+
+Capturing session is a directory with images (or raw recordings) and timestamps with file
+names of images stored in recording index (see recording_index.py) or in JSON file with
+recorded_info saved by examples (recorded_data.json, images_series.json). Without them images
+named like camera_{cam_num}_{image_num}.png are found in the directory and modification
+times of files are used as timestamps.
+
+SessionDataset builds NumPy index of the session on the first open and caches it in the
+session directory, later the index is opened by memory mapping of cached arrays, so opening
+of the session with millions of frames takes milliseconds. Time range, nearest timestamp and
+synchronized set queries are answered by binary search in sorted timestamps. Images are loaded
+lazily through LRU cache, sequential access reads next sets ahead in a thread pool.
+
+Example:
+    with SessionDataset(path) as dataset:
+        for position in dataset.select(start_timestamp, end_timestamp):
+            images = dataset[position].images
+'''
+import os
+import re
+import json
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+
+from .camera_replay import load_recorded_info, read_recorded_image
+from .recording_index import load_recording_index
+from .streaming import FrameSet
+
+
+INDEX_VERSION = 1
+
+INDEX_ARRAYS = (
+    'set_numbers',
+    'timestamps',
+    'name_ids',
+    'names_offsets',
+    'names_data',
+    'set_timestamps_order',
+    'sorted_set_timestamps',
+    'frames_order',
+    'sorted_timestamps',
+)
+
+RECORDED_INFO_FILES = ('recorded_data.json', 'images_series.json')
+
+IMAGE_FILE_NAME = re.compile(r'^camera_(?P<cam_num>\d+)_(?P<image_num>\d+)\.\w+$')
+
+# Timestamp of missing frames in sorted timestamps, so they are placed at the end
+_MISSING_TIMESTAMP = np.iinfo(np.int64).max
+
+
+def build_session_index(
+        path: str,
+        recorded_info: list[list]|str = None
+    ) -> dict[str, np.ndarray]:
+    '''
+    Build index arrays of the session.
+
+    Args:
+        path (str): path to directory with recorded images.
+        recorded_info (list[list]|str, optional): recorded_info returned by capture_images or path to JSON file
+        with it. Defaults to None (recording index, JSON file or images found in the directory).
+
+    Returns:
+        index (dict[str, np.ndarray]): index arrays with names from INDEX_ARRAYS.
+    '''
+    source, _ = _find_source(path, recorded_info)
+
+    if source == 'index':
+        recording_index = load_recording_index(path)
+        set_numbers, timestamps, file_names = \
+            recording_index.set_numbers, recording_index.timestamps, recording_index.file_names
+    elif source == 'directory':
+        set_numbers, timestamps, file_names = _scan_directory(path)
+    else:
+        if isinstance(source, str):
+            recorded_info = load_recorded_info(source)
+        # Empty recorded_info has zero sets of zero cameras
+        sets = np.empty((len(recorded_info), len(recorded_info[0]) if recorded_info else 0), dtype=object)
+        sets[:] = recorded_info
+        set_numbers = np.arange(len(sets))
+        timestamps = np.where(np.equal(sets[:, 0::2], None), -1, sets[:, 0::2]).astype(np.int64)
+        file_names = sets[:, 1::2]
+
+    # File names are kept as one buffer with offsets, so the index is memory mapped without unpickling
+    stored = np.not_equal(file_names, None)
+    encoded_names = [file_name.encode('utf8') for file_name in file_names[stored].tolist()]
+    names_offsets = np.zeros(len(encoded_names) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded_names), dtype=np.int64, count=len(encoded_names)), out=names_offsets[1:])
+
+    name_ids = np.full(file_names.shape, -1, dtype=np.int64)
+    name_ids[stored] = np.arange(len(encoded_names))
+
+    # Timestamp of the set is the earliest timestamp of its images
+    valid_timestamps = np.where(timestamps >= 0, timestamps, _MISSING_TIMESTAMP)
+    set_timestamps = valid_timestamps.min(axis=1) if timestamps.shape[1] > 0 else np.zeros(0, dtype=np.int64)
+    set_timestamps_order = np.argsort(set_timestamps, kind='stable')
+    frames_order = np.argsort(valid_timestamps.T, axis=1, kind='stable')
+
+    return {
+        'set_numbers': np.asarray(set_numbers, dtype=np.int64),
+        'timestamps': timestamps,
+        'name_ids': name_ids,
+        'names_offsets': names_offsets,
+        'names_data': np.frombuffer(b''.join(encoded_names), dtype=np.uint8),
+        'set_timestamps_order': set_timestamps_order,
+        'sorted_set_timestamps': set_timestamps[set_timestamps_order],
+        'frames_order': frames_order,
+        'sorted_timestamps': np.take_along_axis(valid_timestamps.T, frames_order, axis=1),
+    }
+
+
+class SessionDataset:
+    '''Dataset of captured session with cached index and lazy loading of images.
+
+    Positions of sets in the dataset are their positions in recorded_info (or recording index),
+    numbers of sets used in file names are in set_numbers array.
+
+    Args:
+        path (str): path to directory with recorded images.
+        recorded_info (list[list]|str, optional): recorded_info returned by capture_images or path to JSON file
+        with it. Index built from recorded_info list is not cached. Defaults to None (recording index,
+        JSON file or images found in the directory).
+        cache_dir (str, optional): directory to cache the index. Defaults to None (.session_index in path).
+        cache_size (int, optional): maximum number of images in LRU cache. Defaults to 64.
+        read_ahead (int, optional): number of sets read ahead on sequential access. Defaults to 4.
+        workers (int, optional): number of threads reading images. Defaults to 4.
+    '''
+    def __init__(
+            self,
+            path: str,
+            recorded_info: list[list]|str = None,
+            cache_dir: str = None,
+            cache_size: int = 64,
+            read_ahead: int = 4,
+            workers: int = 4
+        ):
+        if cache_dir is None:
+            cache_dir = os.path.join(path, '.session_index')
+
+        self.path = path
+        self.read_ahead = read_ahead
+
+        if recorded_info is None or isinstance(recorded_info, str):
+            # Cache directory is created before signature of the session directory is taken
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError:
+                pass
+
+        index = None
+        _, signature = _find_source(path, recorded_info)
+        if signature is not None:
+            index = _load_cached_index(cache_dir, signature)
+        if index is None:
+            index = build_session_index(path, recorded_info)
+            if signature is not None:
+                _save_cached_index(cache_dir, signature, index)
+
+        for name in INDEX_ARRAYS:
+            setattr(self, name, index[name])
+
+        self.cameras_num = self.timestamps.shape[1]
+        # Cache must keep images read ahead
+        self.cache_size = max(cache_size, (read_ahead + 1) * self.cameras_num)
+
+        self.raw_readers = {}
+        self.executor = ThreadPoolExecutor(workers)
+        self._images = OrderedDict()
+        self._images_lock = Lock()
+        self._last_position = None
+
+
+    def __len__(self) -> int:
+        return len(self.set_numbers)
+
+
+    def __getitem__(self, position: int) -> FrameSet:
+        return self.get_set(position)
+
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.get_set(position)
+
+
+    def file_name(self, position: int, cam_num: int) -> str|None:
+        '''
+        Get file name of the image.
+
+        Args:
+            position (int): position of the set.
+            cam_num (int): camera num.
+
+        Returns:
+            file_name (str|None): file name of the image, None for missing and dropped images.
+        '''
+        name_id = self.name_ids[position, cam_num]
+        if name_id < 0:
+            return None
+        return self.names_data[self.names_offsets[name_id]:self.names_offsets[name_id + 1]].tobytes().decode('utf8')
+
+
+    def select(self, start_timestamp: int, end_timestamp: int, cam_num: int = None) -> np.ndarray:
+        '''
+        Select sets (or images of the camera) with timestamps in the range.
+
+        Args:
+            start_timestamp (int): start of the range in nanoseconds.
+            end_timestamp (int): end of the range in nanoseconds (exclusive).
+            cam_num (int, optional): camera num, if None sets are selected by the earliest timestamp
+            of their images. Defaults to None.
+
+        Returns:
+            positions (np.ndarray): positions of selected sets ordered by timestamps.
+        '''
+        sorted_timestamps, order = self._get_sorted_timestamps(cam_num)
+        start, end = np.searchsorted(sorted_timestamps, [start_timestamp, end_timestamp])
+        return order[start:end]
+
+
+    def nearest(self, timestamp: int, cam_num: int = None) -> int|None:
+        '''
+        Find set (or image of the camera) with the nearest timestamp.
+
+        Args:
+            timestamp (int): timestamp in nanoseconds.
+            cam_num (int, optional): camera num, if None sets are compared by the earliest timestamp
+            of their images. Defaults to None.
+
+        Returns:
+            position (int|None): position of the set, None if there are no images.
+        '''
+        sorted_timestamps, order = self._get_sorted_timestamps(cam_num)
+        valid = np.searchsorted(sorted_timestamps, _MISSING_TIMESTAMP)
+        if valid == 0:
+            return None
+
+        i = np.searchsorted(sorted_timestamps[:valid], timestamp)
+        if i == valid or (i > 0 and timestamp - sorted_timestamps[i - 1] <= sorted_timestamps[i] - timestamp):
+            i = i - 1
+        return int(order[i])
+
+
+    def sync_set(self, timestamp: int, tolerance: int) -> list[int|None]:
+        '''
+        Find images of all cameras nearest to the timestamp.
+
+        Args:
+            timestamp (int): timestamp in nanoseconds.
+            tolerance (int): maximum difference of image timestamp from the timestamp in nanoseconds.
+
+        Returns:
+            positions (list[int|None]): positions of sets with images of every camera, None if camera
+            has not image within tolerance.
+        '''
+        positions = []
+        for cam_num in range(self.cameras_num):
+            position = self.nearest(timestamp, cam_num)
+            if position is not None and abs(int(self.timestamps[position, cam_num]) - timestamp) > tolerance:
+                position = None
+            positions.append(position)
+        return positions
+
+
+    def get_image(self, position: int, cam_num: int) -> np.ndarray|None:
+        '''
+        Get image loading it if it is not in cache.
+
+        Args:
+            position (int): position of the set.
+            cam_num (int): camera num.
+
+        Returns:
+            image (np.ndarray|None): image, None for missing and dropped images.
+        '''
+        future = self._get_future(position, cam_num)
+        return future.result() if future is not None else None
+
+
+    def get_set(self, position: int) -> FrameSet:
+        '''
+        Get set of images. Next sets are read ahead if sets are got sequentially.
+
+        Args:
+            position (int): position of the set.
+
+        Returns:
+            frame_set (FrameSet): images and timestamps of the set, lag is 0.
+        '''
+        if position < 0:
+            position = position + len(self)
+
+        futures = [self._get_future(position, cam_num) for cam_num in range(self.cameras_num)]
+
+        if self._last_position is not None and position == self._last_position + 1:
+            for ahead_position in range(position + 1, min(position + 1 + self.read_ahead, len(self))):
+                for cam_num in range(self.cameras_num):
+                    self._get_future(ahead_position, cam_num)
+        self._last_position = position
+
+        timestamps = [int(timestamp) if timestamp >= 0 else None for timestamp in self.timestamps[position]]
+        images = [future.result() if future is not None else None for future in futures]
+        return FrameSet(images, timestamps, int(self.set_numbers[position]), 0)
+
+
+    def close(self) -> None:
+        '''
+        Stop reading threads and clear cache.
+        '''
+        self.executor.shutdown(cancel_futures=True)
+        self._images.clear()
+
+
+    def __enter__(self) -> 'SessionDataset':
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def _get_sorted_timestamps(self, cam_num: int|None) -> tuple[np.ndarray, np.ndarray]:
+        if cam_num is None:
+            return self.sorted_set_timestamps, self.set_timestamps_order
+        return self.sorted_timestamps[cam_num], self.frames_order[cam_num]
+
+
+    def _get_future(self, position: int, cam_num: int) -> Future|None:
+        key = (position, cam_num)
+        with self._images_lock:
+            future = self._images.get(key)
+            if future is not None:
+                self._images.move_to_end(key)
+                return future
+
+            file_name = self.file_name(position, cam_num)
+            if file_name is None:
+                return None
+
+            future = self.executor.submit(read_recorded_image, self.path, file_name, self.raw_readers)
+            self._images[key] = future
+            while len(self._images) > self.cache_size:
+                self._images.popitem(last=False)
+            return future
+
+
+def _find_source(path: str, recorded_info: list[list]|str|None) -> tuple[str|list[list], list|None]:
+    # Signature of source files is used to check that cached index is actual
+    if recorded_info is not None and not isinstance(recorded_info, str):
+        return recorded_info, None
+
+    if recorded_info is None:
+        if os.path.exists(os.path.join(path, 'recorded_info.index')):
+            files = [os.path.join(path, 'recorded_info.index'), os.path.join(path, 'recorded_info.names')]
+            return 'index', _files_signature(files)
+
+        for file_name in RECORDED_INFO_FILES:
+            if os.path.exists(os.path.join(path, file_name)):
+                recorded_info = os.path.join(path, file_name)
+                break
+        else:
+            return 'directory', _files_signature([path])
+
+    return recorded_info, _files_signature([recorded_info])
+
+
+def _files_signature(files: list[str]) -> list:
+    signature = []
+    for file_path in files:
+        stat = os.stat(file_path) if os.path.exists(file_path) else None
+        signature.append([os.path.abspath(file_path), stat.st_size if stat else 0, stat.st_mtime_ns if stat else 0])
+    return signature
+
+
+def _scan_directory(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    frames = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            match = IMAGE_FILE_NAME.match(entry.name)
+            if match is not None:
+                frames.append((int(match['image_num']), int(match['cam_num']), entry.stat().st_mtime_ns, entry.name))
+
+    if not frames:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.int64), np.zeros((0, 0), dtype=object)
+
+    image_nums, cam_nums, mtimes, names = zip(*frames)
+    set_numbers, positions = np.unique(np.array(image_nums), return_inverse=True)
+    cam_nums = np.array(cam_nums)
+
+    timestamps = np.full((len(set_numbers), cam_nums.max() + 1), -1, dtype=np.int64)
+    timestamps[positions, cam_nums] = mtimes
+    file_names = np.full(timestamps.shape, None, dtype=object)
+    file_names[positions, cam_nums] = names
+    return set_numbers, timestamps, file_names
+
+
+def _load_cached_index(cache_dir: str, signature: list) -> dict[str, np.ndarray]|None:
+    try:
+        with open(os.path.join(cache_dir, 'index.json'), encoding='utf8') as header_file:
+            header = json.load(header_file)
+        if header.get('version') != INDEX_VERSION or header.get('signature') != signature:
+            return None
+        return {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r') for name in INDEX_ARRAYS}
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_index(cache_dir: str, signature: list, index: dict[str, np.ndarray]) -> None:
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(cache_dir, f'{name}.npy'), index[name])
+        # Header is written last, so incomplete cache is not used
+        with open(os.path.join(cache_dir, 'index.json'), 'w', encoding='utf8') as header_file:
+            json.dump({'version': INDEX_VERSION, 'signature': signature}, header_file)
+    except OSError:
+        # Index is not cached if session directory is read only
+        pass
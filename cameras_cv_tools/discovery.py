@@ -0,0 +1,192 @@
+'''Module with parallel discovery of cameras used by get_available_cameras of cameras classes.
+
+Opening of a camera can take seconds and opening of a missing device can block until
+driver timeout, so devices are probed concurrently, each in its own thread, and devices
+not opened during timeout are skipped. Identifiers of found devices can be stored in
+a JSON cache file: on the next start only cached devices are probed, and all devices
+are probed only if some of cached devices are not found.
+'''
+import os
+import json
+import time
+from collections.abc import Callable, Hashable
+from queue import Queue, Empty
+from threading import Thread, Lock
+
+
+def probe_devices(
+        probe: Callable[[Hashable], object],
+        device_ids: list[Hashable],
+        timeout: float = 5.0,
+        release: Callable[[object], None] = None
+    ) -> dict:
+    '''
+    Probe devices concurrently.
+
+    Args:
+        probe (Callable[[Hashable], object]): function opening device by identifier, returns opened device
+        or raises exception if device is not available.
+        device_ids (list[Hashable]): identifiers of devices to probe.
+        timeout (float, optional): maximum time to wait for probing of all devices in seconds. Defaults to 5.0.
+        release (Callable[[object], None], optional): function to release device opened after timeout. Defaults to None.
+
+    Returns:
+        devices (dict): opened devices by identifiers, in order of device_ids.
+    '''
+    results = Queue()
+    lock = Lock()
+    timed_out = False
+
+    def run_probe(device_id: Hashable) -> None:
+        try:
+            device = probe(device_id)
+        except Exception:
+            device = None
+        with lock:
+            if timed_out:
+                # Nobody waits for the device, release it
+                if device is not None and release is not None:
+                    release(device)
+                return
+            results.put((device_id, device))
+
+    # Daemon threads do not block exit if probing of a device hangs
+    for device_id in device_ids:
+        Thread(target=run_probe, args=[device_id], daemon=True).start()
+
+    found = {}
+    deadline = time.perf_counter() + timeout
+    for _ in range(len(device_ids)):
+        try:
+            device_id, device = results.get(timeout=max(deadline - time.perf_counter(), 0))
+        except Empty:
+            break
+        if device is not None:
+            found[device_id] = device
+
+    with lock:
+        timed_out = True
+        # Results put between timeout and setting of timed_out flag
+        while not results.empty():
+            device_id, device = results.get()
+            if device is not None:
+                found[device_id] = device
+
+    return {device_id: found[device_id] for device_id in device_ids if device_id in found}
+
+
+class DiscoveryCache:
+    '''JSON file with identifiers of found devices for every cameras class.
+
+    Args:
+        file_path (str): path to cache file.
+    '''
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+
+    def get(self, cameras_type: str) -> list:
+        '''
+        Get identifiers of devices found last time.
+
+        Args:
+            cameras_type (str): type of cameras.
+
+        Returns:
+            device_ids (list): identifiers of devices, empty if no devices are cached.
+        '''
+        try:
+            with open(self.file_path, encoding='utf8') as file:
+                return json.load(file).get(cameras_type, [])
+        except (OSError, ValueError):
+            return []
+
+
+    def set(self, cameras_type: str, device_ids: list) -> None:
+        '''
+        Store identifiers of found devices.
+
+        Args:
+            cameras_type (str): type of cameras.
+            device_ids (list): identifiers of devices.
+        '''
+        try:
+            with open(self.file_path, encoding='utf8') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            cache = {}
+
+        cache[cameras_type] = list(device_ids)
+
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.file_path, 'w', encoding='utf8') as file:
+            json.dump(cache, file, indent=4)
+
+
+def discover_devices(
+        probe: Callable[[Hashable], object],
+        device_ids: list[Hashable]|Callable[[], list[Hashable]],
+        timeout: float = 5.0,
+        release: Callable[[object], None] = None,
+        cache_file: str = None,
+        cameras_type: str = '',
+        count: int = None
+    ) -> dict:
+    '''
+    Probe devices concurrently using cache of found devices.
+
+    If cache file contains devices of the cameras type, only cached devices are probed. If some of
+    them are not found or fewer than count devices are cached, other device_ids are probed and the cache
+    is updated.
+
+    Args:
+        probe (Callable[[Hashable], object]): function opening device by identifier (see probe_devices).
+        device_ids (list[Hashable]|Callable[[], list[Hashable]]): identifiers of devices to probe or function
+        enumerating them, the function is not called if all cached devices are found.
+        timeout (float, optional): maximum time to wait for probing in seconds. Defaults to 5.0.
+        release (Callable[[object], None], optional): function to release device opened after timeout or
+        over count. Defaults to None.
+        cache_file (str, optional): path to cache file, if None cache is not used. Defaults to None.
+        cameras_type (str, optional): type of cameras to store in the cache. Defaults to ''.
+        count (int, optional): maximum number of devices to open, if None all found devices are opened.
+        Defaults to None.
+
+    Returns:
+        devices (dict): opened devices by identifiers, in order of device_ids, cached devices missing
+        in device_ids follow them.
+    '''
+    cache = DiscoveryCache(cache_file) if cache_file is not None else None
+
+    cached_ids = cache.get(cameras_type) if cache is not None else []
+    if count is not None:
+        cached_ids = cached_ids[:count]
+
+    devices = {}
+    if cached_ids:
+        devices = probe_devices(probe, cached_ids, timeout, release)
+        if len(devices) == len(cached_ids) and (count is None or len(devices) >= count):
+            return devices
+
+    if callable(device_ids):
+        device_ids = device_ids()
+
+    # Configuration is changed or more devices are requested, probe other devices
+    devices.update(probe_devices(probe, [device_id for device_id in device_ids if device_id not in cached_ids],
+                                 timeout, release))
+
+    # Devices are ordered as without cache
+    positions = {device_id: position for position, device_id in enumerate(device_ids)}
+    devices = dict(sorted(devices.items(), key=lambda device: positions.get(device[0], len(positions))))
+
+    if count is not None:
+        for device_id in list(devices)[count:]:
+            device = devices.pop(device_id)
+            if release is not None:
+                release(device)
+
+    if cache is not None:
+        cache.set(cameras_type, list(devices))
+
+    return devices
@@ -0,0 +1,124 @@
+'''Module with image encoders used to store captured images to files.
+
+Encoders allow to define format of stored images and its parameters (compression level,
+quality and others) independently of file names, so CPU time spent on encoding can be
+traded for disk bandwidth. Encoders are passed to capture_images function and used in
+storing processes, so they must be picklable.
+'''
+import io
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+
+class ImageEncoder(ABC):
+    '''An abstract image encoder class.
+    '''
+    extension = ''
+
+    @abstractmethod
+    def encode(self, img: np.ndarray) -> bytes|np.ndarray:
+        '''
+        Encode image to bytes in the encoder format.
+
+        Args:
+            img (np.ndarray): image to encode.
+
+        Returns:
+            data (bytes|np.ndarray): encoded image data.
+        '''
+
+
+    def write(self, file_path: str, img: np.ndarray) -> None:
+        '''
+        Encode image and write it to file.
+
+        Args:
+            file_path (str): path to file to store image.
+            img (np.ndarray): image to store.
+        '''
+        with open(file_path, 'wb') as file:
+            file.write(self.encode(img))
+
+
+class OpenCVEncoder(ImageEncoder):
+    '''Image encoder using cv2.imencode for any format supported by OpenCV.
+
+    Args:
+        extension (str): extension defining image format, for example '.png' or '.bmp'.
+        params (list[int], optional): OpenCV imwrite flags as pairs of flag and value. Defaults to None.
+    '''
+    def __init__(self, extension: str, params: list[int] = None):
+        self.extension = extension
+        self.params = params if params is not None else []
+
+
+    def encode(self, img: np.ndarray) -> np.ndarray:
+        success, data = cv2.imencode(self.extension, img, self.params)
+        if not success:
+            raise ValueError(f'Image cannot be encoded to {self.extension}')
+        return data
+
+
+    def write(self, file_path: str, img: np.ndarray) -> None:
+        self.encode(img).tofile(file_path)
+
+
+class PNGEncoder(OpenCVEncoder):
+    '''PNG image encoder.
+
+    Args:
+        compression (int, optional): compression level from 0 (no compression, fastest) to 9. Defaults to 1.
+    '''
+    def __init__(self, compression: int = 1):
+        super().__init__('.png', [cv2.IMWRITE_PNG_COMPRESSION, compression])
+
+
+class JPEGEncoder(OpenCVEncoder):
+    '''JPEG image encoder.
+
+    Args:
+        quality (int, optional): quality from 0 to 100. Defaults to 95.
+    '''
+    def __init__(self, quality: int = 95):
+        super().__init__('.jpg', [cv2.IMWRITE_JPEG_QUALITY, quality])
+
+
+class TIFFEncoder(OpenCVEncoder):
+    '''TIFF image encoder.
+
+    Args:
+        compression (int, optional): TIFF compression scheme: 1 - no compression, 5 - LZW, 8 - Deflate.
+        Defaults to 1.
+    '''
+    def __init__(self, compression: int = 1):
+        super().__init__('.tiff', [cv2.IMWRITE_TIFF_COMPRESSION, compression])
+
+
+class WebPEncoder(OpenCVEncoder):
+    '''WebP image encoder.
+
+    Args:
+        lossless (bool, optional): use lossless compression. Defaults to True.
+        quality (int, optional): quality from 1 to 100 for lossy compression. Defaults to 95.
+    '''
+    def __init__(self, lossless: bool = True, quality: int = 95):
+        # OpenCV uses lossless compression for quality above 100
+        super().__init__('.webp', [cv2.IMWRITE_WEBP_QUALITY, 101 if lossless else quality])
+
+
+class NumpyEncoder(ImageEncoder):
+    '''Encoder storing images without compression in numpy .npy format.
+    '''
+    extension = '.npy'
+
+    def encode(self, img: np.ndarray) -> bytes:
+        data = io.BytesIO()
+        np.save(data, img)
+        return data.getvalue()
+
+
+    def write(self, file_path: str, img: np.ndarray) -> None:
+        with open(file_path, 'wb') as file:
+            np.save(file, img)
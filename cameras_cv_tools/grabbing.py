@@ -0,0 +1,101 @@
+'''Module with thread for continuous getting images from camera.
+
+Getting images from several cameras one after another in one loop makes time of
+getting the set of images equal to the sum of blocking get_image calls. CameraGrabber
+runs get_image of the camera in its own thread and puts images to the queue, so
+images from several cameras are got in parallel. It works with any Camera implementation.
+'''
+import logging
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+
+import numpy as np
+
+from .camera import Camera
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum time to wait for the grabbing thread to finish in stop in seconds
+STOP_TIMEOUT = 5.0
+
+
+class CameraGrabber(Thread):
+    '''Thread continuously getting images and timestamps from camera to the queue.
+
+    Args:
+        camera (Camera): camera to get images from.
+        queue_size (int): maximum number of images waiting in the queue, grabbing is paused
+        when the queue is full. Defaults to 8.
+    '''
+    def __init__(self, camera: Camera, queue_size: int = 8):
+        super().__init__(daemon=True)
+        self.camera = camera
+        self.images = Queue(maxsize=queue_size)
+        self.exception = None
+        self._discarded = 0
+        self._stop_grabbing = Event()
+
+
+    def run(self) -> None:
+        try:
+            while not self._stop_grabbing.is_set():
+                image = self.camera.get_image()
+
+                # Wait for free place in the queue, checking if grabbing is stopped
+                while True:
+                    try:
+                        self.images.put(image, timeout=0.1)
+                        break
+                    except Full:
+                        if self._stop_grabbing.is_set():
+                            self._discarded = self._discarded + 1
+                            break
+        except Exception as exception:
+            # Store exception to raise it in the thread getting images
+            self.exception = exception
+
+
+    def get(self) -> tuple[np.ndarray|int]:
+        '''
+        Get next image and timestamp from the queue. Waits for image if the queue is empty.
+
+        Returns:
+            image (np.ndarray): Image as numpy array.
+            timestamp (int): Timestamp in nanoseconds corresponding to the system time.
+        '''
+        while True:
+            try:
+                return self.images.get(timeout=0.1)
+            except Empty:
+                if self.exception is not None:
+                    raise self.exception
+                if not self.is_alive():
+                    raise RuntimeError('Camera grabbing thread is stopped')
+
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> int:
+        '''
+        Stop grabbing images and wait for the thread to finish. Images left in the queue are discarded.
+        If the thread is not finished during timeout (get_image of the camera hangs), the grabber
+        is reported as stuck by warning and is left running as daemon thread.
+
+        Args:
+            timeout (float, optional): maximum time to wait for the thread in seconds. Defaults to STOP_TIMEOUT.
+
+        Returns:
+            discarded (int): number of grabbed images which were not got from the grabber.
+        '''
+        self._stop_grabbing.set()
+        self.join(timeout)
+        if self.is_alive():
+            logger.warning('Grabbing thread of %s camera is stuck and is not stopped in %.1f s',
+                           getattr(self.camera, 'type', type(self.camera).__name__), timeout)
+
+        discarded = self._discarded
+        while True:
+            try:
+                self.images.get_nowait()
+            except Empty:
+                return discarded
+            discarded = discarded + 1
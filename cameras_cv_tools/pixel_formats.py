@@ -0,0 +1,190 @@
+'''Module with conversion of raw camera pixel formats to images.
+
+Cameras can transfer images in Bayer (not demosaiced) and bit packed formats, which
+reduce bandwidth, but must be converted before display or storing to common image
+formats. Conversion costs CPU time, so cameras can return raw frames as they are
+received (2D uint8 arrays for packed formats) and the conversion is deferred to storing
+processes and preview by PixelFormatConverter. Unpacking is vectorized with NumPy,
+demosaicing is done by OpenCV.
+
+Supported pixel formats (GenICam PFNC names):
+
+    Mono8, Mono10, Mono12, Mono16 - not packed mono;
+    Mono10p, Mono12p - mono packed LSB first without padding (PFNC);
+    Mono10Packed, Mono12Packed - mono packed by two pixels in 3 bytes (GigE Vision);
+    Bayer{RG,GB,GR,BG}{8,10,12,16,10p,12p,10Packed,12Packed} - Bayer formats with the same packing.
+
+Values of 10 and 12 bit formats are not scaled to 16 bit range.
+'''
+import re
+
+import cv2
+import numpy as np
+
+from .camera import decimate_and_bin
+
+
+# OpenCV names Bayer patterns by the second row, so GenICam RGGB pattern is COLOR_BayerBG
+BAYER_CONVERSIONS = {
+    'RG': cv2.COLOR_BayerBG2BGR,
+    'GB': cv2.COLOR_BayerGR2BGR,
+    'GR': cv2.COLOR_BayerGB2BGR,
+    'BG': cv2.COLOR_BayerRG2BGR,
+}
+
+PIXEL_FORMAT = re.compile(r'^(?P<color>Mono|Bayer(?P<pattern>RG|GB|GR|BG))(?P<bits>8|10|12|16)(?P<packing>p|Packed)?$')
+
+
+def parse_pixel_format(pixel_format: str) -> tuple[str|None, int, str|None]:
+    '''
+    Parse GenICam pixel format name.
+
+    Args:
+        pixel_format (str): pixel format name, for example 'Mono12p' or 'BayerRG8'.
+
+    Returns:
+        bayer_pattern (str|None): Bayer pattern ('RG', 'GB', 'GR' or 'BG'), None for mono formats.
+        bits (int): number of bits per pixel.
+        packing (str|None): 'p' for PFNC packing, 'Packed' for GigE Vision packing, None for not packed format.
+    '''
+    match = PIXEL_FORMAT.match(pixel_format)
+    if match is None or (match['packing'] is not None and match['bits'] not in ('10', '12')):
+        raise ValueError(f'Unsupported pixel format {pixel_format}')
+    return match['pattern'], int(match['bits']), match['packing']
+
+
+def unpack_10p(data: np.ndarray) -> np.ndarray:
+    '''
+    Unpack 10 bit pixels packed LSB first, 4 pixels in 5 bytes (PFNC Mono10p).
+
+    Args:
+        data (np.ndarray): packed data as uint8 array.
+
+    Returns:
+        pixels (np.ndarray): 1D uint16 array of pixels.
+    '''
+    b = data.reshape(-1, 5).astype(np.uint16)
+    pixels = np.empty((len(b), 4), dtype=np.uint16)
+    pixels[:, 0] = b[:, 0] | ((b[:, 1] & 0x03) << 8)
+    pixels[:, 1] = (b[:, 1] >> 2) | ((b[:, 2] & 0x0F) << 6)
+    pixels[:, 2] = (b[:, 2] >> 4) | ((b[:, 3] & 0x3F) << 4)
+    pixels[:, 3] = (b[:, 3] >> 6) | (b[:, 4] << 2)
+    return pixels.reshape(-1)
+
+
+def unpack_12p(data: np.ndarray) -> np.ndarray:
+    '''
+    Unpack 12 bit pixels packed LSB first, 2 pixels in 3 bytes (PFNC Mono12p).
+
+    Args:
+        data (np.ndarray): packed data as uint8 array.
+
+    Returns:
+        pixels (np.ndarray): 1D uint16 array of pixels.
+    '''
+    b = data.reshape(-1, 3).astype(np.uint16)
+    pixels = np.empty((len(b), 2), dtype=np.uint16)
+    pixels[:, 0] = b[:, 0] | ((b[:, 1] & 0x0F) << 8)
+    pixels[:, 1] = (b[:, 1] >> 4) | (b[:, 2] << 4)
+    return pixels.reshape(-1)
+
+
+def unpack_packed(data: np.ndarray, bits: int) -> np.ndarray:
+    '''
+    Unpack 10 or 12 bit pixels packed by two pixels in 3 bytes (GigE Vision Mono10Packed and Mono12Packed):
+    the first and the third bytes contain most significant bits of pixels, the second byte contains
+    least significant bits of both pixels.
+
+    Args:
+        data (np.ndarray): packed data as uint8 array.
+        bits (int): number of bits per pixel, 10 or 12.
+
+    Returns:
+        pixels (np.ndarray): 1D uint16 array of pixels.
+    '''
+    low_bits = bits - 8
+    low_mask = (1 << low_bits) - 1
+
+    b = data.reshape(-1, 3).astype(np.uint16)
+    pixels = np.empty((len(b), 2), dtype=np.uint16)
+    pixels[:, 0] = (b[:, 0] << low_bits) | (b[:, 1] & low_mask)
+    pixels[:, 1] = (b[:, 2] << low_bits) | ((b[:, 1] >> 4) & low_mask)
+    return pixels.reshape(-1)
+
+
+def packed_frame_size(pixel_format: str, width: int, height: int) -> int:
+    '''
+    Get size of the frame in the pixel format in bytes.
+
+    Args:
+        pixel_format (str): pixel format name.
+        width (int): frame width.
+        height (int): frame height.
+
+    Returns:
+        size (int): frame size in bytes.
+    '''
+    _, bits, packing = parse_pixel_format(pixel_format)
+    if packing is None:
+        return width * height * (1 if bits == 8 else 2)
+    return width * height * bits // 8 if packing == 'p' else width * height * 3 // 2
+
+
+class PixelFormatConverter:
+    '''Converter of raw frames in the pixel format to images. The converter is picklable,
+    so it can be passed to storing processes.
+
+    Args:
+        pixel_format (str): pixel format name (see module description).
+        width (int): frame width.
+        height (int): frame height.
+        demosaic (bool, optional): convert Bayer frames to BGR images, otherwise Bayer frames are
+        only unpacked. Defaults to True.
+        decimation (int, optional): software decimation of converted images. Defaults to 1.
+        binning (int, optional): software binning of converted images. Defaults to 1.
+    '''
+    def __init__(
+            self,
+            pixel_format: str,
+            width: int,
+            height: int,
+            demosaic: bool = True,
+            decimation: int = 1,
+            binning: int = 1
+        ):
+        self.pixel_format = pixel_format
+        self.width = width
+        self.height = height
+        self.demosaic = demosaic
+        self.decimation = decimation
+        self.binning = binning
+        self.bayer_pattern, self.bits, self.packing = parse_pixel_format(pixel_format)
+
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        '''
+        Convert raw frame to image.
+
+        Args:
+            frame (np.ndarray): raw frame, packed frames are uint8 arrays of any shape with frame data.
+
+        Returns:
+            img (np.ndarray): 2D mono or Bayer image (uint8 for 8 bit formats, uint16 for others)
+            or 3D BGR image if Bayer frame is demosaiced.
+        '''
+        if self.packing == 'p':
+            pixels = (unpack_10p if self.bits == 10 else unpack_12p)(frame.reshape(-1).view(np.uint8))
+            img = pixels[:self.width * self.height].reshape(self.height, self.width)
+        elif self.packing == 'Packed':
+            pixels = unpack_packed(frame.reshape(-1).view(np.uint8), self.bits)
+            img = pixels[:self.width * self.height].reshape(self.height, self.width)
+        else:
+            if self.bits > 8 and frame.dtype == np.uint8:
+                frame = frame.reshape(-1).view('<u2')
+            img = frame.reshape(self.height, self.width)
+
+        if self.bayer_pattern is not None and self.demosaic:
+            img = cv2.cvtColor(img, BAYER_CONVERSIONS[self.bayer_pattern])
+
+        # Bayer frames are binned and decimated only after demosaicing
+        return decimate_and_bin(img, self.decimation, self.binning)
@@ -0,0 +1,160 @@
+'''Module with throttled preview of captured images in OpenCV windows.
+
+Displaying every captured full resolution image and processing windows events after
+every image takes time from capturing. Preview shows decimated images with limited rate,
+so display cost does not depend on cameras resolution and frame rate.
+
+Conversion of raw frames (see Camera.frame_converter) and decimation run in the preview
+thread, which takes the latest images passed by show through a one-slot buffer and hands
+ready images back through another one. OpenCV windows must be handled by the thread that
+created them (the main thread on macOS), so only imshow and waitKey of ready images are
+called from the capturing thread, and capturing FPS does not depend on conversion cost.
+
+Note:
+    Images are displayed one preview period after they are passed to show. Images are
+    decimated by slicing without resampling, which costs only copying of displayed pixels.
+'''
+import math
+import time
+from collections.abc import Callable
+from threading import Thread, Condition
+
+import cv2
+import numpy as np
+
+
+class Preview:
+    '''Throttled display of decimated images in OpenCV named windows.
+
+    Args:
+        windows_names (list[str]): names of windows to display images of each camera.
+        rate (float, optional): maximum rate of windows updating in Hz, if 0 windows are updated
+        on every show call. Defaults to 10.0.
+        max_size (int, optional): maximum size of displayed image side in pixels, images are
+        decimated to fit it. Defaults to 1000.
+        frame_converters (list[Callable[[np.ndarray], np.ndarray]|None], optional): functions converting raw
+        frames of cameras to images before display (see Camera.frame_converter). Defaults to None.
+    '''
+    def __init__(
+            self,
+            windows_names: list[str],
+            rate: float = 10.0,
+            max_size: int = 1000,
+            frame_converters: list[Callable[[np.ndarray], np.ndarray]|None] = None
+        ):
+        self.windows_names = windows_names
+        self.frame_converters = frame_converters if frame_converters is not None else [None] * len(windows_names)
+        self.period = 1 / rate if rate > 0 else 0
+        self.max_size = max_size
+        self.last_show_time = -math.inf
+
+        # One-slot buffers of images passed to show and images ready to display
+        self._pending = None
+        self._ready = None
+        # Number of images passed to show and number of images prepared last
+        self._shown = 0
+        self._prepared = 0
+        self._condition = Condition()
+        self._thread = None
+        self._stopped = False
+
+
+    def create_windows(self, width: int = 1000, height: int = 800) -> None:
+        '''
+        Create resizable named windows for all cameras.
+
+        Args:
+            width (int, optional): initial window width. Defaults to 1000.
+            height (int, optional): initial window height. Defaults to 800.
+        '''
+        for window_name in self.windows_names:
+            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(window_name, width, height)
+
+
+    def show(self, images: list[np.ndarray], wait: bool = False) -> int:
+        '''
+        Pass images to the preview thread and display images prepared since the previous call,
+        if preview period is passed since last display.
+
+        Args:
+            images (list[np.ndarray]): images to display in the windows order, window is not updated for None.
+            Images are read later by the preview thread, so they must not be changed by the caller.
+            wait (bool, optional): wait until the passed images are prepared and display them. Defaults to False.
+
+        Returns:
+            key (int): code of the pressed key or -1 if no key pressed or windows were not updated.
+        '''
+        now = time.perf_counter()
+        if now - self.last_show_time < self.period and not wait:
+            return -1
+        self.last_show_time = now
+
+        if self._thread is None:
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        with self._condition:
+            # Images not taken by the preview thread yet are replaced by the latest ones
+            self._pending = list(images)
+            self._shown = self._shown + 1
+            self._condition.notify_all()
+            if wait:
+                self._condition.wait_for(lambda: self._prepared == self._shown)
+            ready, self._ready = self._ready, None
+
+        if ready is not None:
+            for window_name, img in zip(self.windows_names, ready):
+                if img is not None:
+                    cv2.imshow(window_name, img)
+
+        return cv2.waitKey(1)
+
+
+    def close(self) -> None:
+        '''
+        Stop the preview thread.
+        '''
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+    def decimate(self, img: np.ndarray) -> np.ndarray:
+        '''
+        Decimate image by integer step to fit max_size.
+
+        Args:
+            img (np.ndarray): image to decimate.
+
+        Returns:
+            img (np.ndarray): decimated image view.
+        '''
+        step = math.ceil(max(img.shape[:2]) / self.max_size)
+        return img[::step, ::step] if step > 1 else img
+
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopped)
+                if self._stopped:
+                    return
+                images, self._pending = self._pending, None
+                number = self._shown
+
+            ready = []
+            for frame_converter, img in zip(self.frame_converters, images):
+                if img is not None and frame_converter is not None:
+                    # Raw frames are converted only when displayed
+                    img = frame_converter(img)
+                # Decimated image is copied, so it does not refer to memory of captured image
+                ready.append(self.decimate(img).copy() if img is not None else None)
+
+            with self._condition:
+                self._ready = ready
+                self._prepared = number
+                self._condition.notify_all()
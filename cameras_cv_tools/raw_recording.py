@@ -0,0 +1,339 @@
+'''Module with chunked raw recording format for captured images.
+
+Storing every image in its own compressed file costs encoding time and file system
+operations for every image. The raw recording stores images of one camera without
+encoding in big preallocated chunk files and keeps compact binary index with frame
+numbers, timestamps and positions of images in chunks. Recording of camera consists of
+files in one directory:
+
+    {recording_name}.json - header with images shape, dtype, number of frames in chunk and
+        number of committed frames;
+    {recording_name}.index - binary index with record for every frame;
+    {recording_name}_{chunk:05d}.raw - chunks with raw images data.
+
+RawRecordingWriter is used in capture_images function with recording_format='raw',
+frames data is written by RawChunksWriter in storing processes. Index records are added
+before frames data is written, so frames are committed to the header by RawRecordingWriter.commit
+after they are stored. RawRecordingReader gives random access to committed frames through
+memory mapped chunks.
+'''
+import os
+import json
+from collections.abc import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+
+INDEX_DTYPE = np.dtype([
+    ('frame_number', '<i8'),
+    ('timestamp', '<i8'),
+    ('chunk', '<i8'),
+    ('offset', '<i8'),
+])
+
+# Maximum number of chunk files kept open by RawChunksWriter
+MAX_OPEN_CHUNKS = 16
+
+
+class RawFrameLocation(NamedTuple):
+    '''Location of the frame data in the chunk file of raw recording.
+    '''
+    file_path: str
+    offset: int
+
+
+class _RecordingState:
+    '''State of one camera recording in RawRecordingWriter.
+    '''
+    def __init__(self, header: dict, frames_count: int, index_file):
+        self.header = header
+        self.frames_count = frames_count
+        self.index_file = index_file
+        self.prepared_chunk = None
+
+
+class RawChunksWriter:
+    '''Writer of frames data to chunk files of raw recordings.
+
+    Chunk files are kept open between frames, so writing of frame costs only seek and write.
+    Used in storing processes, every process has its own writer.
+    '''
+    def __init__(self):
+        self.chunk_files = {}
+
+
+    def write(self, location: RawFrameLocation, img: np.ndarray) -> None:
+        '''
+        Write image data to the location in the chunk file of raw recording.
+
+        Args:
+            location (RawFrameLocation): location of the frame in the chunk file.
+            img (np.ndarray): image to write.
+        '''
+        chunk_file = self.chunk_files.get(location.file_path)
+        if chunk_file is None:
+            if len(self.chunk_files) >= MAX_OPEN_CHUNKS:
+                # Close the least recently opened chunk, frames are written to new chunks
+                self.chunk_files.pop(next(iter(self.chunk_files))).close()
+            chunk_file = open(location.file_path, 'r+b')
+            self.chunk_files[location.file_path] = chunk_file
+
+        chunk_file.seek(location.offset)
+        chunk_file.write(np.ascontiguousarray(img).data)
+
+
+    def close(self) -> None:
+        '''
+        Close all open chunk files.
+        '''
+        for chunk_file in self.chunk_files.values():
+            chunk_file.close()
+        self.chunk_files = {}
+
+
+def write_raw_frame(location: RawFrameLocation, img: np.ndarray) -> None:
+    '''
+    Write image data to the location in the chunk file of raw recording, the chunk file is opened
+    for the frame only. Use RawChunksWriter to write series of frames.
+
+    Args:
+        location (RawFrameLocation): location of the frame in the chunk file.
+        img (np.ndarray): image to write.
+    '''
+    writer = RawChunksWriter()
+    writer.write(location, img)
+    writer.close()
+
+
+class RawRecordingWriter:
+    '''Writer of raw recordings for several cameras.
+
+    The writer allocates place for frames in chunk files and writes the index, frames data
+    is written by RawChunksWriter, so it can be done in parallel processes. Frames are visible
+    to readers after they are committed by commit method, which should be called after frames
+    data is written. Existing recordings in the path are continued from the committed frames.
+
+    Args:
+        path (str): path to store recordings.
+        chunk_size (int): maximum size of chunk file in bytes. Defaults to 1 GiB.
+        recording_name_mask (Callable[[int], str]): lambda function with mask to generate recording
+        name from camera num. Defaults to lambda cam_num: f'camera_{cam_num}'.
+    '''
+    def __init__(
+            self,
+            path: str,
+            chunk_size: int = 1 << 30,
+            recording_name_mask: Callable[[int], str] = lambda cam_num: f'camera_{cam_num}'
+        ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.recording_name_mask = recording_name_mask
+        self.recordings = {}
+
+
+    def add_frame(self, cam_num: int, frame_number: int, img: np.ndarray, timestamp: int) -> tuple[RawFrameLocation, str]:
+        '''
+        Allocate place for the frame in the chunk file of camera recording and add frame to the index.
+
+        Args:
+            cam_num (int): camera num.
+            frame_number (int): number of the frame.
+            img (np.ndarray): image of the frame.
+            timestamp (int): timestamp of the frame in nanoseconds.
+
+        Returns:
+            location (RawFrameLocation): location to write frame data by RawChunksWriter.
+            frame_name (str): name of the frame in format recording_name[frame_index].
+        '''
+        recording = self.recordings.get(cam_num)
+        if recording is None:
+            recording = self._open_recording(cam_num, img)
+
+        header = recording.header
+
+        if img.shape != tuple(header['shape']) or img.dtype.str != header['dtype']:
+            raise ValueError(f'Image {img.shape} {img.dtype} does not match recording {header["shape"]} {header["dtype"]}')
+
+        frame_index = recording.frames_count
+        chunk, frame_in_chunk = divmod(frame_index, header['frames_per_chunk'])
+
+        if recording.prepared_chunk != chunk:
+            self._prepare_chunk(cam_num, chunk)
+            recording.prepared_chunk = chunk
+
+        location = RawFrameLocation(
+            chunk_file_path(self.path, header['name'], chunk), frame_in_chunk * header['frame_size'])
+
+        np.array([(frame_number, timestamp, chunk, location.offset)], dtype=INDEX_DTYPE).tofile(recording.index_file)
+        recording.frames_count = frame_index + 1
+
+        return location, f'{header["name"]}[{frame_index}]'
+
+
+    def commit(self) -> None:
+        '''
+        Commit all added frames to headers of recordings, frames data should be written before commit.
+        '''
+        for recording in self.recordings.values():
+            recording.index_file.flush()
+            recording.header['frames_committed'] = recording.frames_count
+            _write_header(self.path, recording.header)
+
+
+    def close(self) -> None:
+        '''
+        Commit added frames and close index files of all recordings.
+        '''
+        self.commit()
+        for recording in self.recordings.values():
+            recording.index_file.close()
+        self.recordings = {}
+
+
+    def _open_recording(self, cam_num: int, img: np.ndarray) -> _RecordingState:
+        name = self.recording_name_mask(cam_num)
+        header_path = os.path.join(self.path, f'{name}.json')
+        index_path = os.path.join(self.path, f'{name}.index')
+
+        if os.path.exists(header_path):
+            # Continue existing recording after committed frames, not committed records are overwritten
+            with open(header_path, encoding='utf8') as header_file:
+                header = json.load(header_file)
+            frames_count = _committed_frames(header, index_path)
+            with open(index_path, 'r+b') as index_file:
+                index_file.truncate(frames_count * INDEX_DTYPE.itemsize)
+        else:
+            header = {
+                'name': name,
+                'shape': list(img.shape),
+                'dtype': img.dtype.str,
+                'frame_size': img.nbytes,
+                'frames_per_chunk': max(1, self.chunk_size // img.nbytes),
+                'frames_committed': 0,
+            }
+            _write_header(self.path, header)
+            frames_count = 0
+
+        recording = _RecordingState(header, frames_count, open(index_path, 'ab'))
+        self.recordings[cam_num] = recording
+        return recording
+
+
+    def _prepare_chunk(self, cam_num: int, chunk: int) -> None:
+        header = self.recordings[cam_num].header
+        file_path = chunk_file_path(self.path, header['name'], chunk)
+        chunk_size = header['frames_per_chunk'] * header['frame_size']
+
+        # Preallocate chunk file, so frames can be written to it in any order
+        with open(file_path, 'ab') as chunk_file:
+            if chunk_file.tell() < chunk_size:
+                chunk_file.truncate(chunk_size)
+
+
+class RawRecordingReader:
+    '''Reader of raw recording with random access to frames through memory mapped chunks.
+
+    Frames are returned as numpy arrays located in memory mapped chunk files without copying.
+    Range of frames is returned without copying if all frames are in the same chunk.
+    Only committed frames are read, index records of frames being recorded are ignored.
+
+    Args:
+        path (str): path where recording is stored.
+        recording_name (str): name of the recording. Defaults to 'camera_0'.
+    '''
+    def __init__(self, path: str, recording_name: str = 'camera_0'):
+        self.path = path
+
+        with open(os.path.join(path, f'{recording_name}.json'), encoding='utf8') as header_file:
+            self.header = json.load(header_file)
+
+        index_path = os.path.join(path, f'{recording_name}.index')
+        self.index = np.fromfile(index_path, dtype=INDEX_DTYPE, count=_committed_frames(self.header, index_path))
+        self.shape = tuple(self.header['shape'])
+        self.dtype = np.dtype(self.header['dtype'])
+        self._chunks = {}
+
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.index['timestamp']
+
+
+    @property
+    def frame_numbers(self) -> np.ndarray:
+        return self.index['frame_number']
+
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+    def __getitem__(self, key: int|slice) -> np.ndarray:
+        if isinstance(key, slice):
+            records = self.index[key]
+            if len(records) == 0:
+                return np.empty((0, *self.shape), dtype=self.dtype)
+
+            frames = self._get_chunk(records['chunk'][0])
+            positions = records['offset'] // self.header['frame_size']
+            step = positions[1] - positions[0] if len(records) > 1 else 1
+
+            if (records['chunk'] == records['chunk'][0]).all() and step > 0 and \
+                    (np.diff(positions) == step).all():
+                # All frames are in one chunk with equal step, return view of the chunk
+                return frames[positions[0]:positions[-1] + 1:step]
+
+            return np.stack([self._get_frame(record) for record in records])
+
+        return self._get_frame(self.index[key])
+
+
+    def __iter__(self):
+        for record in self.index:
+            yield self._get_frame(record)
+
+
+    def _get_frame(self, record: np.void) -> np.ndarray:
+        return self._get_chunk(record['chunk'])[record['offset'] // self.header['frame_size']]
+
+
+    def _get_chunk(self, chunk: int) -> np.memmap:
+        frames = self._chunks.get(chunk)
+        if frames is None:
+            frames = np.memmap(
+                chunk_file_path(self.path, self.header['name'], chunk),
+                dtype=self.dtype,
+                mode='r',
+                shape=(self.header['frames_per_chunk'], *self.shape))
+            self._chunks[chunk] = frames
+        return frames
+
+
+def chunk_file_path(path: str, recording_name: str, chunk: int) -> str:
+    '''
+    Get path to the chunk file of raw recording.
+
+    Args:
+        path (str): path where recording is stored.
+        recording_name (str): name of the recording.
+        chunk (int): number of the chunk.
+
+    Returns:
+        file_path (str): path to the chunk file.
+    '''
+    return os.path.join(path, f'{recording_name}_{chunk:05d}.raw')
+
+
+def _committed_frames(header: dict, index_path: str) -> int:
+    # Recordings without committed frames number are complete
+    index_frames = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+    return min(header.get('frames_committed', index_frames), index_frames)
+
+
+def _write_header(path: str, header: dict) -> None:
+    # Header is replaced atomically, so readers never get partially written header
+    header_path = os.path.join(path, f'{header["name"]}.json')
+    with open(header_path + '.tmp', 'w', encoding='utf8') as header_file:
+        json.dump(header, header_file, indent=4)
+    os.replace(header_path + '.tmp', header_path)
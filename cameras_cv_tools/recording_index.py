@@ -0,0 +1,235 @@
+'''Module with append-only index of captured images sets.
+
+recorded_info list returned by capture_images grows with every captured set and is lost
+if capturing crashes. The recording index is written to disk during capturing and consists
+of two append-only files in the images directory:
+
+    {index_name}.index - binary records with set number, camera number, event, storage root and timestamp;
+    {index_name}.names - file names of stored images, one line for every 'stored' and 'skipped' record.
+
+Images striped across several storage roots have root number in records, their file names are
+relative to the index path (absolute if relative path does not exist), so striped recording
+is loaded as one sequence.
+
+Images dropped by storing queue overflow policy are marked by 'dropped' records appended later.
+Images not stored by change gate have 'skipped' records with file name of the last stored image
+of the camera.
+Records are flushed to disk periodically, so after a crash only the last unflushed records are
+lost, incomplete records at the end of files are ignored by the loader and truncated when
+the index is continued. load_recording_index reads the index to NumPy arrays.
+'''
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+
+RECORD_DTYPE = np.dtype([
+    ('set_index', '<i8'),
+    ('cam_num', '<i4'),
+    ('event', '<i2'),
+    ('root', '<i2'),
+    ('timestamp', '<i8'),
+])
+
+EVENT_STORED = 0
+EVENT_DROPPED = 1
+EVENT_SKIPPED = 2
+
+
+class RecordingIndexWriter:
+    '''Writer of the recording index. Continues existing index in the path,
+    numbers of new sets follow numbers of sets in the existing index.
+
+    Args:
+        path (str): path where index is stored.
+        index_name (str): name of index files. Defaults to 'recorded_info'.
+    '''
+    def __init__(self, path: str, index_name: str = 'recorded_info'):
+        index_path = os.path.join(path, f'{index_name}.index')
+        names_path = os.path.join(path, f'{index_name}.names')
+
+        records = _read_records(index_path)
+        stored = int(np.isin(records['event'], (EVENT_STORED, EVENT_SKIPPED)).sum())
+
+        # Truncate incomplete records left by crash
+        if os.path.exists(index_path):
+            os.truncate(index_path, records.nbytes)
+        if os.path.exists(names_path):
+            with open(names_path, 'rb') as names_file:
+                names_size = sum(len(line) for _, line in zip(range(stored), names_file))
+            os.truncate(names_path, names_size)
+
+        self.set_index_offset = int(records['set_index'].max()) + 1 if len(records) > 0 else 0
+
+        self.records = []
+        self.names = []
+        self.index_file = open(index_path, 'ab')
+        self.names_file = open(names_path, 'ab')
+
+
+    def add_frame(
+            self,
+            set_index: int,
+            cam_num: int,
+            timestamp: int,
+            file_name: str,
+            root: int = 0,
+            skipped: bool = False
+        ) -> None:
+        '''
+        Add stored image to the index.
+
+        Args:
+            set_index (int): number of images set.
+            cam_num (int): camera number.
+            timestamp (int): timestamp of the image in nanoseconds.
+            file_name (str): name of the image file.
+            root (int, optional): number of storage root where image is stored. Defaults to 0.
+            skipped (bool, optional): image is not stored by change gate, file_name is name of the last
+            stored image of the camera. Defaults to False.
+        '''
+        event = EVENT_SKIPPED if skipped else EVENT_STORED
+        self.records.append((set_index + self.set_index_offset, cam_num, event, root, timestamp))
+        self.names.append(file_name)
+
+
+    def add_dropped(self, set_index: int, cam_num: int) -> None:
+        '''
+        Mark image added to the index as dropped from storing.
+
+        Args:
+            set_index (int): number of images set.
+            cam_num (int): camera number.
+        '''
+        self.records.append((set_index + self.set_index_offset, cam_num, EVENT_DROPPED, 0, 0))
+
+
+    def flush(self) -> None:
+        '''
+        Write added records to index files.
+        '''
+        if not self.records:
+            return
+
+        # Names are written before records, so every complete record has its name
+        self.names_file.write(''.join(f'{name}\n' for name in self.names).encode('utf8'))
+        self.names_file.flush()
+        self.index_file.write(np.array(self.records, dtype=RECORD_DTYPE).tobytes())
+        self.index_file.flush()
+
+        self.records = []
+        self.names = []
+
+
+    def close(self) -> None:
+        '''
+        Write added records and close index files.
+        '''
+        self.flush()
+        self.index_file.close()
+        self.names_file.close()
+
+
+class RecordingIndex(NamedTuple):
+    '''Recording index loaded to arrays.
+
+    Attributes:
+        set_numbers (np.ndarray): array (sets,) with numbers of sets.
+        timestamps (np.ndarray): array (sets, cameras) with timestamps of images, -1 for missing images.
+        file_names (np.ndarray): array (sets, cameras) with file names of images, None for missing and dropped images.
+        roots (np.ndarray): array (sets, cameras) with numbers of storage roots of images, -1 for missing images.
+    '''
+    set_numbers: np.ndarray
+    timestamps: np.ndarray
+    file_names: np.ndarray
+    roots: np.ndarray
+
+
+    def select(self, start_timestamp: int, end_timestamp: int) -> 'RecordingIndex':
+        '''
+        Select sets with the earliest timestamp in the range.
+
+        Args:
+            start_timestamp (int): start of the range in nanoseconds.
+            end_timestamp (int): end of the range in nanoseconds (exclusive).
+
+        Returns:
+            index (RecordingIndex): index of selected sets.
+        '''
+        set_timestamps = np.where(self.timestamps >= 0, self.timestamps, np.iinfo(np.int64).max).min(axis=1)
+        selected = (set_timestamps >= start_timestamp) & (set_timestamps < end_timestamp)
+        return RecordingIndex(
+            self.set_numbers[selected], self.timestamps[selected], self.file_names[selected], self.roots[selected])
+
+
+    def to_recorded_info(self) -> list[list]:
+        '''
+        Convert index to recorded_info list in format returned by capture_images.
+
+        Returns:
+            recorded_info (list[list]): list of sets with timestamps and file names of every camera.
+        '''
+        timestamps = self.timestamps.tolist()
+        file_names = self.file_names.tolist()
+
+        recorded_info = []
+        for set_timestamps, set_file_names in zip(timestamps, file_names):
+            sync_recorded_info = []
+            for timestamp, file_name in zip(set_timestamps, set_file_names):
+                sync_recorded_info.extend((timestamp, file_name) if timestamp >= 0 else (None, None))
+            recorded_info.append(sync_recorded_info)
+        return recorded_info
+
+
+def load_recording_index(path: str, index_name: str = 'recorded_info', file_names: bool = True) -> RecordingIndex:
+    '''
+    Load recording index to arrays.
+
+    Args:
+        path (str): path where index is stored.
+        index_name (str): name of index files. Defaults to 'recorded_info'.
+        file_names (bool, optional): load file names, if False file_names array is filled with None. Defaults to True.
+
+    Returns:
+        index (RecordingIndex): loaded index.
+    '''
+    records = _read_records(os.path.join(path, f'{index_name}.index'))
+
+    # Skipped images refer to the last stored images
+    stored = records[np.isin(records['event'], (EVENT_STORED, EVENT_SKIPPED))]
+    dropped = records[records['event'] == EVENT_DROPPED]
+
+    set_numbers, set_positions = np.unique(stored['set_index'], return_inverse=True)
+    cameras_num = int(stored['cam_num'].max()) + 1 if len(stored) > 0 else 0
+
+    timestamps = np.full((len(set_numbers), cameras_num), -1, dtype=np.int64)
+    timestamps[set_positions, stored['cam_num']] = stored['timestamp']
+
+    roots = np.full((len(set_numbers), cameras_num), -1, dtype=np.int16)
+    roots[set_positions, stored['cam_num']] = stored['root']
+
+    names = np.full((len(set_numbers), cameras_num), None, dtype=object)
+    if file_names and len(stored) > 0:
+        with open(os.path.join(path, f'{index_name}.names'), encoding='utf8') as names_file:
+            stored_names = names_file.read().split('\n')[:len(stored)]
+        # Records without names are incomplete
+        complete = len(stored_names)
+        names[set_positions[:complete], stored['cam_num'][:complete]] = stored_names
+
+    # Dropped images have timestamps, but have not files, records of sets without stored images are ignored
+    dropped_positions = np.minimum(np.searchsorted(set_numbers, dropped['set_index']), len(set_numbers) - 1)
+    valid = (len(set_numbers) > 0) & (dropped['cam_num'] < cameras_num)
+    valid[valid] = set_numbers[dropped_positions[valid]] == dropped['set_index'][valid]
+    names[dropped_positions[valid], dropped['cam_num'][valid]] = None
+
+    return RecordingIndex(set_numbers, timestamps, names, roots)
+
+
+def _read_records(index_path: str) -> np.ndarray:
+    if not os.path.exists(index_path):
+        return np.empty(0, dtype=RECORD_DTYPE)
+
+    # Incomplete record at the end of file is ignored
+    records_num = os.path.getsize(index_path) // RECORD_DTYPE.itemsize
+    return np.fromfile(index_path, dtype=RECORD_DTYPE, count=records_num)
@@ -0,0 +1,152 @@
+'''Module with ring of shared memory slots to pass images between processes.
+
+Passing images through multiprocessing.Queue requires pickling every image, copying
+it through a pipe and unpickling it in the receiving process. SharedFramesRing
+preallocates one shared memory block divided into slots of equal size, so an image
+is copied into a free slot once and only a small SharedFrame descriptor is passed
+through the queue. The receiving process gets the image directly from the shared
+memory and releases the slot after use.
+'''
+import mmap
+import os
+from multiprocessing import Queue, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple
+
+import numpy as np
+
+
+class SharedFrame(NamedTuple):
+    '''Descriptor of image placed to the slot of SharedFramesRing.
+    '''
+    memory_name: str
+    slot: int
+    offset: int
+    shape: tuple[int, ...]
+    dtype: str
+
+
+class SharedFramesRing:
+    '''Ring of preallocated shared memory slots to pass images between processes.
+
+    The object is created in the capturing process and passed to the storing processes
+    as process argument. Shared memory is allocated in the capturing process by allocate
+    call, storing processes attach to it by name from SharedFrame descriptor.
+
+    Args:
+        slots_num (int): number of slots in the ring. Defaults to 16.
+    '''
+    def __init__(self, slots_num: int = 16):
+        self.slots_num = slots_num
+        self.slot_size = 0
+        self.memory = None
+        self.free_slots = Queue()
+        self._memory_owner = False
+        # Slots not used since allocation are taken without waiting for the free_slots queue
+        self._unused_slots = []
+
+        if os.name == 'posix':
+            # Start resource tracker before storing processes are started, so they share it with
+            # the capturing process and do not release shared memory on exit
+            resource_tracker.ensure_running()
+
+
+    def allocate(self, slot_size: int) -> None:
+        '''
+        Allocate shared memory for all slots of the ring.
+
+        Args:
+            slot_size (int): size of one slot in bytes.
+        '''
+        self.slot_size = slot_size
+        self.memory = SharedMemory(create=True, size=slot_size * self.slots_num)
+        self._memory_owner = True
+
+        # Touch every page, so pages are not mapped during capturing
+        np.ndarray(self.memory.size, np.uint8, buffer=self.memory.buf)[::mmap.PAGESIZE] = 0
+
+        self._unused_slots = list(reversed(range(self.slots_num)))
+
+
+    def take_slot(self, timeout: float = None) -> int:
+        '''
+        Take free slot of the ring. Waits for the free slot if all slots are used,
+        queue.Empty is raised if no slot is freed during timeout.
+
+        Args:
+            timeout (float, optional): time in seconds to wait for the free slot. Defaults to None (wait forever).
+
+        Returns:
+            slot (int): number of the slot.
+        '''
+        if self._unused_slots:
+            return self._unused_slots.pop()
+        return self.free_slots.get(timeout=timeout)
+
+
+    def put(self, img: np.ndarray, timeout: float = None, slot: int = None) -> SharedFrame|None:
+        '''
+        Copy image to the free slot of the ring. Waits for the free slot if all slots are used,
+        queue.Empty is raised if no slot is freed during timeout.
+
+        Args:
+            img (np.ndarray): image to copy.
+            timeout (float, optional): time in seconds to wait for the free slot. Defaults to None (wait forever).
+            slot (int, optional): slot taken from the ring before, for example slot of dropped image,
+            it is used instead of the free slot. Defaults to None.
+
+        Returns:
+            frame (SharedFrame|None): descriptor of the image in the ring or None if image does not fit to slot.
+        '''
+        if img.nbytes > self.slot_size:
+            if slot is not None:
+                self.free_slots.put(slot)
+            return None
+
+        if slot is None:
+            slot = self.take_slot(timeout)
+
+        frame = SharedFrame(self.memory.name, slot, slot * self.slot_size, img.shape, img.dtype.str)
+        self.get(frame)[...] = img
+        return frame
+
+
+    def get(self, frame: SharedFrame) -> np.ndarray:
+        '''
+        Get image from the ring as numpy array without copying. The slot must be released
+        by release call after image is no longer used.
+
+        Args:
+            frame (SharedFrame): descriptor of the image in the ring.
+
+        Returns:
+            img (np.ndarray): image as numpy array located in shared memory.
+        '''
+        # Attach to shared memory allocated in other process
+        if self.memory is None:
+            self.memory = SharedMemory(name=frame.memory_name)
+
+        return np.ndarray(frame.shape, frame.dtype, buffer=self.memory.buf, offset=frame.offset)
+
+
+    def release(self, frame: SharedFrame) -> None:
+        '''
+        Return slot of the image to the ring for reuse.
+
+        Args:
+            frame (SharedFrame): descriptor of the image in the ring.
+        '''
+        self.free_slots.put(frame.slot)
+
+
+    def close(self) -> None:
+        '''
+        Close access to shared memory. Shared memory is released if ring allocated it.
+        '''
+        if self.memory is None:
+            return
+
+        self.memory.close()
+        if self._memory_owner:
+            self.memory.unlink()
+        self.memory = None
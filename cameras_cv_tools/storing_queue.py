@@ -0,0 +1,422 @@
+'''Module with queue of images to store with limited memory budget.
+
+Images captured faster than storing processes write them are accumulated in the queue.
+StoringQueue counts memory used by queued images and applies overflow policy when the
+memory budget is exceeded:
+
+    'block' - wait until storing processes free memory, capturing is paused;
+    'drop_newest' - new image is not stored;
+    'drop_oldest' - the oldest queued images are removed from the queue, if they cannot be
+    removed immediately the new image is not stored;
+    'spill' - new image is written without encoding to scratch file and returned to
+    the queue when memory is freed.
+
+Drop policies never wait, so capturing is not paused. With shared memory slots they are also
+applied when no slot is free.
+
+StripedStoringQueue stripes images across several storage roots (for example directories
+on different drives), so bandwidth of drives is summed. Every root has its own StoringQueue
+with its own memory budget and storing processes, images are distributed round-robin or
+to the root with the shortest estimated time to write its queued images.
+'''
+import os
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import Queue
+from queue import Empty
+from typing import NamedTuple
+
+import numpy as np
+
+from .raw_recording import RawFrameLocation
+from .shared_frames import SharedFrame, SharedFramesRing
+from .telemetry import StoringTelemetry
+
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest', 'spill')
+DROP_POLICIES = ('drop_newest', 'drop_oldest')
+STRIPING_POLICIES = ('round_robin', 'bandwidth')
+
+
+class StoringItem(NamedTuple):
+    '''Image to store with file path and position of the image in recorded_info.
+    '''
+    file_path: str|RawFrameLocation
+    img: np.ndarray|SharedFrame
+    set_index: int = -1
+    cam_num: int = -1
+
+
+class _SpilledItem(NamedTuple):
+    '''Image spilled to scratch file.
+    '''
+    item: StoringItem
+    offset: int
+    shape: tuple[int, ...]
+    dtype: str
+    nbytes: int
+
+
+class StoringQueue:
+    '''Queue of images to store with memory budget and overflow policy.
+
+    The queue is used in capturing process, storing processes get items from its queue
+    attribute and decrease queued_bytes after image is stored.
+
+    Args:
+        memory_limit (int, optional): maximum size of queued images in bytes, if 0 size is unlimited. Defaults to 0.
+        overflow_policy (str, optional): policy applied when memory_limit is exceeded: 'block', 'drop_newest',
+        'drop_oldest' or 'spill'. Defaults to 'block'.
+        spill_file_path (str, optional): path to scratch file for 'spill' policy. Defaults to None.
+        shared_frames (SharedFramesRing, optional): ring of shared memory slots used to pass images to storing
+        processes. Defaults to None.
+    '''
+    def __init__(
+            self,
+            memory_limit: int = 0,
+            overflow_policy: str = 'block',
+            spill_file_path: str = None,
+            shared_frames: SharedFramesRing = None
+        ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow_policy}')
+        if overflow_policy == 'spill' and spill_file_path is None:
+            raise ValueError('Spill file path must be defined for spill overflow policy')
+
+        self.queue = Queue()
+        self.queued_bytes = mp.Value('q', 0)
+        self.memory_limit = memory_limit
+        self.overflow_policy = overflow_policy
+        self.spill_file_path = spill_file_path
+        self.shared_frames = shared_frames
+
+        self.spill_file = None
+        self.spilled = deque()
+
+
+    def put(self, item: StoringItem) -> list[StoringItem]:
+        '''
+        Put image to the queue applying overflow policy if memory limit is exceeded
+        or no shared memory slot is free.
+
+        Args:
+            item (StoringItem): image to store.
+
+        Returns:
+            dropped (list[StoringItem]): images dropped from storing.
+        '''
+        if self.memory_limit == 0 and self.overflow_policy not in DROP_POLICIES:
+            self._enqueue(item)
+            return []
+
+        # Return spilled images to the queue while memory allows
+        while self.spilled and not self._is_overflowed(self.spilled[0].nbytes):
+            self._enqueue(self._unspill())
+
+        dropped = []
+        nbytes = item.img.nbytes
+
+        if self._is_overflowed(nbytes):
+            if self.overflow_policy == 'block':
+                while self._is_overflowed(nbytes):
+                    time.sleep(0.001)
+            elif self.overflow_policy == 'drop_newest':
+                return [item]
+            elif self.overflow_policy == 'drop_oldest':
+                # Images taken by storing processes or not yet flushed to the queue pipe by the feeder
+                # thread cannot be dropped without waiting, the new image is dropped instead
+                while self._is_overflowed(nbytes):
+                    try:
+                        dropped.append(self._dequeue())
+                    except Empty:
+                        break
+                if self._is_overflowed(nbytes):
+                    self._release_slots(dropped)
+                    return dropped + [item]
+            elif self.overflow_policy == 'spill':
+                self._spill(item)
+                return []
+
+        if self.shared_frames is None or self.overflow_policy not in DROP_POLICIES:
+            self._enqueue(item)
+            return dropped
+
+        # Slots of dropped images are reused, released slots are not returned to the ring immediately
+        free_frames = [dropped_item.img for dropped_item in dropped if isinstance(dropped_item.img, SharedFrame)]
+        while True:
+            try:
+                self._enqueue(item, free_frames.pop().slot if free_frames else None, block=False)
+                break
+            except Empty:
+                oldest = None
+                if self.overflow_policy == 'drop_oldest':
+                    try:
+                        oldest = self._dequeue()
+                    except Empty:
+                        pass
+                if oldest is None or not isinstance(oldest.img, SharedFrame):
+                    # No slot is free without waiting, the new image is dropped
+                    dropped.extend([item] if oldest is None else [oldest, item])
+                    break
+                dropped.append(oldest)
+                free_frames.append(oldest.img)
+
+        for frame in free_frames:
+            self.shared_frames.release(frame)
+        return dropped
+
+
+    def put_shared(self, item: StoringItem, nbytes: int) -> None:
+        '''
+        Put image already placed to the slot of shared memory ring. Memory limit is not applied,
+        because memory of the slot is preallocated.
+
+        Args:
+            item (StoringItem): image to store with SharedFrame descriptor as image.
+            nbytes (int): size of the image in bytes.
+        '''
+        with self.queued_bytes.get_lock():
+            self.queued_bytes.value = self.queued_bytes.value + nbytes
+        self.queue.put(item)
+
+
+    def flush_spilled(self) -> None:
+        '''
+        Return all spilled images to the queue, waiting for memory to be freed by storing processes.
+        '''
+        while self.spilled:
+            while self._is_overflowed(self.spilled[0].nbytes):
+                time.sleep(0.001)
+            self._enqueue(self._unspill())
+
+
+    def qsize(self) -> int:
+        return self.queue.qsize() + len(self.spilled)
+
+
+    def close(self) -> None:
+        '''
+        Close the queue and remove spill file. Spilled images must be flushed before.
+        '''
+        self.queue.close()
+
+        if self.spill_file is not None:
+            self.spill_file.close()
+            os.remove(self.spill_file_path)
+            self.spill_file = None
+
+
+    def _is_overflowed(self, nbytes: int) -> bool:
+        queued_bytes = self.queued_bytes.value
+        # Image bigger than memory limit is allowed when queue is empty
+        return self.memory_limit > 0 and queued_bytes > 0 and queued_bytes + nbytes > self.memory_limit
+
+
+    def _enqueue(self, item: StoringItem, slot: int = None, block: bool = True) -> None:
+        nbytes = item.img.nbytes
+
+        if self.shared_frames is not None:
+            # Empty is raised if no slot is free without blocking
+            frame = self.shared_frames.put(item.img, None if block else 0, slot)
+            if frame is not None:
+                item = item._replace(img=frame)
+
+        with self.queued_bytes.get_lock():
+            self.queued_bytes.value = self.queued_bytes.value + nbytes
+
+        self.queue.put(item)
+
+
+    def _dequeue(self) -> StoringItem:
+        # Slot of the dropped image is not released, so it can be reused for the new image
+        item = self.queue.get_nowait()
+
+        if isinstance(item.img, SharedFrame):
+            nbytes = self.shared_frames.get(item.img).nbytes
+        else:
+            nbytes = item.img.nbytes
+
+        with self.queued_bytes.get_lock():
+            self.queued_bytes.value = self.queued_bytes.value - nbytes
+
+        return item
+
+
+    def _release_slots(self, items: list[StoringItem]) -> None:
+        for item in items:
+            if isinstance(item.img, SharedFrame):
+                self.shared_frames.release(item.img)
+
+
+    def _spill(self, item: StoringItem) -> None:
+        if self.spill_file is None:
+            self.spill_file = open(self.spill_file_path, 'w+b')
+        elif not self.spilled:
+            # Reuse spill file from the beginning when all spilled images are returned
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+
+        offset = self.spill_file.seek(0, os.SEEK_END)
+        self.spill_file.write(np.ascontiguousarray(item.img).data)
+
+        self.spilled.append(_SpilledItem(item._replace(img=None), offset, item.img.shape, item.img.dtype.str, item.img.nbytes))
+
+
+    def _unspill(self) -> StoringItem:
+        spilled = self.spilled.popleft()
+        dtype = np.dtype(spilled.dtype)
+
+        self.spill_file.flush()
+        self.spill_file.seek(spilled.offset)
+        img = np.fromfile(self.spill_file, dtype=dtype, count=int(np.prod(spilled.shape))).reshape(spilled.shape)
+
+        return spilled.item._replace(img=img)
+
+
+class StripedStoringQueue:
+    '''Storing queues of several storage roots with striping of images across them.
+
+    Every root has its own StoringQueue, storing processes are assigned to roots by workers_roots
+    and get items only from queue of their root. Root for the image is selected by select_root:
+
+        'round_robin' - roots are used in turn;
+        'bandwidth' - root with the minimum estimated time to write queued images and the new image,
+        write bandwidth of roots is measured by storing telemetry of their processes.
+
+    Args:
+        roots_num (int): number of storage roots.
+        workers_roots (list[int]): root number of every storing process.
+        telemetry (StoringTelemetry): telemetry of storing processes used to measure roots bandwidth.
+        memory_limit (int, optional): maximum size of queued images in bytes divided equally between roots,
+        if 0 size is unlimited. Defaults to 0.
+        overflow_policy (str, optional): overflow policy of roots queues (see StoringQueue). Defaults to 'block'.
+        spill_file_paths (list[str], optional): paths to scratch files of roots for 'spill' policy. Defaults to None.
+        shared_frames (SharedFramesRing, optional): ring of shared memory slots used to pass images to storing
+        processes. Defaults to None.
+        striping_policy (str, optional): 'round_robin' or 'bandwidth'. Defaults to 'round_robin'.
+    '''
+    def __init__(
+            self,
+            roots_num: int,
+            workers_roots: list[int],
+            telemetry: StoringTelemetry,
+            memory_limit: int = 0,
+            overflow_policy: str = 'block',
+            spill_file_paths: list[str] = None,
+            shared_frames: SharedFramesRing = None,
+            striping_policy: str = 'round_robin'
+        ):
+        if striping_policy not in STRIPING_POLICIES:
+            raise ValueError(f'Unknown striping policy {striping_policy}')
+        if set(workers_roots) != set(range(roots_num)):
+            raise ValueError('Every root must have storing process')
+
+        if spill_file_paths is None:
+            spill_file_paths = [None] * roots_num
+
+        self.queues = [
+            StoringQueue(memory_limit // roots_num, overflow_policy, spill_file_path, shared_frames)
+            for spill_file_path in spill_file_paths]
+        self.workers_roots = workers_roots
+        self.telemetry = telemetry
+        self.striping_policy = striping_policy
+        self.next_root = 0
+
+
+    @property
+    def queued_bytes(self) -> int:
+        return sum(queue.queued_bytes.value for queue in self.queues)
+
+
+    def select_root(self, nbytes: int) -> int:
+        '''
+        Select storage root for the image by striping policy.
+
+        Args:
+            nbytes (int): size of the image in bytes.
+
+        Returns:
+            root_num (int): number of the root.
+        '''
+        if len(self.queues) == 1:
+            return 0
+
+        if self.striping_policy == 'round_robin':
+            root_num = self.next_root
+            self.next_root = (root_num + 1) % len(self.queues)
+            return root_num
+
+        bandwidths = self.get_bandwidths()
+        queued_bytes = [queue.queued_bytes.value + nbytes for queue in self.queues]
+        if 0 in bandwidths:
+            # Roots without measurements are selected by queued bytes only
+            return int(np.argmin(queued_bytes))
+        return int(np.argmin(np.array(queued_bytes) / bandwidths))
+
+
+    def get_bandwidths(self) -> np.ndarray:
+        '''
+        Get write bandwidth of roots measured by storing telemetry.
+
+        Returns:
+            bandwidths (np.ndarray): bandwidth of every root in bytes per second, 0 if not measured yet.
+        '''
+        nbytes = np.zeros(len(self.queues))
+        durations = np.zeros(len(self.queues))
+        for worker_num, root_num in enumerate(self.workers_roots):
+            nbytes[root_num] += self.telemetry.bytes_stored[worker_num]
+            # The first element of histogram row is the total duration
+            durations[root_num] += self.telemetry.get_histogram(worker_num, 'write')[0]
+        return np.divide(nbytes * 1e9, durations, out=np.zeros(len(self.queues)), where=durations > 0)
+
+
+    def put(self, item: StoringItem, root_num: int = 0) -> list[StoringItem]:
+        '''
+        Put image to the queue of the root (see StoringQueue.put).
+
+        Args:
+            item (StoringItem): image to store.
+            root_num (int, optional): number of the root. Defaults to 0.
+
+        Returns:
+            dropped (list[StoringItem]): images dropped from storing.
+        '''
+        return self.queues[root_num].put(item)
+
+
+    def put_shared(self, item: StoringItem, nbytes: int, root_num: int = 0) -> None:
+        '''
+        Put image placed to the slot of shared memory ring to the queue of the root (see StoringQueue.put_shared).
+
+        Args:
+            item (StoringItem): image to store with SharedFrame descriptor as image.
+            nbytes (int): size of the image in bytes.
+            root_num (int, optional): number of the root. Defaults to 0.
+        '''
+        self.queues[root_num].put_shared(item, nbytes)
+
+
+    def flush_spilled(self) -> None:
+        '''
+        Return all spilled images of roots to the queues.
+        '''
+        for queue in self.queues:
+            queue.flush_spilled()
+
+
+    def stop_workers(self) -> None:
+        '''
+        Put stop item for every storing process to the queue of its root.
+        '''
+        for root_num in self.workers_roots:
+            self.queues[root_num].queue.put(None)
+
+
+    def qsize(self) -> int:
+        return sum(queue.qsize() for queue in self.queues)
+
+
+    def close(self) -> None:
+        for queue in self.queues:
+            queue.close()
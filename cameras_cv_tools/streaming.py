@@ -0,0 +1,264 @@
+'''Module with streaming of frames sets from cameras to processing code.
+
+FramesStream gets sets of images from one or several cameras in a background thread
+and keeps up to prefetch sets ready for the consumer, so processing of a set runs in
+parallel with getting of the next sets. Processing code consumes sets by iterating the
+stream (or with async for in asyncio code) without storing images to disk.
+
+If the consumer is slower than cameras, the buffer does not grow: with 'drop_oldest'
+policy the oldest buffered set is dropped for the new one, with 'block' policy getting
+of new sets waits for the consumer. Dropped sets and lag of delivered sets (time from
+getting the set from cameras to its delivery to the consumer) are reported by get_stats.
+
+Iteration ends when the stream is stopped or a camera raises EOFError at the end
+of replayed recording (see CameraReplay).
+
+Example:
+    with FramesStream(cameras, prefetch=4) as stream:
+        for frame_set in stream:
+            process(frame_set.images)
+'''
+import time
+import asyncio
+from collections import deque
+from threading import Thread, Event, Condition
+from typing import NamedTuple
+
+import numpy as np
+
+from .camera import Camera
+from .grabbing import CameraGrabber
+from .synchronization import FramesSynchronizer
+from .telemetry import _add_duration, histogram_summary, HISTOGRAM_BINS
+
+
+OVERFLOW_POLICIES = ('drop_oldest', 'block')
+
+
+class FrameSet(NamedTuple):
+    '''Set of simultaneously captured images.
+
+    Attributes:
+        images (list[np.ndarray|None]): images of cameras, None if frame of the camera is missing in the set.
+        timestamps (list[int|None]): timestamps of images in nanoseconds, None for missing frames.
+        set_number (int): number of the set from the stream start, numbers of dropped sets are skipped.
+        lag (int): time from getting the set from cameras to its delivery in nanoseconds.
+    '''
+    images: list[np.ndarray|None]
+    timestamps: list[int|None]
+    set_number: int
+    lag: int
+
+
+class FramesStream:
+    '''Stream of frames sets from cameras with background prefetching.
+
+    Args:
+        cameras (Camera|list[Camera]): camera or list of cameras to get images from.
+        prefetch (int, optional): maximum number of sets waiting for the consumer. Defaults to 4.
+        overflow_policy (str, optional): 'drop_oldest' or 'block', what to do when prefetch buffer is full.
+        Defaults to 'drop_oldest'.
+        parallel_grabbing (bool, optional): get images from each camera in its own thread. Defaults to False.
+        sync_tolerance (int, optional): if greater than 0, sets are assembled by frames timestamps with the
+        tolerance in nanoseconds (see FramesSynchronizer). Defaults to 0.
+    '''
+    def __init__(
+            self,
+            cameras: Camera|list[Camera],
+            prefetch: int = 4,
+            overflow_policy: str = 'drop_oldest',
+            parallel_grabbing: bool = False,
+            sync_tolerance: int = 0
+        ):
+        # If one camera passed, then create list for unification
+        if isinstance(cameras, Camera):
+            cameras = [cameras]
+
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow_policy}')
+
+        self.cameras = cameras
+        self.prefetch = max(prefetch, 1)
+        self.overflow_policy = overflow_policy
+        self.parallel_grabbing = parallel_grabbing
+        self.sync_tolerance = sync_tolerance
+
+        self.sets_grabbed = 0
+        self.sets_delivered = 0
+        self.sets_dropped = 0
+        self.missing = [0] * len(cameras)
+        self.duplicates = [0] * len(cameras)
+        self.lags = [0] * (HISTOGRAM_BINS + 2)
+
+        self.exception = None
+        self._buffer = deque()
+        self._condition = Condition()
+        self._stop_streaming = Event()
+        self._thread = None
+        self._finished = True
+
+
+    def start(self) -> None:
+        '''
+        Start getting sets of images in background thread.
+        '''
+        self._stop_streaming.clear()
+        self._finished = False
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        '''
+        Stop getting sets of images and wait for the background thread to finish.
+        Buffered sets are discarded.
+        '''
+        self._stop_streaming.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._buffer.clear()
+
+
+    def get(self, timeout: float = None) -> FrameSet:
+        '''
+        Get next set of images. Waits for the set if no sets are buffered.
+
+        Args:
+            timeout (float, optional): maximum time to wait for the set in seconds, if None waits
+            until the set is got. Defaults to None.
+
+        Returns:
+            frame_set (FrameSet): images and timestamps of cameras.
+        '''
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._buffer or self._finished, timeout):
+                raise TimeoutError('No frames set got from cameras during timeout')
+
+            if not self._buffer:
+                if self.exception is not None:
+                    raise self.exception
+                raise RuntimeError('Frames stream is stopped')
+
+            images, timestamps, set_number, grab_time = self._buffer.popleft()
+            self._condition.notify_all()
+
+        lag = time.perf_counter_ns() - grab_time
+        _add_duration(self.lags, 0, lag)
+        self.sets_delivered += 1
+
+        return FrameSet(images, timestamps, set_number, lag)
+
+
+    async def get_async(self) -> FrameSet:
+        '''
+        Get next set of images without blocking the event loop.
+
+        Returns:
+            frame_set (FrameSet): images and timestamps of cameras.
+        '''
+        return await asyncio.get_running_loop().run_in_executor(None, self.get)
+
+
+    def get_stats(self) -> dict:
+        '''
+        Get statistics of the stream.
+
+        Returns:
+            stats (dict): numbers of grabbed, delivered and dropped sets, number of buffered sets,
+            missing and duplicated frames of cameras and summary of delivered sets lag.
+        '''
+        return {
+            'grabbed': self.sets_grabbed,
+            'delivered': self.sets_delivered,
+            'dropped': self.sets_dropped,
+            'buffered': len(self._buffer),
+            'missing': list(self.missing),
+            'duplicates': list(self.duplicates),
+            'lag': histogram_summary(self.lags),
+        }
+
+
+    def __enter__(self) -> 'FramesStream':
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except RuntimeError:
+                if self.exception is not None:
+                    raise self.exception
+                return
+
+
+    async def __aiter__(self):
+        while True:
+            try:
+                yield await self.get_async()
+            except RuntimeError:
+                if self.exception is not None:
+                    raise self.exception
+                return
+
+
+    def _run(self) -> None:
+        grabbers = [CameraGrabber(camera) for camera in self.cameras] if self.parallel_grabbing else []
+        [grabber.start() for grabber in grabbers]
+
+        get_image_functions = [grabber.get for grabber in grabbers] if self.parallel_grabbing else \
+            [camera.get_image for camera in self.cameras]
+
+        if self.sync_tolerance > 0:
+            synchronizer = FramesSynchronizer(get_image_functions, self.sync_tolerance)
+
+        try:
+            while not self._stop_streaming.is_set():
+                if self.sync_tolerance > 0:
+                    images, duplicates = synchronizer.get_set()
+                    for cam_num in duplicates:
+                        self.duplicates[cam_num] += 1
+                else:
+                    images = [get_image() for get_image in get_image_functions]
+
+                for cam_num, image in enumerate(images):
+                    if image is None:
+                        self.missing[cam_num] += 1
+
+                frame_set = (
+                    [image[0] if image is not None else None for image in images],
+                    [image[1] if image is not None else None for image in images],
+                    self.sets_grabbed,
+                    time.perf_counter_ns())
+                self.sets_grabbed += 1
+
+                with self._condition:
+                    if self.overflow_policy == 'block':
+                        self._condition.wait_for(
+                            lambda: len(self._buffer) < self.prefetch or self._stop_streaming.is_set())
+                    elif len(self._buffer) >= self.prefetch:
+                        self._buffer.popleft()
+                        self.sets_dropped += 1
+
+                    self._buffer.append(frame_set)
+                    self._condition.notify_all()
+        except EOFError:
+            # Replayed recording is finished, the stream ends as stopped one
+            pass
+        except Exception as exception:
+            # Store exception to raise it in the consumer
+            self.exception = exception
+        finally:
+            for grabber in grabbers:
+                grabber.stop()
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
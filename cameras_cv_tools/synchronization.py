@@ -0,0 +1,205 @@
+'''Module with matching of frames from several cameras by timestamps.
+
+Sets of simultaneously captured images can not be assembled only by order of images,
+because when one camera drops a frame all later sets are misaligned. Frames are matched
+by timestamps: frames of different cameras with timestamps closer than tolerance belong
+to one set. Tolerance must be less than half of the frame period.
+
+FramesSynchronizer assembles sets from cameras during capturing (used in capture_images
+with sync_tolerance), match_frames and synchronize_recorded_info do the same offline with
+vectorized NumPy operations for recorded_info with millions of entries.
+'''
+from collections.abc import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+
+class FramesMatching(NamedTuple):
+    '''Result of frames matching.
+
+    Attributes:
+        indices (np.ndarray): array (sets, cameras) with frames indices of cameras in each set, -1 for missing frames.
+        timestamps (np.ndarray): array (sets, cameras) with frames timestamps, -1 for missing frames.
+        duplicates (np.ndarray): array (sets, cameras) with number of extra frames of the camera matched to the set.
+        skew (np.ndarray): array (sets, cameras) with timestamps offset from the reference camera in nanoseconds,
+        NaN if frame of the camera or the reference camera is missing.
+    '''
+    indices: np.ndarray
+    timestamps: np.ndarray
+    duplicates: np.ndarray
+    skew: np.ndarray
+
+
+    @property
+    def missing(self) -> np.ndarray:
+        '''
+        Array (sets, cameras) with True for missing frames.
+        '''
+        return self.indices < 0
+
+
+    def skew_statistics(self) -> list[dict]:
+        '''
+        Get statistics of measured skew between cameras.
+
+        Returns:
+            statistics (list[dict]): mean, standard deviation and maximum absolute skew in nanoseconds
+            for every camera relative to the reference camera.
+        '''
+        statistics = []
+        for skew in self.skew.T:
+            skew = skew[~np.isnan(skew)]
+            statistics.append({
+                'mean': float(skew.mean()) if len(skew) > 0 else 0.0,
+                'std': float(skew.std()) if len(skew) > 0 else 0.0,
+                'max_abs': float(np.abs(skew).max()) if len(skew) > 0 else 0.0,
+            })
+        return statistics
+
+
+def match_frames(timestamps: list[np.ndarray], tolerance: int, reference_camera: int = 0) -> FramesMatching:
+    '''
+    Match frames of several cameras to sets by timestamps.
+
+    All timestamps are merged and sorted, neighbouring timestamps closer than tolerance are joined to one set.
+    If a camera has several frames in one set, the earliest frame is used and others are counted as duplicates.
+
+    Args:
+        timestamps (list[np.ndarray]): timestamps of frames in nanoseconds for every camera.
+        tolerance (int): maximum difference of timestamps of frames in one set in nanoseconds.
+        reference_camera (int, optional): camera used as reference to measure skew. Defaults to 0.
+
+    Returns:
+        matching (FramesMatching): matched sets of frames.
+    '''
+    cameras_num = len(timestamps)
+
+    all_timestamps = np.concatenate([np.asarray(ts, dtype=np.int64) for ts in timestamps])
+    all_cameras = np.concatenate([np.full(len(ts), cam_num) for cam_num, ts in enumerate(timestamps)])
+    all_frames = np.concatenate([np.arange(len(ts)) for ts in timestamps])
+
+    order = np.argsort(all_timestamps, kind='stable')
+    all_timestamps, all_cameras, all_frames = all_timestamps[order], all_cameras[order], all_frames[order]
+
+    # New set starts where gap between neighbouring timestamps exceeds tolerance
+    set_numbers = np.cumsum(np.diff(all_timestamps, prepend=all_timestamps[:1]) > tolerance)
+    sets_num = int(set_numbers[-1]) + 1 if len(set_numbers) > 0 else 0
+
+    # First occurrence of every set and camera pair, others are duplicates
+    keys = set_numbers * cameras_num + all_cameras
+    unique_keys, first_indices, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    indices = np.full((sets_num, cameras_num), -1, dtype=np.int64)
+    indices.flat[unique_keys] = all_frames[first_indices]
+
+    set_timestamps = np.full((sets_num, cameras_num), -1, dtype=np.int64)
+    set_timestamps.flat[unique_keys] = all_timestamps[first_indices]
+
+    duplicates = np.zeros((sets_num, cameras_num), dtype=np.int64)
+    duplicates.flat[unique_keys] = counts - 1
+
+    skew = np.where(indices >= 0, set_timestamps, np.nan).astype(np.float64)
+    skew = skew - skew[:, reference_camera:reference_camera + 1]
+
+    return FramesMatching(indices, set_timestamps, duplicates, skew)
+
+
+def recorded_info_timestamps(recorded_info: list[list]) -> list[np.ndarray]:
+    '''
+    Get timestamps of every camera from recorded_info returned by capture_images.
+
+    Args:
+        recorded_info (list[list]): list of sets with timestamps and file names of every camera.
+
+    Returns:
+        timestamps (list[np.ndarray]): timestamps of every camera frames, missing frames are skipped.
+    '''
+    return [
+        column[np.not_equal(column, None)].astype(np.int64)
+        for column in _recorded_info_array(recorded_info)[:, 0::2].T]
+
+
+def synchronize_recorded_info(recorded_info: list[list], tolerance: int) -> tuple[list[list], FramesMatching]:
+    '''
+    Rebuild sets of recorded_info by timestamps of frames.
+
+    Args:
+        recorded_info (list[list]): list of sets with timestamps and file names of every camera
+        as returned by capture_images or saved in JSON file.
+        tolerance (int): maximum difference of timestamps of frames in one set in nanoseconds.
+
+    Returns:
+        recorded_info (list[list]): list of matched sets, timestamp and file name are None for missing frames.
+        matching (FramesMatching): matched sets of frames.
+    '''
+    info = _recorded_info_array(recorded_info)
+    matching = match_frames(recorded_info_timestamps(recorded_info), tolerance)
+
+    synchronized = np.full((len(matching.indices), info.shape[1]), None, dtype=object)
+    for cam_num, frame_indices in enumerate(matching.indices.T):
+        # Frames of the camera without missing ones, in order of their indices
+        camera_frames = info[np.not_equal(info[:, 2 * cam_num], None), 2 * cam_num:2 * cam_num + 2]
+        matched = frame_indices >= 0
+        synchronized[matched, 2 * cam_num:2 * cam_num + 2] = camera_frames[frame_indices[matched]]
+
+    return synchronized.tolist(), matching
+
+
+def _recorded_info_array(recorded_info: list[list]) -> np.ndarray:
+    # Object array (sets, 2 * cameras) keeps timestamps and file names as they are
+    info = np.empty((len(recorded_info), len(recorded_info[0]) if recorded_info else 0), dtype=object)
+    info[:] = recorded_info
+    return info
+
+
+class FramesSynchronizer:
+    '''Live assembling of frames sets from several cameras by timestamps.
+
+    Next frame of every camera is kept as pending. The set is formed from pending frames
+    closer than tolerance to the earliest pending frame, other cameras are missing in the set
+    and their frames are kept for next sets. Frame of a camera closer than tolerance to the
+    previous set is a duplicate and is discarded.
+
+    Args:
+        get_image_functions (list[Callable[[], tuple]]): functions returning next image and timestamp for every camera.
+        tolerance (int): maximum difference of timestamps of frames in one set in nanoseconds.
+    '''
+    def __init__(self, get_image_functions: list[Callable[[], tuple]], tolerance: int):
+        self.get_image_functions = get_image_functions
+        self.tolerance = tolerance
+        self.pending = [None] * len(get_image_functions)
+        self.last_set_timestamp = None
+
+
+    def get_set(self) -> tuple[list[tuple|None], list[int]]:
+        '''
+        Get next set of frames.
+
+        Returns:
+            images (list[tuple|None]): image and timestamp for every camera, None if frame of the camera is missing.
+            duplicates (list[int]): cameras numbers of discarded duplicated frames.
+        '''
+        duplicates = []
+
+        for cam_num, get_image in enumerate(self.get_image_functions):
+            while self.pending[cam_num] is None:
+                image = get_image()
+                if self.last_set_timestamp is not None and image[1] <= self.last_set_timestamp + self.tolerance:
+                    # Frame belongs to the previous set
+                    duplicates.append(cam_num)
+                    continue
+                self.pending[cam_num] = image
+
+        set_timestamp = min(timestamp for _, timestamp in self.pending)
+
+        images = []
+        for cam_num, image in enumerate(self.pending):
+            if image[1] <= set_timestamp + self.tolerance:
+                images.append(image)
+                self.pending[cam_num] = None
+            else:
+                images.append(None)
+
+        self.last_set_timestamp = set_timestamp
+        return images, duplicates
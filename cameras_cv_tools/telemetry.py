@@ -0,0 +1,314 @@
+'''Module with telemetry of capturing and storing images stages.
+
+Durations of stages are collected to histograms with logarithmic bins: bin i contains
+durations from 2**(i-1) to 2**i nanoseconds. Every histogram row also keeps sum and
+maximum of durations. Storing processes write to their own rows of shared arrays
+without locks, so collecting telemetry does not need interprocess communication.
+
+Stages measured by capture_images function:
+
+    'grab' - getting image from camera;
+    'gate' - checking image by change gate;
+    'enqueue' - putting image to storing queue;
+    'encode' - encoding image in storing process;
+    'write' - writing encoded image to file in storing process.
+'''
+import csv
+import json
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+
+HISTOGRAM_BINS = 48
+
+# Histogram row contains sum and max of durations followed by bins
+_HISTOGRAM_ROW = HISTOGRAM_BINS + 2
+
+CAPTURING_STAGES = ('grab', 'gate', 'enqueue')
+STORING_STAGES = ('encode', 'write')
+
+
+def _add_duration(histograms, row: int, duration_ns: int) -> None:
+    offset = row * _HISTOGRAM_ROW
+    histograms[offset] += duration_ns
+    if duration_ns > histograms[offset + 1]:
+        histograms[offset + 1] = duration_ns
+    histograms[offset + 2 + min(duration_ns.bit_length(), HISTOGRAM_BINS - 1)] += 1
+
+
+def histogram_summary(histogram_row: np.ndarray) -> dict:
+    '''
+    Get summary of durations histogram row.
+
+    Args:
+        histogram_row (np.ndarray): histogram row with sum, max and bins of durations.
+
+    Returns:
+        summary (dict): count, mean, median (p50), p99 and max durations in milliseconds.
+        Percentiles are linearly interpolated within the bin and do not exceed max.
+    '''
+    bins = np.asarray(histogram_row[2:])
+    count = int(bins.sum())
+    if count == 0:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+
+    cumulative = np.cumsum(bins)
+    max_ns = histogram_row[1]
+
+    def percentile(q: float) -> float:
+        rank = q * count
+        i = int(np.searchsorted(cumulative, rank))
+        lower, upper = (2.0 ** (i - 1) if i > 0 else 0.0), 2.0 ** i
+        position = (rank - (cumulative[i] - bins[i])) / bins[i]
+        return min(lower + (upper - lower) * position, max_ns) / 1e6
+
+    return {
+        'count': count,
+        'mean_ms': histogram_row[0] / count / 1e6,
+        'p50_ms': percentile(0.5),
+        'p99_ms': percentile(0.99),
+        'max_ms': max_ns / 1e6,
+    }
+
+
+class StoringTelemetry:
+    '''Telemetry of storing processes kept in shared memory arrays.
+
+    Every storing process writes only to its own elements of arrays, so no locks are used.
+
+    Args:
+        workers_num (int): number of storing processes.
+    '''
+    def __init__(self, workers_num: int):
+        self.workers_num = workers_num
+        self.files_stored = mp.RawArray('q', workers_num)
+        self.bytes_stored = mp.RawArray('q', workers_num)
+        self.histograms = mp.RawArray('q', workers_num * len(STORING_STAGES) * _HISTOGRAM_ROW)
+
+
+    def add_duration(self, worker_num: int, stage: str, duration_ns: int) -> None:
+        '''
+        Add duration of storing stage to histogram of the storing process.
+
+        Args:
+            worker_num (int): number of storing process.
+            stage (str): 'encode' or 'write'.
+            duration_ns (int): duration of the stage in nanoseconds.
+        '''
+        _add_duration(self.histograms, worker_num * len(STORING_STAGES) + STORING_STAGES.index(stage), duration_ns)
+
+
+    def add_stored(self, worker_num: int, nbytes: int) -> None:
+        '''
+        Count stored file of the storing process.
+
+        Args:
+            worker_num (int): number of storing process.
+            nbytes (int): size of the stored file in bytes.
+        '''
+        self.files_stored[worker_num] += 1
+        self.bytes_stored[worker_num] += nbytes
+
+
+    def get_histogram(self, worker_num: int, stage: str) -> np.ndarray:
+        row = worker_num * len(STORING_STAGES) + STORING_STAGES.index(stage)
+        return np.frombuffer(self.histograms, dtype=np.int64)[row * _HISTOGRAM_ROW:(row + 1) * _HISTOGRAM_ROW].copy()
+
+
+class CaptureTelemetry:
+    '''Telemetry of capture_images function.
+
+    The object can be passed to capture_images to get statistics during and after capturing.
+    It is initialized by capture_images with start call.
+    '''
+    def __init__(self):
+        self.start_time = None
+        self.storing = None
+
+
+    def start(self, cameras_num: int, workers_num: int) -> None:
+        '''
+        Reset telemetry for new capturing.
+
+        Args:
+            cameras_num (int): number of cameras.
+            workers_num (int): number of storing processes.
+        '''
+        self.start_time = time.perf_counter()
+        self.storing = StoringTelemetry(workers_num)
+
+        self.histograms = np.zeros((len(CAPTURING_STAGES), _HISTOGRAM_ROW), dtype=np.int64).tolist()
+        self.intervals = np.zeros((cameras_num, _HISTOGRAM_ROW), dtype=np.int64).tolist()
+        self.skews = np.zeros((cameras_num, _HISTOGRAM_ROW), dtype=np.int64).tolist()
+        self.last_timestamps = [None] * cameras_num
+        self.frames = [0] * cameras_num
+        self.dropped = [0] * cameras_num
+        self.skipped = [0] * cameras_num
+        self.missing = [0] * cameras_num
+        self.duplicates = [0] * cameras_num
+        self.queue_samples = []
+
+
+    def add_duration(self, stage: str, duration_ns: int) -> None:
+        '''
+        Add duration of capturing stage.
+
+        Args:
+            stage (str): 'grab', 'gate' or 'enqueue'.
+            duration_ns (int): duration of the stage in nanoseconds.
+        '''
+        _add_duration(self.histograms[CAPTURING_STAGES.index(stage)], 0, duration_ns)
+
+
+    def add_frame(self, cam_num: int, timestamp: int) -> None:
+        '''
+        Count captured frame and interval from previous frame of the camera.
+
+        Args:
+            cam_num (int): camera num.
+            timestamp (int): timestamp of the frame in nanoseconds.
+        '''
+        last_timestamp = self.last_timestamps[cam_num]
+        if last_timestamp is not None and timestamp > last_timestamp:
+            _add_duration(self.intervals[cam_num], 0, timestamp - last_timestamp)
+
+        self.last_timestamps[cam_num] = timestamp
+        self.frames[cam_num] += 1
+
+
+    def add_dropped(self, cam_num: int) -> None:
+        '''
+        Count frame of the camera dropped from storing.
+
+        Args:
+            cam_num (int): camera num.
+        '''
+        self.dropped[cam_num] += 1
+
+
+    def add_skipped(self, cam_num: int) -> None:
+        '''
+        Count frame of the camera not stored by change gate.
+
+        Args:
+            cam_num (int): camera num.
+        '''
+        self.skipped[cam_num] += 1
+
+
+    def add_sync(self, cam_num: int, skew: int|None = None, duplicates: int = 0) -> None:
+        '''
+        Add result of frames synchronization for the camera.
+
+        Args:
+            cam_num (int): camera num.
+            skew (int|None, optional): absolute timestamp offset of the camera frame from the set in nanoseconds,
+            None if frame of the camera is missing in the set. Defaults to None.
+            duplicates (int, optional): number of discarded duplicated frames. Defaults to 0.
+        '''
+        if skew is None:
+            self.missing[cam_num] += 1
+        else:
+            _add_duration(self.skews[cam_num], 0, skew)
+        self.duplicates[cam_num] += duplicates
+
+
+    def add_queue_sample(self, queue_size: int, queued_bytes: int) -> None:
+        '''
+        Add sample of storing queue depth.
+
+        Args:
+            queue_size (int): number of images in the queue.
+            queued_bytes (int): size of images in the queue in bytes.
+        '''
+        self.queue_samples.append((time.perf_counter() - self.start_time, queue_size, queued_bytes))
+
+
+    @property
+    def files_stored(self) -> int:
+        return sum(self.storing.files_stored)
+
+
+    def get_stats(self) -> dict:
+        '''
+        Get statistics of capturing.
+
+        Returns:
+            stats (dict): dictionary with elapsed time, stages durations summaries, cameras frames,
+            dropped, skipped, missing and duplicated frames, intervals and skew summaries, storing processes throughput and queue depth samples.
+        '''
+        elapsed = time.perf_counter() - self.start_time
+
+        stages = {stage: histogram_summary(self.histograms[i]) for i, stage in enumerate(CAPTURING_STAGES)}
+        for stage in STORING_STAGES:
+            stage_histogram = sum(
+                self.storing.get_histogram(worker_num, stage) for worker_num in range(self.storing.workers_num))
+            # Maximum is not summable, use maximum of storing processes
+            stage_histogram[1] = max(
+                self.storing.get_histogram(worker_num, stage)[1] for worker_num in range(self.storing.workers_num))
+            stages[stage] = histogram_summary(stage_histogram)
+
+        cameras = [{
+            'frames': self.frames[cam_num],
+            'dropped': self.dropped[cam_num],
+            'skipped': self.skipped[cam_num],
+            'missing': self.missing[cam_num],
+            'duplicates': self.duplicates[cam_num],
+            'intervals': histogram_summary(self.intervals[cam_num]),
+            'skew': histogram_summary(self.skews[cam_num]),
+        } for cam_num in range(len(self.frames))]
+
+        workers = [{
+            'files': self.storing.files_stored[worker_num],
+            'bytes': self.storing.bytes_stored[worker_num],
+            'files_per_second': self.storing.files_stored[worker_num] / elapsed,
+            'mb_per_second': self.storing.bytes_stored[worker_num] / elapsed / 1e6,
+        } for worker_num in range(self.storing.workers_num)]
+
+        return {
+            'elapsed': elapsed,
+            'stages': stages,
+            'cameras': cameras,
+            'workers': workers,
+            'queue': [list(sample) for sample in self.queue_samples],
+        }
+
+
+    def export(self, file_path: str) -> None:
+        '''
+        Export statistics to JSON file or to CSV file with group, name, metric and value columns.
+        Format is defined by file extension.
+
+        Args:
+            file_path (str): path to file to export statistics.
+        '''
+        stats = self.get_stats()
+
+        if file_path.endswith('.json'):
+            with open(file_path, 'w', encoding='utf8') as file:
+                json.dump(stats, file, indent=4)
+            return
+
+        rows = [('session', '', 'elapsed', stats['elapsed'])]
+        for stage, summary in stats['stages'].items():
+            rows.extend(('stage', stage, metric, value) for metric, value in summary.items())
+        for cam_num, camera in enumerate(stats['cameras']):
+            rows.append(('camera', cam_num, 'frames', camera['frames']))
+            rows.append(('camera', cam_num, 'dropped', camera['dropped']))
+            rows.append(('camera', cam_num, 'skipped', camera['skipped']))
+            rows.append(('camera', cam_num, 'missing', camera['missing']))
+            rows.append(('camera', cam_num, 'duplicates', camera['duplicates']))
+            rows.extend(('camera', cam_num, f'interval_{metric}', value) for metric, value in camera['intervals'].items())
+            rows.extend(('camera', cam_num, f'skew_{metric}', value) for metric, value in camera['skew'].items())
+        for worker_num, worker in enumerate(stats['workers']):
+            rows.extend(('worker', worker_num, metric, value) for metric, value in worker.items())
+        for sample_time, queue_size, queued_bytes in stats['queue']:
+            rows.append(('queue', f'{sample_time:.3f}', 'size', queue_size))
+            rows.append(('queue', f'{sample_time:.3f}', 'bytes', queued_bytes))
+
+        with open(file_path, 'w', newline='', encoding='utf8') as file:
+            writer = csv.writer(file)
+            writer.writerow(('group', 'name', 'metric', 'value'))
+            writer.writerows(rows)
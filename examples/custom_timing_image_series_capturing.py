@@ -1,12 +1,13 @@
 '''An example of capturing from Baumer camera with custom timing: capture 50 images every 30 seconds.
 The example demonstrates the possibility of recording images with a specified number and capture start time in
 a programmatic way. The result is saved in sequentially numbered files, and the corresponding timestamps for images
-are saved in a separate file.
+are saved in a separate file. Series are captured to preallocated memory at camera speed and are stored between series.
 
 The example requires NeoAPI from Baumer to work: 
 https://www.baumer.com/us/en/product-overview/industrial-cameras-image-processing/software/baumer-neoapi/c/42528
 '''
 import json
+import logging
 import time
 from datetime import datetime
 
@@ -19,10 +20,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # from cameras_cv_tools.camera_baumer import CameraBaumer as Camera
 from cameras_cv_tools.camera_generic_web import CameraWeb as Camera
-from cameras_cv_tools.capturing import capture_images
+from cameras_cv_tools.capturing import CaptureSession
+from cameras_cv_tools.change_gate import ChangeGate
 
 
 if __name__ == "__main__":
+    # Capturing progress is logged at INFO level
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     # Define capturing parameters
     IMAGES_TO_CAPTURE_IN_ONE_SERIES = 50
     TIME_PERIOD_BETWEEN_SERIES = 30 # s
@@ -63,9 +68,19 @@ if __name__ == "__main__":
 
     # Variables to store capturing process data
     recorded_info_all = []
-    images_captured = 0
     start_capture = False
 
+    # Start storing processes once for all series, so every series starts without delay
+    session = CaptureSession(
+        camera,
+        path_to_store_images=images_series_path,
+        images_file_names_mask=IMAGES_FILE_NAMES_MASK,
+        imshow_windows_mask=IMSHOW_WINDOW_MASK,
+        # Continuous capturing stores only changed images and one image every 10 seconds
+        change_gate=ChangeGate(threshold=2.0, keep_alive=10.0),
+        burst_frames=IMAGES_TO_CAPTURE_IN_ONE_SERIES)
+    session.start()
+
     start_time = time.perf_counter()
 
     try:
@@ -91,25 +106,24 @@ if __name__ == "__main__":
                 break
 
             if start_capture:
-                # Start recording images from camera
-                recorded_info = capture_images(
-                    camera,
-                    path_to_store_images=images_series_path,
-                    images_file_names_mask=IMAGES_FILE_NAMES_MASK,
-                    images_to_capture=images_to_capture,
-                    start_image_number=images_captured,
-                    imshow_windows_mask=IMSHOW_WINDOW_MASK)
+                # Start recording images from camera, files are numbered sequentially through all series
+                if images_to_capture > 0:
+                    # Series is captured to memory, its images are stored in background
+                    recorded_info = session.capture_burst(images_to_capture)
+                else:
+                    recorded_info = session.capture_series(images_to_capture)
                 
                 # Add data from capturing (images file names and timestamps) to images series dictionary
                 recorded_info_all.extend(recorded_info)
-                # Calculate total images count with for sequential numbering of files 
-                images_captured = images_captured + len(recorded_info)
 
                 start_capture = False
 
         # Close camera connection
         camera.camera.Disconnect()
     finally:
+        # Wait for storing of captured images
+        session.close()
+
         # Store images file names and timestamps to images series dictionary
         images_series['StoredImages'] = recorded_info_all
 
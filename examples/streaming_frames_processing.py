@@ -0,0 +1,46 @@
+'''An example of processing images from camera as they are captured with FramesStream.
+
+Images are got from camera in background thread while the previous image is processed,
+the example calculates and displays mean brightness of images. If processing is slower
+than camera, old images are dropped and stream statistics show dropped sets and lag.
+'''
+import time
+
+import cv2
+
+# Import cameras_cv_tools from relative path
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cameras_cv_tools.camera_generic_web import CameraWeb as Camera
+from cameras_cv_tools.streaming import FramesStream
+
+
+if __name__ == "__main__":
+    # Number of images sets waiting for processing
+    PREFETCH = 4
+
+    cameras = Camera.get_available_cameras(cameras_num_to_find=1)
+    print("Camera has been connected...")
+
+    cv2.namedWindow('Processing images', cv2.WINDOW_NORMAL)
+
+    start = time.perf_counter()
+
+    with FramesStream(cameras, prefetch=PREFETCH) as stream:
+        for frame_set in stream:
+            img = frame_set.images[0]
+
+            # Process image
+            brightness = img.mean()
+
+            cv2.imshow('Processing images', img)
+            if cv2.waitKey(1) == 27:  # Escape
+                break
+
+            if time.perf_counter() - start > 1:
+                stats = stream.get_stats()
+                print(f'Set {frame_set.set_number}, brightness {brightness:.1f}, dropped {stats["dropped"]}, '
+                      f'lag {stats["lag"]["mean_ms"]:.1f} ms')
+                start = time.perf_counter()
@@ -4,6 +4,7 @@ The example requires NeoAPI from Baumer to work:
 https://www.baumer.com/us/en/product-overview/industrial-cameras-image-processing/software/baumer-neoapi/c/42528
 '''
 import json
+import logging
 
 import neoapi # type: ignore
 
@@ -38,6 +39,9 @@ def initialize_cameras(
 
 
 if __name__ == "__main__":
+    # Capturing progress is logged at INFO level
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     RESULTS_PATH = r"results"
     
     cameras = initialize_cameras(cam_to_found_number=2)
@@ -0,0 +1,5 @@
+'''Test configuration: cameras_cv_tools is imported from relative path, as in examples and benchmarks.'''
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,48 @@
+import logging
+
+import cv2
+import numpy as np
+import pytest
+
+from cameras_cv_tools.calibration_targets import CalibrationTarget, CharucoTarget, ChessboardTarget, detect_targets
+
+
+def make_charuco_image(target: CharucoTarget, size: tuple[int, int]) -> np.ndarray:
+    img = target.board.generateImage((size[0] - 400, size[1] - 400), marginSize=100)
+    homography = np.array([[0.9, 0.05, 150], [-0.03, 0.95, 100], [0, 0, 1]])
+    return cv2.warpPerspective(img, homography, size, borderValue=255)
+
+
+def test_calibration_target_requires_detect():
+    with pytest.raises(TypeError):
+        CalibrationTarget((9, 6), 1.0)
+
+
+def test_charuco_fast_detection_matches_full_resolution():
+    target = CharucoTarget((7, 5), 0.04, 0.03)
+    gray = make_charuco_image(target, (3200, 2400))
+
+    full_points, full_ids = target.detect(gray, detection_size=max(gray.shape))
+    points, ids = target.detect(gray, detection_size=1000)
+
+    assert set(ids) == set(full_ids)
+    full = dict(zip(full_ids, full_points))
+    # Corners are refined in full resolution image
+    assert max(np.abs(full[id] - point).max() for id, point in zip(ids, points)) < 0.1
+
+
+def test_charuco_not_detected_in_empty_image():
+    target = CharucoTarget((7, 5), 0.04, 0.03)
+    assert target.detect(np.full((2400, 3200), 255, np.uint8)) is None
+
+
+def test_detection_summary_is_logged(tmp_path, caplog, capsys):
+    image_path = str(tmp_path / 'empty.png')
+    cv2.imwrite(image_path, np.full((48, 64), 255, np.uint8))
+
+    with caplog.at_level(logging.INFO, logger='cameras_cv_tools.calibration_targets'):
+        detections = detect_targets([image_path], ChessboardTarget((9, 6)), processes=1)
+
+    assert detections == [None]
+    assert 'Target is detected in 0 of 1 images' in caplog.text
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,282 @@
+import importlib
+import pickle
+import sys
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+from cameras_cv_tools.pixel_formats import BAYER_CONVERSIONS, PixelFormatConverter, packed_frame_size, parse_pixel_format
+
+
+PACKED_FORMATS = ['Mono10p', 'Mono12p', 'Mono10Packed', 'Mono12Packed', 'BayerRG12p', 'BayerGB12p', 'BayerGR10p', 'BayerBG12Packed']
+UNPACKED_FORMATS = ['Mono8', 'Mono10', 'Mono12', 'Mono16', 'BayerRG8', 'BayerBG12']
+
+
+def pack_pixels(pixels: np.ndarray, pixel_format: str) -> np.ndarray:
+    '''Pack pixels to the pixel format as camera does, reference implementation bit by bit.'''
+    _, bits, packing = parse_pixel_format(pixel_format)
+    pixels = pixels.reshape(-1).astype(np.uint16)
+
+    if packing == 'p':
+        # Bits of pixels follow each other LSB first
+        pixel_bits = (pixels[:, None] >> np.arange(bits)) & 1
+        return np.packbits(pixel_bits.reshape(-1).astype(np.uint8), bitorder='little')
+
+    if packing == 'Packed':
+        low_bits = bits - 8
+        low_mask = (1 << low_bits) - 1
+        first, second = pixels[0::2], pixels[1::2]
+        data = np.empty((len(first), 3), dtype=np.uint8)
+        data[:, 0] = first >> low_bits
+        data[:, 1] = (first & low_mask) | ((second & low_mask) << 4)
+        data[:, 2] = second >> low_bits
+        return data.reshape(-1)
+
+    if bits == 8:
+        return pixels.astype(np.uint8)
+    return pixels.astype('<u2').view(np.uint8)
+
+
+def make_pixels(pixel_format: str, width: int = 64, height: int = 48) -> np.ndarray:
+    _, bits, _ = parse_pixel_format(pixel_format)
+    return np.random.default_rng(bits).integers(0, 1 << bits, (height, width), dtype=np.uint16)
+
+
+def expected_image(pixels: np.ndarray, pixel_format: str, demosaic: bool = True) -> np.ndarray:
+    bayer_pattern, bits, _ = parse_pixel_format(pixel_format)
+    img = pixels.astype(np.uint8 if bits == 8 else np.uint16)
+    if bayer_pattern is not None and demosaic:
+        img = cv2.cvtColor(img, BAYER_CONVERSIONS[bayer_pattern])
+    return img
+
+
+class StubFeature:
+    def __init__(self, value=None, available=True):
+        self.value = value
+        self.available = available
+
+
+    def IsAvailable(self):
+        return self.available
+
+
+    def GetString(self):
+        return self.value
+
+
+    def SetString(self, value):
+        self.value = value
+
+
+class StubFeatures:
+    def __init__(self):
+        self.TimestampReset = StubFeature(available=False)
+        self.PixelFormat = StubFeature('BayerRG8')
+        self.OffsetX = StubFeature(0)
+        self.OffsetY = StubFeature(0)
+        self.Width = StubFeature(64)
+        self.Height = StubFeature(48)
+        self.WidthMax = StubFeature(64)
+        self.HeightMax = StubFeature(48)
+        self.DeviceSerialNumber = StubFeature('0')
+        # Camera without hardware binning and decimation
+        self.BinningHorizontal = StubFeature(1, available=False)
+        self.BinningVertical = StubFeature(1, available=False)
+        self.DecimationHorizontal = StubFeature(1, available=False)
+        self.DecimationVertical = StubFeature(1, available=False)
+
+
+class StubCamInfo:
+    def __init__(self, serial_number):
+        self.serial_number = serial_number
+
+
+    def GetSerialNumber(self):
+        return self.serial_number
+
+
+    def IsConnectable(self):
+        return True
+
+
+class StubCamInfoList(list):
+    @staticmethod
+    def Get():
+        return StubCamInfoList(StubCamInfo(serial_number) for serial_number in StubCam.serial_numbers)
+
+
+    def Refresh(self):
+        pass
+
+
+class StubImage:
+    def __init__(self, data, pixel_format, width, height):
+        self.data = data
+        self.pixel_format = pixel_format
+        self.width = width
+        self.height = height
+
+
+    def GetNPArray(self):
+        return self.data
+
+
+    def GetPixelFormat(self):
+        return self.pixel_format
+
+
+    def GetWidth(self):
+        return self.width
+
+
+    def GetHeight(self):
+        return self.height
+
+
+    def GetTimestamp(self):
+        return 0
+
+
+class StubCam:
+    # Serial numbers of connectable cameras and all created cameras
+    serial_numbers = []
+    created = []
+
+    def __init__(self):
+        self.f = StubFeatures()
+        self.connected = False
+        StubCam.created.append(self)
+
+
+    def Connect(self, serial_number=None):
+        if serial_number is not None:
+            if serial_number not in StubCam.serial_numbers:
+                raise Exception(f'Camera {serial_number} is not found')
+            self.f.DeviceSerialNumber.value = serial_number
+        self.connected = True
+
+
+    def Disconnect(self):
+        self.connected = False
+
+
+    def IsConnected(self):
+        return self.connected
+
+
+    def GetImage(self):
+        width, height = self.f.Width.value, self.f.Height.value
+        pixel_format = self.f.PixelFormat.value
+        _, bits, packing = parse_pixel_format(pixel_format)
+
+        pixels = getattr(self, 'pixels', None)
+        if pixels is None:
+            pixels = np.arange(width * height, dtype=np.uint16).reshape(height, width) % 256
+
+        if bits == 8 or packing is None:
+            # Not packed frames are arrays of pixels with channels dimension
+            data = pixels.astype(np.uint8 if bits == 8 else np.uint16).reshape(height, width, 1)
+        else:
+            # Packed frames are buffers of bytes with padding
+            data = np.concatenate([pack_pixels(pixels, pixel_format), np.zeros(16, np.uint8)]).reshape(-1, 1)
+        return StubImage(data, pixel_format, width, height)
+
+
+@pytest.fixture
+def CameraBaumer(monkeypatch):
+    '''CameraBaumer class imported with NeoAPI replaced by the stub only for the test.'''
+    monkeypatch.setitem(sys.modules, 'neoapi', types.SimpleNamespace(Cam=StubCam, CamInfoList=StubCamInfoList))
+    monkeypatch.setattr(StubCam, 'serial_numbers', [])
+    monkeypatch.setattr(StubCam, 'created', [])
+    monkeypatch.delitem(sys.modules, 'cameras_cv_tools.camera_baumer', raising=False)
+    yield importlib.import_module('cameras_cv_tools.camera_baumer').CameraBaumer
+    sys.modules.pop('cameras_cv_tools.camera_baumer', None)
+
+
+@pytest.mark.parametrize('pixel_format', PACKED_FORMATS + UNPACKED_FORMATS)
+def test_converter_round_trip(pixel_format):
+    pixels = make_pixels(pixel_format)
+    data = pack_pixels(pixels, pixel_format)
+
+    converter = PixelFormatConverter(pixel_format, 64, 48, demosaic=False)
+    img = converter(data.reshape(48, -1))
+
+    assert np.array_equal(img, expected_image(pixels, pixel_format, demosaic=False))
+
+
+@pytest.mark.parametrize('pixel_format', PACKED_FORMATS + UNPACKED_FORMATS)
+def test_packed_frame_size(pixel_format):
+    assert packed_frame_size(pixel_format, 64, 48) == len(pack_pixels(make_pixels(pixel_format), pixel_format))
+
+
+@pytest.mark.parametrize('deferred_conversion', [True, False])
+@pytest.mark.parametrize('pixel_format', PACKED_FORMATS + UNPACKED_FORMATS)
+def test_get_image_round_trip(CameraBaumer, pixel_format, deferred_conversion):
+    cam = StubCam()
+    cam.f.PixelFormat.value = pixel_format
+    cam.pixels = make_pixels(pixel_format)
+    camera = CameraBaumer(cam, deferred_conversion=deferred_conversion)
+
+    img, _ = camera.get_image()
+    frame_converter = camera.frame_converter
+    if frame_converter is not None:
+        img = pickle.loads(pickle.dumps(frame_converter))(img)
+
+    assert (frame_converter is not None) == (deferred_conversion and pixel_format != 'Mono8')
+    assert np.array_equal(img, expected_image(cam.pixels, pixel_format))
+
+
+def test_software_binning_with_deferred_conversion(CameraBaumer):
+    camera = CameraBaumer(StubCam())
+    camera.binning = 2
+    camera.roi = None
+
+    frame, _ = camera.get_image()
+    img = pickle.loads(pickle.dumps(camera.frame_converter))(frame)
+
+    _, _, width, height = camera.roi
+    assert img.shape == (height, width, 3) == (24, 32, 3)
+
+
+def test_software_decimation_without_deferred_conversion(CameraBaumer):
+    camera = CameraBaumer(StubCam(), deferred_conversion=False)
+    camera.decimation = 2
+    camera.roi = None
+
+    img, _ = camera.get_image()
+
+    assert camera.frame_converter is None
+    assert img.shape == (24, 32, 3)
+
+
+def test_software_decimation_of_mono_frames(CameraBaumer):
+    cam = StubCam()
+    cam.f.PixelFormat.value = 'Mono8'
+    camera = CameraBaumer(cam)
+    camera.decimation = 2
+
+    img, _ = camera.get_image()
+
+    assert camera.frame_converter is None
+    assert np.array_equal(img, (np.arange(64 * 48).reshape(48, 64) % 256)[::2, ::2].astype(np.uint8))
+
+
+def test_discovery_configures_only_selected_cameras(CameraBaumer, tmp_path):
+    StubCam.serial_numbers = ['3', '1', '2']
+    cache_file = str(tmp_path / 'cache.json')
+
+    cameras = CameraBaumer.get_available_cameras(2, timeout=1.0, cache_file=cache_file)
+
+    assert [camera.camera.f.DeviceSerialNumber.value for camera in cameras] == ['3', '1']
+    assert all(camera.camera.IsConnected() for camera in cameras)
+    # Camera over count is disconnected without configuration
+    assert len(StubCam.created) == 3
+    assert sum(cam.connected for cam in StubCam.created) == 2
+
+    # Cached cameras are returned in the same order
+    StubCam.created = []
+    cameras = CameraBaumer.get_available_cameras(2, timeout=1.0, cache_file=cache_file)
+    assert [camera.camera.f.DeviceSerialNumber.value for camera in cameras] == ['3', '1']
+    assert len(StubCam.created) == 2
@@ -0,0 +1,108 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from cameras_cv_tools.camera_generic_web import CameraWeb
+from cameras_cv_tools.capturing import capture_images
+from cameras_cv_tools.streaming import FramesStream
+
+
+FRAMES_NUM = 10
+
+
+@pytest.fixture
+def sequence(tmp_path):
+    '''Image sequence pattern, the first pixel of every image is its number.'''
+    for frame_num in range(FRAMES_NUM):
+        cv2.imwrite(str(tmp_path / f'img_{frame_num:03d}.png'), np.full((24, 32), frame_num, np.uint8))
+    return str(tmp_path / 'img_%03d.png')
+
+
+def test_sequence_ends_with_eof(sequence):
+    camera = CameraWeb(id=sequence, backend='images')
+
+    frames = [camera.get_image()[0][0, 0] for _ in range(FRAMES_NUM)]
+    with pytest.raises(EOFError):
+        camera.get_image()
+    camera.close()
+
+    assert frames == list(range(FRAMES_NUM))
+    assert camera.frames_grabbed == FRAMES_NUM
+
+
+def test_latest_frame_skips_frames(sequence):
+    camera = CameraWeb(id=sequence, backend='images', latest_frame=True)
+
+    # Reader thread reads all images before the first get_image
+    deadline = time.perf_counter() + 5
+    while camera._grabbing and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+    img, _ = camera.get_image()
+    assert img[0, 0] == FRAMES_NUM - 1
+    assert camera.frames_skipped == FRAMES_NUM - 1
+    assert camera.frames_grabbed == FRAMES_NUM
+
+    with pytest.raises(EOFError):
+        camera.get_image()
+    camera.close()
+
+
+def test_stream_of_sequence_ends_normally(sequence):
+    camera = CameraWeb(id=sequence, backend='images', latest_frame=True)
+
+    with FramesStream(camera, overflow_policy='block') as stream:
+        frames = [frame_set.images[0][0, 0] for frame_set in stream]
+    camera.close()
+
+    assert stream.exception is None
+    assert frames[-1] == FRAMES_NUM - 1
+    assert len(frames) + camera.frames_skipped == FRAMES_NUM
+
+
+def test_get_image_into(sequence):
+    camera = CameraWeb(id=sequence, backend='images')
+    out = np.empty((24, 32), np.uint8)
+
+    for frame_num in range(FRAMES_NUM):
+        camera.get_image_into(out)
+        assert np.all(out == frame_num)
+    with pytest.raises(EOFError):
+        camera.get_image_into(out)
+    camera.close()
+
+
+class FailingCapture:
+    '''VideoCapture grabbing frames which cannot be decoded.'''
+    def grab(self):
+        return True
+
+    def retrieve(self, image=None):
+        return False, None
+
+    def release(self):
+        pass
+
+
+def test_failed_retrieve_raises_value_error(sequence):
+    camera = CameraWeb(id=sequence, backend='images')
+    camera.camera.release()
+    camera.camera = FailingCapture()
+
+    with pytest.raises(ValueError):
+        camera.get_image()
+    with pytest.raises(ValueError):
+        camera.get_image_into(np.empty((24, 32), np.uint8))
+
+
+def test_capture_of_sequence_ends_normally(sequence, tmp_path):
+    path_to_store_images = tmp_path / 'captured'
+    path_to_store_images.mkdir()
+    camera = CameraWeb(id=sequence, backend='images')
+    recorded_info = capture_images(camera, str(path_to_store_images), processes_to_run=1, preview=False)
+    camera.close()
+
+    assert len(recorded_info) == FRAMES_NUM
+    assert len(list(path_to_store_images.iterdir())) == FRAMES_NUM
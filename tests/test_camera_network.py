@@ -0,0 +1,97 @@
+import os
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from cameras_cv_tools.camera import Camera
+from cameras_cv_tools.camera_network import CameraNetwork, FrameServer
+from cameras_cv_tools.capturing import capture_images
+
+
+def make_frame(frame_num: int, shape: tuple, dtype: np.dtype) -> np.ndarray:
+    return np.random.default_rng(frame_num).integers(0, np.iinfo(dtype).max, shape, dtype=dtype, endpoint=True)
+
+
+class PatternCamera(Camera):
+    '''Camera returning reproducible random frames numbered from 1.'''
+    def __init__(self, shape: tuple, dtype: np.dtype = np.uint8):
+        self.shape = shape
+        self.dtype = dtype
+        self.frames = 0
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [PatternCamera((48, 64)) for _ in range(cameras_num_to_find)]
+
+    def get_image(self) -> tuple[np.ndarray, int]:
+        self.frames += 1
+        return make_frame(self.frames, self.shape, self.dtype), time.time_ns()
+
+
+@pytest.fixture
+def server():
+    cameras = [PatternCamera((48, 64)), PatternCamera((30, 40, 3), np.uint16)]
+    with FrameServer(cameras, host='127.0.0.1', port=0) as server:
+        yield server
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'png'])
+@pytest.mark.parametrize('prefetch', [False, True])
+def test_lossless_frames_are_received_exactly(server, compression, prefetch):
+    cameras = CameraNetwork.get_available_cameras(
+        2, host='127.0.0.1', port=server.port, compression=compression, prefetch=prefetch)
+
+    for frame_num in range(1, 4):
+        for camera, server_camera in zip(cameras, server.cameras):
+            img, timestamp = camera.get_image()
+            assert img.dtype == server_camera.dtype
+            assert np.array_equal(img, make_frame(frame_num, server_camera.shape, server_camera.dtype))
+            # Clocks of the server and the client are the same on loopback
+            assert abs(time.time_ns() - timestamp) < 1e9
+
+    for camera in cameras:
+        camera.close()
+
+
+def test_jpeg_frames_are_close(server):
+    camera = CameraNetwork('127.0.0.1', server.port, compression='jpeg', compression_level=100)
+
+    img, _ = camera.get_image()
+    camera.close()
+
+    assert img.shape == (48, 64)
+    assert np.abs(img.astype(int) - make_frame(1, (48, 64), np.uint8)).mean() < 8
+
+
+def test_cameras_are_limited_by_server(server):
+    cameras = CameraNetwork.get_available_cameras(5, host='127.0.0.1', port=server.port)
+
+    assert [camera.camera_index for camera in cameras] == [0, 1]
+    for camera in cameras:
+        camera.close()
+
+    with pytest.raises(ValueError):
+        CameraNetwork('127.0.0.1', server.port, camera_index=2)
+
+
+def test_reconnect_after_broken_connection(server):
+    camera = CameraNetwork('127.0.0.1', server.port)
+    camera.get_image()
+
+    camera.socket.shutdown(socket.SHUT_RDWR)
+    img, _ = camera.get_image()
+    camera.close()
+
+    assert camera.reconnects == 1
+    assert img.shape == (48, 64)
+
+
+def test_capture_images_from_server(server, tmp_path):
+    cameras = CameraNetwork.get_available_cameras(2, host='127.0.0.1', port=server.port, compression='zlib')
+    capture_images(cameras, str(tmp_path), 10, processes_to_run=2, preview=False)
+    for camera in cameras:
+        camera.close()
+
+    assert len(os.listdir(tmp_path)) == 20
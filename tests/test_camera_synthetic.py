@@ -0,0 +1,25 @@
+import time
+
+from cameras_cv_tools.camera_synthetic import CameraSynthetic
+
+
+def capture_duration(camera: CameraSynthetic, frames_num: int) -> float:
+    start = time.perf_counter()
+    for _ in range(frames_num):
+        camera.get_image()
+    return time.perf_counter() - start
+
+
+def test_frame_rate_is_restored_when_enabled():
+    camera = CameraSynthetic(64, 48, frame_rate=50)
+    camera.frame_rate_enable = False
+
+    assert not camera.frame_rate_enable
+    assert camera.frame_rate == 50
+    assert capture_duration(camera, 10) < 0.1
+
+    camera.frame_rate_enable = True
+
+    assert camera.frame_rate_enable
+    # Timing starts again, the first frame is returned immediately
+    assert 0.15 < capture_duration(camera, 10) < 0.4
@@ -0,0 +1,110 @@
+'''Tests of capturing sessions with synthetic cameras.'''
+import os
+import time
+
+import numpy as np
+
+from cameras_cv_tools.camera import Camera
+from cameras_cv_tools.capturing import CaptureSession
+from cameras_cv_tools.change_gate import ChangeGate
+from cameras_cv_tools.encoders import NumpyEncoder
+
+
+def double_width(frame: np.ndarray) -> np.ndarray:
+    return np.hstack([frame, frame])
+
+
+class ConvertedCamera(Camera):
+    '''Camera returning raw frames converted to bigger images by frame_converter.'''
+    def __init__(self):
+        self.frames = 0
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [ConvertedCamera() for _ in range(cameras_num_to_find)]
+
+    def get_image(self) -> tuple[np.ndarray, int]:
+        self.frames += 1
+        return np.full((48, 64), self.frames % 256, dtype=np.uint8), time.time_ns()
+
+    @property
+    def frame_converter(self):
+        return double_width
+
+
+def test_queued_bytes_counted_by_raw_frames(tmp_path):
+    with CaptureSession(
+            ConvertedCamera(), str(tmp_path), images_file_names_mask=lambda cam_num, image_num: f'{image_num}.npy',
+            image_encoder=NumpyEncoder(), processes_to_run=2, preview=False) as session:
+        session.capture_series(20)
+        session.flush()
+
+        assert session.files_to_store_queue.queued_bytes == 0
+        assert len(os.listdir(tmp_path)) == 20
+
+    assert np.load(tmp_path / '0.npy').shape == (48, 128)
+
+
+class SceneCamera(Camera):
+    '''Camera returning static scene changed at given frames.'''
+    def __init__(self, changes: tuple[int] = ()):
+        self.changes = changes
+        self.frames = 0
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [SceneCamera() for _ in range(cameras_num_to_find)]
+
+    def get_image(self) -> tuple[np.ndarray, int]:
+        scene = sum(self.frames >= change for change in self.changes)
+        self.frames += 1
+        return np.full((48, 64), 50 * scene, dtype=np.uint8), self.frames
+
+
+def capture_with_drops(tmp_path, camera: Camera, drops: dict, images_to_capture: int) -> list:
+    '''Capture series with change gate, put of set number in drops drops images of the given sets.'''
+    with CaptureSession(
+            camera, str(tmp_path), images_file_names_mask=lambda cam_num, image_num: f'{image_num}.npy',
+            image_encoder=NumpyEncoder(), processes_to_run=1, preview=False,
+            change_gate=ChangeGate(keep_alive=0)) as session:
+        queue = session.files_to_store_queue
+        put = queue.put
+        items = {}
+
+        def dropping_put(item, root_num=0):
+            items[item.set_index] = item
+            put(item, root_num)
+            return [items[set_index] for set_index in drops.get(item.set_index, [])]
+
+        queue.put = dropping_put
+        recorded_info = session.capture_series(images_to_capture)
+        session.flush()
+
+    return [file_name for _, file_name in recorded_info]
+
+
+def test_image_after_dropped_one_is_stored(tmp_path):
+    # The first image is dropped as by 'drop_newest' policy
+    file_names = capture_with_drops(tmp_path, SceneCamera(), {0: [0]}, 4)
+
+    assert file_names == [None, '1.npy', '1.npy', '1.npy']
+
+
+def test_skipped_images_referring_dropped_image_are_dropped(tmp_path):
+    # The stored image of the first scene is dropped by the image of the second scene as by 'drop_oldest' policy
+    file_names = capture_with_drops(tmp_path, SceneCamera(changes=(3,)), {3: [0]}, 5)
+
+    assert file_names == [None, None, None, '3.npy', '3.npy']
+
+
+def test_images_left_in_grabbers_are_counted_as_dropped(tmp_path):
+    camera = SceneCamera()
+    with CaptureSession(
+            camera, str(tmp_path), images_file_names_mask=lambda cam_num, image_num: f'{image_num}.npy',
+            image_encoder=NumpyEncoder(), processes_to_run=1, preview=False, parallel_grabbing=True) as session:
+        session.capture_series(10)
+        session.flush()
+        stats = session.telemetry.get_stats()
+
+    assert len(os.listdir(tmp_path)) == 10
+    assert stats['cameras'][0]['dropped'] == camera.frames - 10
@@ -0,0 +1,38 @@
+import json
+
+import pytest
+
+from cameras_cv_tools.dataset import SessionDataset
+from cameras_cv_tools.recording_index import RecordingIndexWriter
+
+
+def write_empty_json(path: str) -> None:
+    with open(f'{path}/recorded_data.json', 'w', encoding='utf8') as file:
+        json.dump([], file)
+
+
+def write_empty_index(path: str) -> None:
+    writer = RecordingIndexWriter(path)
+    writer.add_dropped(0, 1)
+    writer.close()
+
+
+@pytest.mark.parametrize('write_session', [write_empty_json, write_empty_index, lambda path: None])
+def test_session_without_sets_is_empty(tmp_path, write_session):
+    write_session(str(tmp_path))
+
+    # The second dataset is opened from cached index
+    for _ in range(2):
+        with SessionDataset(str(tmp_path)) as dataset:
+            assert len(dataset) == 0
+            assert dataset.cameras_num == 0
+            assert list(dataset) == []
+            assert len(dataset.select(0, 1 << 62)) == 0
+            assert dataset.nearest(0) is None
+            assert dataset.sync_set(0, 1) == []
+
+
+def test_empty_recorded_info_list(tmp_path):
+    with SessionDataset(str(tmp_path), []) as dataset:
+        assert len(dataset) == 0
+        assert dataset.timestamps.shape == (0, 0)
@@ -0,0 +1,91 @@
+import time
+
+from cameras_cv_tools.discovery import discover_devices, probe_devices
+
+
+class StubBackend:
+    '''Backend with devices opening after configurable delays, missing devices raise exception.'''
+    def __init__(self, delays: dict):
+        self.delays = delays
+        self.probed = []
+        self.released = []
+        self.enumerations = 0
+
+
+    def probe(self, device_id):
+        self.probed.append(device_id)
+        if device_id not in self.delays:
+            raise Exception(f'Device {device_id} is not connected')
+        time.sleep(self.delays[device_id])
+        return f'device-{device_id}'
+
+
+    def release(self, device):
+        self.released.append(device)
+
+
+    def enumerate(self):
+        self.enumerations = self.enumerations + 1
+        return list(self.delays)
+
+
+def test_probe_devices_skips_and_releases_slow_devices():
+    backend = StubBackend({'a': 0.0, 'b': 0.5, 'c': 0.05})
+
+    start = time.perf_counter()
+    devices = probe_devices(backend.probe, ['a', 'b', 'c', 'd'], 0.2, backend.release)
+
+    assert time.perf_counter() - start < 0.4
+    assert list(devices) == ['a', 'c']
+
+    # Device opened after timeout is released by its probing thread
+    time.sleep(0.5)
+    assert backend.released == ['device-b']
+
+
+def test_cached_devices_are_probed_up_to_count(tmp_path):
+    cache_file = str(tmp_path / 'cache.json')
+    backend = StubBackend({'a': 0.01, 'b': 0.01, 'c': 0.01})
+
+    devices = discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub')
+    assert list(devices) == ['a', 'b', 'c']
+
+    backend.probed = []
+    devices = discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub', 2)
+
+    assert list(devices) == ['a', 'b']
+    assert sorted(backend.probed) == ['a', 'b']
+    assert backend.enumerations == 1
+
+
+def test_missing_devices_are_probed_if_cache_has_fewer(tmp_path):
+    cache_file = str(tmp_path / 'cache.json')
+    backend = StubBackend({'a': 0.01})
+    discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub')
+
+    # Two devices are connected since the cache was written
+    backend.delays.update({'b': 0.02, 'c': 0.01})
+    backend.probed = []
+    devices = discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub', 2)
+
+    assert len(devices) == 2
+    assert list(devices)[0] == 'a'
+    assert sorted(backend.probed) == ['a', 'b', 'c']
+    # Device found over count is released
+    assert len(backend.released) == 1
+
+    backend.probed = []
+    devices = discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub', 2)
+    assert len(devices) == 2
+    assert len(backend.probed) == 2
+
+
+def test_devices_are_ordered_as_device_ids_with_cache(tmp_path):
+    cache_file = str(tmp_path / 'cache.json')
+    backend = StubBackend({'b': 0.01})
+    discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub')
+
+    backend.delays = {'c': 0.01, 'a': 0.01, 'b': 0.01}
+    devices = discover_devices(backend.probe, backend.enumerate, 1.0, backend.release, cache_file, 'stub', 3)
+
+    assert list(devices) == ['c', 'a', 'b']
@@ -0,0 +1,71 @@
+import logging
+import time
+from threading import Event
+
+import numpy as np
+
+from cameras_cv_tools.camera import Camera
+from cameras_cv_tools.grabbing import CameraGrabber
+
+
+class CountingCamera(Camera):
+    def __init__(self):
+        self.frames = 0
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [CountingCamera() for _ in range(cameras_num_to_find)]
+
+    def get_image(self) -> tuple[np.ndarray, int]:
+        time.sleep(0.001)
+        self.frames += 1
+        return np.zeros((4, 4), np.uint8), self.frames
+
+
+def test_stop_returns_discarded_images():
+    camera = CountingCamera()
+    grabber = CameraGrabber(camera, queue_size=4)
+    grabber.start()
+
+    got = [grabber.get() for _ in range(3)]
+    # Let the grabber fill the queue
+    time.sleep(0.1)
+    discarded = grabber.stop()
+
+    assert [timestamp for _, timestamp in got] == [1, 2, 3]
+    # Full queue and the image waiting for free place in it
+    assert discarded == 5
+    # Every grabbed image is got or discarded
+    assert len(got) + discarded == camera.frames
+    assert grabber.images.empty()
+
+
+class HangingCamera(Camera):
+    def __init__(self):
+        self.release = Event()
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [HangingCamera() for _ in range(cameras_num_to_find)]
+
+    def get_image(self) -> tuple[np.ndarray, int]:
+        self.release.wait()
+        return np.zeros((4, 4), np.uint8), 0
+
+
+def test_stop_reports_stuck_grabber(caplog):
+    camera = HangingCamera()
+    grabber = CameraGrabber(camera)
+    grabber.start()
+
+    start = time.perf_counter()
+    with caplog.at_level(logging.WARNING, logger='cameras_cv_tools.grabbing'):
+        discarded = grabber.stop(timeout=0.1)
+
+    assert time.perf_counter() - start < 1.0
+    assert discarded == 0
+    assert 'is stuck' in caplog.text
+
+    camera.release.set()
+    grabber.join(1.0)
+    assert not grabber.is_alive()
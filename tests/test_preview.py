@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pytest
+
+from cameras_cv_tools import preview as preview_module
+from cameras_cv_tools.preview import Preview
+
+
+@pytest.fixture
+def shown(monkeypatch):
+    '''Images displayed by cv2.imshow by windows names, windows are not created.'''
+    shown = {}
+    monkeypatch.setattr(preview_module.cv2, 'imshow', lambda window_name, img: shown.__setitem__(window_name, img))
+    monkeypatch.setattr(preview_module.cv2, 'waitKey', lambda delay: -1)
+    return shown
+
+
+def slow_converter(frame: np.ndarray) -> np.ndarray:
+    time.sleep(0.2)
+    return frame * 2
+
+
+def test_conversion_does_not_block_show(shown):
+    preview = Preview(['camera_0', 'camera_1'], rate=0, max_size=100, frame_converters=[slow_converter, None])
+    images = [np.ones((400, 300), np.uint8), np.zeros((50, 60), np.uint8)]
+
+    start = time.perf_counter()
+    for _ in range(5):
+        preview.show(images)
+    assert time.perf_counter() - start < 0.1
+
+    preview.show(images, wait=True)
+    preview.close()
+
+    # Converted image is decimated to fit max_size
+    assert shown['camera_0'].shape == (100, 75)
+    assert np.all(shown['camera_0'] == 2)
+    assert shown['camera_1'].shape == (50, 60)
+
+
+def test_windows_are_updated_with_rate(shown):
+    preview = Preview(['camera_0'], rate=5)
+    preview.show([np.zeros((10, 10), np.uint8)], wait=True)
+    shown.clear()
+
+    preview.show([np.zeros((10, 10), np.uint8)])
+    preview.close()
+
+    assert shown == {}
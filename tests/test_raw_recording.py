@@ -0,0 +1,67 @@
+import numpy as np
+
+from cameras_cv_tools.raw_recording import RawChunksWriter, RawRecordingReader, RawRecordingWriter
+
+
+def make_frame(frame_num: int) -> np.ndarray:
+    return np.full((6, 8), frame_num, dtype=np.uint16)
+
+
+def record(writer: RawRecordingWriter, chunks: RawChunksWriter, frame_nums: range) -> None:
+    for frame_num in frame_nums:
+        location, _ = writer.add_frame(0, frame_num, make_frame(frame_num), frame_num * 1000)
+        chunks.write(location, make_frame(frame_num))
+
+
+def test_frames_are_read_after_commit(tmp_path):
+    # Chunks of 3 frames
+    writer = RawRecordingWriter(str(tmp_path), chunk_size=3 * make_frame(0).nbytes)
+    chunks = RawChunksWriter()
+
+    record(writer, chunks, range(5))
+    assert len(RawRecordingReader(str(tmp_path))) == 0
+
+    chunks.close()
+    writer.commit()
+    reader = RawRecordingReader(str(tmp_path))
+
+    assert len(reader) == 5
+    assert list(reader.frame_numbers) == list(range(5))
+    assert all(np.array_equal(img, make_frame(frame_num)) for frame_num, img in enumerate(reader))
+    assert np.array_equal(reader[1:4], np.stack([make_frame(frame_num) for frame_num in range(1, 4)]))
+    writer.close()
+
+
+def test_recording_is_continued_after_committed_frames(tmp_path):
+    writer = RawRecordingWriter(str(tmp_path))
+    chunks = RawChunksWriter()
+    record(writer, chunks, range(3))
+    writer.commit()
+
+    # Index records of frames added after commit are not visible and are overwritten by continued recording
+    writer.add_frame(0, 100, make_frame(100), 0)
+    writer.recordings[0].index_file.flush()
+    assert len(RawRecordingReader(str(tmp_path))) == 3
+
+    writer = RawRecordingWriter(str(tmp_path))
+    record(writer, chunks, range(3, 5))
+    chunks.close()
+    writer.close()
+    reader = RawRecordingReader(str(tmp_path))
+
+    assert list(reader.frame_numbers) == list(range(5))
+    assert np.array_equal(reader[4], make_frame(4))
+
+
+def test_chunk_files_are_kept_open(tmp_path):
+    writer = RawRecordingWriter(str(tmp_path), chunk_size=2 * make_frame(0).nbytes)
+    chunks = RawChunksWriter()
+
+    record(writer, chunks, range(6))
+    open_files = list(chunks.chunk_files.values())
+    record(writer, chunks, range(6, 8))
+
+    assert len(open_files) == 3
+    assert all(chunk_file in chunks.chunk_files.values() for chunk_file in open_files)
+    chunks.close()
+    writer.close()
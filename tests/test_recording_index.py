@@ -0,0 +1,32 @@
+import numpy as np
+
+from cameras_cv_tools.recording_index import RecordingIndexWriter, load_recording_index
+
+
+def test_dropped_images_are_marked_only_in_their_sets(tmp_path):
+    writer = RecordingIndexWriter(str(tmp_path))
+    for set_index in (0, 2, 4):
+        for cam_num in range(2):
+            writer.add_frame(set_index, cam_num, set_index * 10 + cam_num, f'{cam_num}_{set_index}.png')
+    writer.add_dropped(2, 1)
+    # Sets without stored images, dropped records do not refer to neighbouring sets
+    writer.add_dropped(3, 0)
+    writer.add_dropped(5, 1)
+    writer.add_dropped(-1, 0)
+    writer.close()
+
+    index = load_recording_index(str(tmp_path))
+
+    assert index.set_numbers.tolist() == [0, 2, 4]
+    assert index.file_names.tolist() == [['0_0.png', '1_0.png'], ['0_2.png', None], ['0_4.png', '1_4.png']]
+    assert np.array_equal(index.timestamps, [[0, 1], [20, 21], [40, 41]])
+
+
+def test_index_with_only_dropped_records_is_empty(tmp_path):
+    writer = RecordingIndexWriter(str(tmp_path))
+    writer.add_dropped(0, 0)
+    writer.close()
+
+    index = load_recording_index(str(tmp_path))
+
+    assert index.file_names.shape == (0, 0)
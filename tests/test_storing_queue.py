@@ -0,0 +1,104 @@
+import time
+from threading import Thread
+
+import numpy as np
+import pytest
+
+from cameras_cv_tools.shared_frames import SharedFramesRing
+from cameras_cv_tools.storing_queue import StoringItem, StoringQueue
+
+
+IMAGE_BYTES = 64 * 1024
+
+
+def make_item(number: int) -> StoringItem:
+    return StoringItem(f'{number}.png', np.full(IMAGE_BYTES, number % 256, np.uint8), number, 0)
+
+
+def store_items(queue: StoringQueue, stored: list, delay: float) -> None:
+    '''Slow storing process: gets items and frees their memory after delay.'''
+    while True:
+        item = queue.queue.get()
+        if item is None:
+            return
+        time.sleep(delay)
+        with queue.queued_bytes.get_lock():
+            queue.queued_bytes.value = queue.queued_bytes.value - item.img.nbytes
+        stored.append(item.set_index)
+
+
+def overload(queue: StoringQueue, items_num: int, delay: float) -> tuple[list, list, int]:
+    '''Put items much faster than they are stored, returns stored and dropped numbers and maximum queued bytes.'''
+    stored = []
+    dropped = []
+    max_queued_bytes = 0
+    storing = Thread(target=store_items, args=[queue, stored, delay], daemon=True)
+    storing.start()
+
+    for number in range(items_num):
+        dropped.extend(item.set_index for item in queue.put(make_item(number)))
+        max_queued_bytes = max(max_queued_bytes, queue.queued_bytes.value)
+
+    if queue.overflow_policy == 'spill':
+        queue.flush_spilled()
+    queue.queue.put(None)
+    storing.join()
+    queue.close()
+    return stored, dropped, max_queued_bytes
+
+
+@pytest.mark.parametrize('policy', ['block', 'drop_newest', 'drop_oldest', 'spill'])
+def test_memory_limit_is_kept_under_overload(tmp_path, policy):
+    queue = StoringQueue(4 * IMAGE_BYTES, policy, str(tmp_path / 'spill.tmp'))
+
+    stored, dropped, max_queued_bytes = overload(queue, 50, 0.005)
+
+    assert max_queued_bytes <= 4 * IMAGE_BYTES
+    assert queue.queued_bytes.value == 0
+    assert sorted(stored + dropped) == list(range(50))
+    if policy in ('block', 'spill'):
+        assert dropped == []
+        assert stored == list(range(50))
+    else:
+        assert len(dropped) > 0
+
+
+@pytest.mark.parametrize('policy', ['drop_newest', 'drop_oldest'])
+def test_drop_policies_do_not_block(policy):
+    queue = StoringQueue(4 * IMAGE_BYTES, policy)
+
+    # Items are put without consumer, so the oldest ones can be in feeder thread buffer and cannot be dropped
+    dropped = []
+    for number in range(20):
+        start = time.perf_counter()
+        dropped.extend(item.set_index for item in queue.put(make_item(number)))
+        assert time.perf_counter() - start < 0.05
+        assert queue.queued_bytes.value <= 4 * IMAGE_BYTES
+
+    queued = sorted(set(range(20)) - set(dropped))
+    assert len(queued) == 4
+    assert [queue.queue.get(timeout=1).set_index for _ in range(4)] == queued
+    queue.close()
+
+
+@pytest.mark.parametrize('policy, stored', [('drop_newest', [0, 1]), ('drop_oldest', [1, 2])])
+def test_drop_policies_are_applied_without_free_shared_slots(policy, stored):
+    shared_frames = SharedFramesRing(2)
+    shared_frames.allocate(IMAGE_BYTES)
+    queue = StoringQueue(0, policy, shared_frames=shared_frames)
+
+    dropped = []
+    for number in range(3):
+        start = time.perf_counter()
+        dropped.extend(item.set_index for item in queue.put(make_item(number)))
+        assert time.perf_counter() - start < 0.05
+        # Wait for feeder thread to flush the descriptor to the pipe
+        time.sleep(0.05)
+
+    assert dropped == sorted(set(range(3)) - set(stored))
+    items = [queue.queue.get(timeout=1) for _ in stored]
+    assert [item.set_index for item in items] == stored
+    assert all(np.all(shared_frames.get(item.img) == item.set_index) for item in items)
+
+    queue.close()
+    shared_frames.close()
@@ -0,0 +1,45 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from cameras_cv_tools.camera import Camera
+from cameras_cv_tools.streaming import FramesStream
+
+
+class FiniteCamera(Camera):
+    '''Camera raising EOFError after the last frame, as CameraReplay does.'''
+    def __init__(self, frames_num: int):
+        self.frames_num = frames_num
+        self.frame = 0
+        self.type = 'finite'
+
+
+    @staticmethod
+    def get_available_cameras(cameras_num_to_find: int = 1) -> list[Camera]:
+        return [FiniteCamera(10) for _ in range(cameras_num_to_find)]
+
+
+    def get_image(self) -> tuple[np.ndarray|int]:
+        if self.frame >= self.frames_num:
+            raise EOFError('All recorded images are replayed')
+        self.frame = self.frame + 1
+        return np.full((4, 4), self.frame, np.uint8), self.frame
+
+
+@pytest.mark.parametrize('parallel_grabbing', [False, True])
+def test_iteration_ends_at_end_of_replay(parallel_grabbing):
+    with FramesStream([FiniteCamera(10), FiniteCamera(10)], overflow_policy='block',
+                      parallel_grabbing=parallel_grabbing) as stream:
+        timestamps = [frame_set.timestamps for frame_set in stream]
+
+    assert timestamps == [[frame, frame] for frame in range(1, 11)]
+    assert stream.exception is None
+
+
+def test_async_iteration_ends_at_end_of_replay():
+    async def consume(stream):
+        return [frame_set.set_number async for frame_set in stream]
+
+    with FramesStream(FiniteCamera(5), overflow_policy='block') as stream:
+        assert asyncio.run(consume(stream)) == list(range(5))
@@ -0,0 +1,85 @@
+import builtins
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+import pytest
+
+from cameras_cv_tools.camera_replay import CameraReplay
+from cameras_cv_tools.camera_synthetic import CameraSynthetic
+from cameras_cv_tools.capturing import capture_images
+from cameras_cv_tools.recording_index import load_recording_index
+
+
+SETS_NUM = 100
+
+
+@pytest.fixture
+def storage_roots(tmp_path):
+    '''Three storage roots.'''
+    roots = [str(tmp_path / f'root_{root_num}') for root_num in range(3)]
+    for root in roots:
+        os.mkdir(root)
+    return roots
+
+
+@pytest.fixture
+def throttled_storage_roots(storage_roots, monkeypatch):
+    '''Three storage roots, writing of files to the last one is throttled.'''
+    if mp.get_start_method() != 'fork':
+        pytest.skip('Throttling of storing processes requires fork start method')
+
+    # Storing processes are forked after patching, so they write with throttled open
+    throttled_open = builtins.open
+    def open_throttled(file, mode='r', *args, **kwargs):
+        if isinstance(file, str) and file.startswith(storage_roots[2]) and 'w' in mode:
+            time.sleep(0.02)
+        return throttled_open(file, mode, *args, **kwargs)
+    monkeypatch.setattr(builtins, 'open', open_throttled)
+
+    return storage_roots
+
+
+def capture(storage_roots: list[str], striping_policy: str) -> list[int]:
+    cameras = [CameraSynthetic(320, 240, frame_rate=1000, seed=cam_num) for cam_num in range(2)]
+    capture_images(
+        cameras, storage_roots, SETS_NUM, images_file_names_mask=lambda cam_num, image_num: f'{cam_num}_{image_num}.png',
+        processes_to_run=3, preview=False, recording_index=True,
+        striping_policy=striping_policy)
+    return [len([name for name in os.listdir(root) if name.endswith('.png')]) for root in storage_roots]
+
+
+def test_round_robin_stripes_evenly(storage_roots):
+    files_num = capture(storage_roots, 'round_robin')
+
+    assert sum(files_num) == 2 * SETS_NUM
+    assert max(files_num) - min(files_num) <= 1
+
+
+def test_bandwidth_policy_avoids_slow_root(throttled_storage_roots):
+    files_num = capture(throttled_storage_roots, 'bandwidth')
+
+    assert sum(files_num) == 2 * SETS_NUM
+    assert files_num[2] < min(files_num[:2]) / 2, files_num
+
+
+def test_striped_recording_is_replayed_as_one_sequence(storage_roots):
+    files_num = capture(storage_roots, 'round_robin')
+
+    index = load_recording_index(storage_roots[0])
+    assert np.bincount(index.roots.ravel(), minlength=3).tolist() == files_num
+
+    replay = CameraReplay(storage_roots[0], index.to_recorded_info(), cam_num=1, speed=0)
+    images_num = 0
+    try:
+        while True:
+            img, _ = replay.get_image()
+            assert img.shape == (240, 320)
+            images_num = images_num + 1
+    except EOFError:
+        pass
+    finally:
+        replay.close()
+
+    assert images_num == SETS_NUM
@@ -0,0 +1,31 @@
+import numpy as np
+
+from cameras_cv_tools.synchronization import recorded_info_timestamps, synchronize_recorded_info
+
+
+RECORDED_INFO = [
+    [10, 'a0', 12, 'b0'],
+    [None, None, 20, 'b1'],
+    [30, 'a1', 45, 'b2'],
+    [40, 'a2', None, None],
+]
+
+
+def test_recorded_info_timestamps_skip_missing_frames():
+    timestamps = recorded_info_timestamps(RECORDED_INFO)
+
+    assert [ts.tolist() for ts in timestamps] == [[10, 30, 40], [12, 20, 45]]
+
+
+def test_recorded_info_sets_are_rebuilt_by_timestamps():
+    synchronized, matching = synchronize_recorded_info(RECORDED_INFO, 3)
+
+    assert synchronized == [
+        [10, 'a0', 12, 'b0'],
+        [None, None, 20, 'b1'],
+        [30, 'a1', None, None],
+        [40, 'a2', None, None],
+        [None, None, 45, 'b2'],
+    ]
+    assert np.array_equal(matching.missing.sum(axis=0), [2, 2])
+    assert isinstance(synchronized[0][0], int)
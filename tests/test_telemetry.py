@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from cameras_cv_tools.telemetry import _add_duration, histogram_summary, HISTOGRAM_BINS
+
+
+def make_histogram(durations_ns: list[int]) -> list[int]:
+    histogram = [0] * (HISTOGRAM_BINS + 2)
+    for duration_ns in durations_ns:
+        _add_duration(histogram, 0, duration_ns)
+    return histogram
+
+
+def test_percentiles_do_not_exceed_max():
+    # 5 ms is in the bin with upper bound 8.4 ms
+    summary = histogram_summary(make_histogram([5_000_000] * 100))
+
+    assert summary['max_ms'] == 5.0
+    assert summary['p50_ms'] <= summary['max_ms']
+    assert summary['p99_ms'] == summary['max_ms']
+
+
+def test_percentiles_are_interpolated_within_bin():
+    durations_ns = [int(duration) for duration in np.linspace(2 ** 20, 2 ** 21 - 1, 1000)]
+    summary = histogram_summary(make_histogram(durations_ns))
+
+    assert summary['p50_ms'] == pytest.approx(np.percentile(durations_ns, 50) / 1e6, rel=0.01)
+    assert summary['p99_ms'] == pytest.approx(np.percentile(durations_ns, 99) / 1e6, rel=0.01)
+
+
+def test_empty_histogram():
+    assert histogram_summary(make_histogram([]))['count'] == 0